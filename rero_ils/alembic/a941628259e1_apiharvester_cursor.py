@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+#
+# RERO ILS
+# Copyright (C) 2021 RERO
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Add the harvest cursor and statistics to the api harvester config."""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'a941628259e1'
+down_revision = '9e3145d88e64'
+branch_labels = ()
+depends_on = None
+
+
+def upgrade():
+    """Upgrade database."""
+    op.add_column('apiharvester_config',
+                  sa.Column('next_url', sa.Text(), nullable=True))
+    op.add_column('apiharvester_config',
+                  sa.Column('harvested', sa.Integer(), nullable=True))
+    op.add_column('apiharvester_config',
+                  sa.Column('harvest_duration', sa.Float(), nullable=True))
+
+
+def downgrade():
+    """Downgrade database."""
+    op.drop_column('apiharvester_config', 'harvest_duration')
+    op.drop_column('apiharvester_config', 'harvested')
+    op.drop_column('apiharvester_config', 'next_url')
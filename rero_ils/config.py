@@ -302,6 +302,13 @@ CELERY_BEAT_SCHEDULE = {
         'schedule': timedelta(minutes=1),
         'enabled': False
     },
+    'reindex-queue': {
+        'task': 'rero_ils.modules.tasks.flush_reindex_queue',
+        'schedule': timedelta(minutes=1),
+        'enabled': False
+        # Reindex the parent records queued by the coalescing reindex queue
+        # if a debounced flush was lost.
+    },
     'accounts': {
         'task': 'invenio_accounts.tasks.clean_session_table',
         'schedule': timedelta(minutes=60),
@@ -367,6 +374,14 @@ CELERY_BEAT_SCHEDULE = {
         'schedule': crontab(minute=30, hour=4),  # Every day at 04:30 UTC,
         'enabled': False
     },
+    'operation-logs-spool': {
+        'task': ('rero_ils.modules.operation_logs.tasks'
+                 '.replay_spooled_operation_logs'),
+        'schedule': timedelta(minutes=10),
+        'enabled': False
+        # Index the operation logs spooled when Elasticsearch was
+        # unavailable.
+    },
     'collect-stats': {
         'task': ('rero_ils.modules.stats.tasks.collect_stats'),
         'schedule': crontab(minute=0, hour=1),  # Every day at 01:00 UTC,
@@ -388,6 +403,21 @@ CELERY_REDIS_SCHEDULER_URL = 'redis://localhost:6379/4'
 RERO_IMPORT_CACHE = 'redis://localhost:6379/5'
 RERO_IMPORT_CACHE_EXPIRE = 10
 
+#: Coalesce the parent reindexes (holdings and documents) triggered by item
+#: changes: parents are queued by pid type and pid in a redis set and each
+#: queued parent is reindexed once by a debounced celery task.
+RERO_ILS_REINDEX_QUEUE = False
+RERO_ILS_REINDEX_QUEUE_URL = 'redis://localhost:6379/6'
+#: Delay in seconds between the first queued parent and the flush.
+RERO_ILS_REINDEX_QUEUE_COUNTDOWN = 10
+#: Pid types reindex order during a flush.
+RERO_ILS_REINDEX_QUEUE_ORDER = ['hold', 'doc']
+
+#: Redis URL where the partitioned reindex (`utils partitioned_reindex`)
+#: stores its plans and completed partitions, in its own database apart from
+#: the reindex queue.
+RERO_ILS_PARTITIONED_REINDEX_URL = 'redis://localhost:6379/7'
+
 # Database
 # ========
 #: Database URI including user and password
@@ -2454,6 +2484,19 @@ RERO_ILS_ENABLE_OPERATION_LOG = {
     'ill_requests': 'illr'
 }
 RERO_ILS_ENABLE_OPERATION_LOG_VALIDATION = False
+# Buffer the operation logs of each request and celery task and index them
+# with one bulk request at its end. The buffering can also be enabled for a
+# block of code with
+# `rero_ils.modules.operation_logs.writer.buffered_operation_logs`.
+RERO_ILS_OPERATION_LOG_BUFFER = False
+# Maximum number of buffered operation logs, the buffer is flushed when it is
+# reached.
+RERO_ILS_OPERATION_LOG_BUFFER_SIZE = 1000
+# Index the buffered operation logs with a celery task.
+RERO_ILS_OPERATION_LOG_BUFFER_DELAYED = False
+# File where the operation logs are spooled if Elasticsearch is unavailable,
+# default: `operation_logs.spool` in the instance folder.
+RERO_ILS_OPERATION_LOG_SPOOL_FILE = None
 
 # Statistics Configuration
 # ========================
@@ -2509,6 +2552,30 @@ SECURITY_SEND_PASSWORD_CHANGE_EMAIL = False
 # Misc
 INDEXER_REPLACE_REFS = True
 INDEXER_RECORD_TO_INDEX = 'rero_ils.modules.indexer_utils.record_to_index'
+#: Refresh mode used to index or delete a record:
+#: - 'true': refresh the shard after each operation (read-your-writes),
+#: - 'wait_for': wait for the next periodic refresh of the shard,
+#: - 'deferred': do not refresh, every touched index is refreshed once at the
+#:   end of the current request or celery task.
+#: The circulation endpoints always use the 'true' mode.
+RERO_ILS_INDEXER_REFRESH = 'true'
+#: Refresh mode by record type (pid type), override the default mode.
+#: ex: {'oplg': 'deferred', 'notif': 'wait_for'}
+RERO_ILS_INDEXER_REFRESH_BY_PID_TYPE = {}
+#: Use an identity map for every request and celery task: the records
+#: loaded by pid or by uuid are loaded once and shared until they are updated
+#: or deleted. It can also be enabled for a single view or task with
+#: `rero_ils.modules.record_identity_map.with_record_identity_map`.
+RERO_ILS_RECORD_IDENTITY_MAP = False
+#: Lifetime (in seconds) of the known existing pids used to validate the
+#: links of the records. The pids are known by the minters and by the
+#: grouped existence queries during a request, a task or a cli command.
+RERO_ILS_KNOWN_PIDS_TIMEOUT = 60
+#: Maximum number of known existing pids.
+RERO_ILS_KNOWN_PIDS_MAX_SIZE = 100000
+#: Number of records created and committed at once by
+#: `IlsRecord.create_many`.
+RERO_ILS_CREATE_MANY_CHUNK_SIZE = 1000
 
 RERO_ILS_APP_URL_SCHEME = 'https'
 RERO_ILS_APP_HOST = 'bib.rero.ch'
@@ -2564,6 +2631,49 @@ JSONSCHEMAS_LOADER_CLS = 'rero_ils.jsonschemas.utils.JsonLoader'
 # =======
 OAISERVER_ID_PREFIX = 'oai:bib.rero.ch:'
 
+# CACHES
+# ======
+# The cached tables are shared by all the workers (application cache) and
+# updated or invalidated when a related record changes. The timeouts are in
+# seconds.
+
+#: Circulation policies lookup table of an organisation.
+RERO_ILS_CIRC_POLICIES_TABLE_TIMEOUT = 3600
+
+#: Fields of the reference records kept for the serializers and the view
+#: codes by pid type, the label first (see
+#: `rero_ils.modules.reference_labels`).
+RERO_ILS_REFERENCE_LABELS = {
+    'org': ['name', 'code'],
+    'lib': ['name', 'organisation.pid'],
+    'loc': ['name'],
+    'itty': ['name']
+}
+#: Lifetime of the reference records of a resource in the shared cache.
+RERO_ILS_REFERENCE_LABELS_TIMEOUT = 3600
+#: Minimum delay between two loads of the reference records of a resource
+#: for an unknown pid.
+RERO_ILS_REFERENCE_LABELS_RELOAD_DELAY = 60
+#: Each process keeps a local copy of the reference records in front of the
+#: shared one during this delay.
+RERO_ILS_REFERENCE_LABELS_LOCAL_TIMEOUT = 60
+
+#: Loans and fees counters of a patron.
+RERO_ILS_PATRON_CIRCULATION_STATS_TIMEOUT = 300
+
+# BATCH PROCESSING
+# ================
+#: Number of loans (with their related records) loaded at once by the
+#: notifications and anonymization tasks.
+RERO_ILS_LOANS_CHUNK_SIZE = 500
+
+#: Number of items (with their related documents and loans) loaded at once
+#: by the items inventory CSV export.
+RERO_ILS_ITEMS_CSV_CHUNK_SIZE = 1000
+
+#: Number of pages fetched ahead of their processing by the api harvester.
+RERO_ILS_APIHARVESTER_PREFETCH_PAGES = 2
+
 # ANONYMISATION PROCESS CONFIGURATION
 # ================================================
 
@@ -2823,6 +2933,9 @@ RERO_IMPORT_REST_ENDPOINTS = dict(
 RERO_SRU_NUMBER_OF_RECORDS = 100
 # Maximum number of records which can be harvested with an request.
 RERO_SRU_MAXIMUM_RECORDS = 1000
+# Total hits tracking of the SRU search: `True` for an exact number of
+# records or an integer to count accurately up to this number of records.
+RERO_SRU_TRACK_TOTAL_HITS = True
 
 # SIP2
 # ====
@@ -26,7 +26,7 @@ from ..api import IlsRecord, IlsRecordsIndexer, IlsRecordsSearch
 from ..fetchers import id_fetcher
 from ..minters import id_minter
 from ..providers import Provider
-from ..utils import extracted_data_from_ref, sorted_pids
+from ..utils import extracted_data_from_ref
 
 # provider
 AcqAccountProvider = type(
@@ -76,30 +76,17 @@ class AcqAccount(IlsRecord):
         """Shortcut for acq account library pid."""
         return extracted_data_from_ref(self.get('library'))
 
-    def get_links_to_me(self, get_pids=False):
-        """Record links.
+    @classmethod
+    def get_links_queries(cls, pid):
+        """Get the queries of the records linked to a record.
 
-        :param get_pids: if True list of linked pids
-                         if False count of linked records
+        :param pid: the record pid.
+        :return: a dict with, by link name, the search of the linked records.
         """
-        links = {}
-        query = AcqOrderLinesSearch() \
-            .filter('term', acq_account__pid=self.pid)
-        if get_pids:
-            acq_orders = query.count()
-        else:
-            acq_orders = sorted_pids(query)
-        if acq_orders:
-            links['acq_order_lines'] = acq_orders
-        return links
-
-    def reasons_not_to_delete(self):
-        """Get reasons not to delete record."""
-        cannot_delete = {}
-        links = self.get_links_to_me()
-        if links:
-            cannot_delete['links'] = links
-        return cannot_delete
+        return {
+            'acq_order_lines': AcqOrderLinesSearch()
+            .filter('term', acq_account__pid=pid)
+        }
 
 
 class AcqAccountsIndexer(IlsRecordsIndexer):
@@ -28,7 +28,7 @@ from ..fetchers import id_fetcher
 from ..libraries.api import Library
 from ..minters import id_minter
 from ..providers import Provider
-from ..utils import extracted_data_from_ref, get_ref_for_pid, sorted_pids
+from ..utils import extracted_data_from_ref, get_ref_for_pid
 
 # provider
 AcqOrderProvider = type(
@@ -120,30 +120,17 @@ class AcqOrder(IlsRecord):
         results = search.execute()
         return results.aggregations.order_total_amount.value
 
-    def get_links_to_me(self, get_pids=False):
-        """Record links.
+    @classmethod
+    def get_links_queries(cls, pid):
+        """Get the queries of the records linked to a record.
 
-        :param get_pids: if True list of linked pids
-                         if False count of linked records
+        :param pid: the record pid.
+        :return: a dict with, by link name, the search of the linked records.
         """
-        links = {}
-        query = AcqOrderLinesSearch() \
-            .filter('term', acq_order__pid=self.pid)
-        if get_pids:
-            acq_orders = sorted_pids(query)
-        else:
-            acq_orders = query.count()
-        if acq_orders:
-            links['acq_order_lines'] = acq_orders
-        return links
-
-    def reasons_not_to_delete(self):
-        """Get reasons not to delete record."""
-        cannot_delete = {}
-        links = self.get_links_to_me()
-        if links:
-            cannot_delete['links'] = links
-        return cannot_delete
+        return {
+            'acq_order_lines': AcqOrderLinesSearch()
+            .filter('term', acq_order__pid=pid)
+        }
 
 
 class AcqOrdersIndexer(IlsRecordsIndexer):
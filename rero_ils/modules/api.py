@@ -28,6 +28,7 @@ from elasticsearch import VERSION as ES_VERSION
 from elasticsearch.exceptions import NotFoundError
 from elasticsearch.helpers import bulk
 from elasticsearch.helpers import expand_action as default_expand_action
+from elasticsearch_dsl import MultiSearch
 from flask import current_app
 from invenio_db import db
 from invenio_indexer.api import RecordIndexer
@@ -37,14 +38,15 @@ from invenio_pidstore.errors import PIDDoesNotExistError
 from invenio_pidstore.models import PersistentIdentifier, PIDStatus
 from invenio_records.api import Record
 from invenio_records_rest.utils import obj_or_import_string
-from invenio_search import current_search
+from invenio_search import current_search, current_search_client
 from invenio_search.api import RecordsSearch
 from jsonschema.exceptions import ValidationError
 from kombu.compat import Consumer
-from sqlalchemy import text
 from sqlalchemy.orm.exc import NoResultFound
 
-from .utils import extracted_data_from_ref
+from .indexer_utils import get_refresh_argument
+from .record_identity_map import get_record_identity_map
+from .utils import extracted_data_from_ref, sorted_pids
 
 
 class IlsRecordError:
@@ -71,6 +73,9 @@ class IlsRecordError:
     class DataMissing(Exception):
         """Data missing in record."""
 
+    class NotWritten(Exception):
+        """IlsRecords can not be written."""
+
 
 class IlsRecordsSearch(RecordsSearch):
     """Search Class for ils."""
@@ -160,8 +165,13 @@ class IlsRecord(Record):
 
     @classmethod
     def create(cls, data, id_=None, delete_pid=False,
-               dbcommit=False, reindex=False, pidcheck=True, **kwargs):
-        """Create a new ils record."""
+               dbcommit=False, reindex=False, pidcheck=True,
+               pid_used_check=True, **kwargs):
+        """Create a new ils record.
+
+        :param pid_used_check: if False the given pid is not checked, the
+            caller already knows it is not used.
+        """
         assert cls.minter
         assert cls.provider
         if '$schema' not in data:
@@ -174,7 +184,7 @@ class IlsRecord(Record):
         if delete_pid and pid:
             del data['pid']
         else:
-            if pid:
+            if pid and pid_used_check:
                 test_rec = cls.get_record_by_pid(pid)
                 if test_rec is not None:
                     raise IlsRecordError.PidAlreadyUsed(
@@ -193,6 +203,134 @@ class IlsRecord(Record):
             record.dbcommit(reindex)
         return record
 
+    @classmethod
+    def create_many(cls, data, dbcommit=True, reindex=False, pidcheck=True,
+                    chunk_size=None, **kwargs):
+        """Create many ils records.
+
+        The records are created by chunk: the linked pids of a chunk are
+        checked with one grouped query (see `get_existing_pids`), then the
+        chunk is committed and indexed in bulk.
+
+        :param data: iterable of dicts with the records metadata.
+        :param dbcommit: if True commit the database after each chunk.
+        :param reindex: if True bulk index each committed chunk.
+        :param pidcheck: if True check the pids of the linked resources.
+        :param chunk_size: number of records by chunk, default to
+            `RERO_ILS_CREATE_MANY_CHUNK_SIZE`.
+        :return: the list of created records.
+        :raises ValueError: if `reindex` is asked without `dbcommit`, the
+            chunks are only indexed once committed.
+        """
+        if reindex and not dbcommit:
+            raise ValueError('create_many: reindex requires dbcommit.')
+        from .utils import chunks, get_existing_pids, get_pids_in_data
+        chunk_size = chunk_size or current_app.config.get(
+            'RERO_ILS_CREATE_MANY_CHUNK_SIZE', 1000)
+        records = []
+        for chunk in chunks(data, chunk_size):
+            if pidcheck and cls.pids_exist_check:
+                # one query to know the existing pids of the whole chunk
+                pids = set()
+                for record_data in chunk:
+                    pids |= get_pids_in_data(
+                        record_data,
+                        required=cls.pids_exist_check.get('required', {}),
+                        not_required=cls.pids_exist_check.get(
+                            'not_required', {})
+                    )
+                get_existing_pids(pids)
+            chunk_records = [
+                cls.create(record_data, pidcheck=pidcheck, **kwargs)
+                for record_data in chunk
+            ]
+            if dbcommit:
+                db.session.commit()
+                if reindex:
+                    cls.bulk_reindex(chunk_records)
+            records.extend(chunk_records)
+        return records
+
+    @classmethod
+    def create_or_update_many(cls, data, dbcommit=True, reindex=False):
+        """Create or update many ils records in one transaction.
+
+        The existing records are found with one query on the pids of the
+        data (see `get_records_by_pids`). Each record is written in a nested
+        transaction, a failing record is logged and reported in the failed
+        pids. The ids of the written records are queued for bulk indexing.
+
+        :param data: list of dicts with the records metadata.
+        :param dbcommit: if True commit the database at the end.
+        :param reindex: if True queue the written records for bulk indexing.
+        :return: a tuple with the created records, the updated records and
+            the pids of the records that can not be written.
+        """
+        existing = {
+            record.pid: record
+            for record in cls.get_records_by_pids(
+                record_data.get('pid') for record_data in data)
+        }
+        created = []
+        updated = []
+        failed = []
+        for record_data in data:
+            record = existing.get(record_data.get('pid'))
+            try:
+                with db.session.begin_nested():
+                    if record is None:
+                        created.append(cls.create(
+                            record_data, pid_used_check=False))
+                    else:
+                        # the pid is known to be the same, the record is
+                        # replaced without the pid check of `update`.
+                        record.clear()
+                        Record.update(record, deepcopy(record_data))
+                        updated.append(record.commit())
+            except Exception as error:
+                pid = record_data.get('pid')
+                if record is None and pid:
+                    # a rolled back savepoint does not send `after_rollback`,
+                    # the minted pid has to be forgotten here.
+                    from .utils import remove_known_pid
+                    remove_known_pid(cls.provider.pid_type, pid)
+                failed.append(pid)
+                current_app.logger.error(
+                    f'Can not write {cls.__name__} {pid}: {error}')
+        if dbcommit:
+            db.session.commit()
+            if reindex:
+                cls.get_indexer_class()().bulk_index(
+                    [record.id for record in created + updated])
+        return created, updated, failed
+
+    @classmethod
+    def bulk_reindex(cls, records):
+        """Index records with one bulk request.
+
+        :param records: list of records.
+        :return: the number of errors.
+        """
+        if not records:
+            return 0
+        indexer = cls.get_indexer_class()()
+        index, _ = indexer.record_to_index(records[0])
+        _, errors = bulk(
+            current_search_client,
+            (indexer._index_action(payload={'id': str(record.id)})
+             for record in records),
+            stats_only=True,
+            raise_on_error=False,
+            refresh=get_refresh_argument(index, cls.provider.pid_type),
+            request_timeout=current_app.config[
+                'INDEXER_BULK_REQUEST_TIMEOUT'],
+            expand_action_callback=(
+                _es7_expand_action if ES_VERSION[0] >= 7
+                else default_expand_action
+            )
+        )
+        return errors
+
     @classmethod
     def get_record_by_pid(cls, pid, with_deleted=False, verbose=False):
         """Get ils record by pid value."""
@@ -200,6 +338,13 @@ class IlsRecord(Record):
             click.echo(f'\t\tget_record_by_pid: {cls.__name__} {pid}')
         if pid:
             assert cls.provider
+            identity_map = None
+            if not with_deleted:
+                identity_map = get_record_identity_map()
+            if identity_map is not None:
+                record = identity_map.get_by_pid(cls, pid)
+                if record is not None:
+                    return record
             try:
                 persistent_identifier = PersistentIdentifier.get(
                     cls.provider.pid_type,
@@ -209,11 +354,44 @@ class IlsRecord(Record):
                     persistent_identifier.object_uuid,
                     with_deleted=with_deleted
                 )
+                if identity_map is not None:
+                    identity_map.add(record)
                 return record
             # TODO: is it better to raise a error or to return None?
             except (NoResultFound, PIDDoesNotExistError):
                 return None
 
+    @classmethod
+    def get_records_by_pids(cls, pids, with_deleted=False):
+        """Get ils records by pid values with one query.
+
+        :param pids: the pid values.
+        :param with_deleted: if True, also return the deleted records.
+        :return a list of records in the order of the given pids, unknown
+                pids are ignored.
+        """
+        assert cls.provider
+        pids = list(dict.fromkeys(str(pid) for pid in pids if pid))
+        if not pids:
+            return []
+        with db.session.no_autoflush:
+            query = db.session\
+                .query(PersistentIdentifier.pid_value, cls.model_cls)\
+                .join(
+                    cls.model_cls,
+                    cls.model_cls.id == PersistentIdentifier.object_uuid
+                )\
+                .filter(
+                    PersistentIdentifier.pid_type == cls.provider.pid_type,
+                    PersistentIdentifier.pid_value.in_(pids)
+                )
+            if not with_deleted:
+                query = query.filter(cls.model_cls.json != None)  # noqa
+            records = {
+                pid: cls(model.json, model=model) for pid, model in query
+            }
+        return [records[pid] for pid in pids if pid in records]
+
     @classmethod
     def record_pid_exists(cls, pid):
         """Check if a persistent identifier exists.
@@ -254,6 +432,15 @@ class IlsRecord(Record):
     @classmethod
     def get_record_by_id(cls, id, with_deleted=False):
         """Get ils record by uuid."""
+        identity_map = None
+        if not with_deleted:
+            identity_map = get_record_identity_map()
+        if identity_map is not None:
+            record = identity_map.get_by_id(cls, id)
+            if record is None:
+                record = identity_map.add(
+                    super().get_record(id, with_deleted=with_deleted))
+            return record
         return super().get_record(id, with_deleted=with_deleted)
 
     @classmethod
@@ -276,40 +463,71 @@ class IlsRecord(Record):
         return query
 
     @classmethod
-    def get_all_pids(cls, with_deleted=False, limit=100000):
-        """Get all records pids. Return a generator iterator."""
+    def _get_all_values(cls, column, with_deleted=False, limit=100000,
+                        chunk=False):
+        """Get a column of all persistent identifiers.
+
+        The persistent identifiers are read by pages of `limit` rows using a
+        keyset pagination on the pidstore primary key: each page starts after
+        the last row of the previous one, so all pages cost the same.
+
+        :param column: the `PersistentIdentifier` column to get.
+        :param with_deleted: if True, also get the deleted records.
+        :param limit: the page size, if 0 all rows are read at once.
+        :param chunk: if True, yield lists of values (one by page).
+        :return: a generator of values or of lists of values.
+        """
         query = cls._get_all(with_deleted=with_deleted)
         if limit:
-            # slower, less memory
-            query = query.order_by(text('pid_value')).limit(limit)
-            offset = 0
-            count = cls.count(with_deleted=with_deleted)
-            while offset < count:
-                for identifier in query.offset(offset):
-                    yield identifier.pid_value
-                offset += limit
+            query = query\
+                .with_entities(PersistentIdentifier.id, column)\
+                .order_by(PersistentIdentifier.id)
+            last_id = 0
+            while True:
+                rows = query\
+                    .filter(PersistentIdentifier.id > last_id)\
+                    .limit(limit)\
+                    .all()
+                if not rows:
+                    break
+                last_id = rows[-1][0]
+                values = [value for _, value in rows]
+                if chunk:
+                    yield values
+                else:
+                    yield from values
         else:
-            # faster, more memory
-            for identifier in query:
-                yield identifier.pid_value
+            values = (value for value, in query.with_entities(column))
+            if chunk:
+                yield list(values)
+            else:
+                yield from values
 
     @classmethod
-    def get_all_ids(cls, with_deleted=False, limit=100000):
-        """Get all records uuids. Return a generator iterator."""
-        query = cls._get_all(with_deleted=with_deleted)
-        if limit:
-            # slower, less memory
-            query = query.order_by(text('pid_value')).limit(limit)
-            offset = 0
-            count = cls.count(with_deleted=with_deleted)
-            while offset < count:
-                for identifier in query.limit(limit).offset(offset):
-                    yield identifier.object_uuid
-                offset += limit
-        else:
-            # faster, more memory
-            for identifier in query:
-                yield identifier.object_uuid
+    def get_all_pids(cls, with_deleted=False, limit=100000, chunk=False):
+        """Get all records pids. Return a generator iterator.
+
+        :param with_deleted: if True, also get the pids of deleted records.
+        :param limit: the number of pids read at once (slower, less memory),
+            if 0 all pids are read at once (faster, more memory).
+        :param chunk: if True, yield lists of pids.
+        """
+        return cls._get_all_values(
+            PersistentIdentifier.pid_value, with_deleted=with_deleted,
+            limit=limit, chunk=chunk)
+
+    @classmethod
+    def get_all_ids(cls, with_deleted=False, limit=100000, chunk=False):
+        """Get all records uuids. Return a generator iterator.
+
+        :param with_deleted: if True, also get the uuids of deleted records.
+        :param limit: the number of uuids read at once (slower, less memory),
+            if 0 all uuids are read at once (faster, more memory).
+        :param chunk: if True, yield lists of uuids.
+        """
+        return cls._get_all_values(
+            PersistentIdentifier.object_uuid, with_deleted=with_deleted,
+            limit=limit, chunk=chunk)
 
     @classmethod
     def count(cls, with_deleted=False):
@@ -325,6 +543,11 @@ class IlsRecord(Record):
             persistent_identifier = self.get_persistent_identifier(self.id)
             persistent_identifier.delete()
             if force:
+                from .utils import remove_known_pid
+                remove_known_pid(
+                    persistent_identifier.pid_type,
+                    persistent_identifier.pid_value
+                )
                 db.session.delete(persistent_identifier)
             self = super().delete(force=force)
             if dbcommit:
@@ -434,18 +657,82 @@ class IlsRecord(Record):
         """Get Persistent Identifier."""
         return self.get_persistent_identifier(self.id)
 
+    @classmethod
+    def get_links_queries(cls, pid):
+        """Get the queries of the records linked to a record.
+
+        It is the registry of the links of the resource, the subclasses
+        declare their links here.
+
+        :param pid: the record pid.
+        :return: a dict with, by link name, the search of the linked records.
+        """
+        return {}
+
     def get_links_to_me(self, get_pids=False):
         """Record links.
 
         :param get_pids: if True list of linked pids
                          if False count of linked records
         """
-        return {}
+        if not self.pid:
+            return {}
+        if not get_pids:
+            return self.get_links_to_many([self.pid])[self.pid]
+        links = {}
+        for name, query in self.get_links_queries(self.pid).items():
+            pids = sorted_pids(query)
+            if pids:
+                links[name] = pids
+        return links
+
+    @classmethod
+    def get_links_to_many(cls, pids):
+        """Count the records linked to several records.
+
+        All the links of all the records are counted with one multi search.
 
-    def reasons_not_to_delete(self):
-        """Record deletion reasons."""
+        :param pids: the records pids.
+        :return: a dict with, by record pid, the count of linked records by
+            link name.
+        """
+        links = {pid: {} for pid in pids}
+        queries = [
+            (pid, name, query)
+            for pid in pids
+            for name, query in cls.get_links_queries(pid).items()
+        ]
+        if not queries:
+            return links
+        multi_search = MultiSearch(using=current_search_client)
+        for _, _, query in queries:
+            multi_search = multi_search.add(
+                query.extra(size=0, track_total_hits=True))
+        for (pid, name, _), result in zip(queries, multi_search.execute()):
+            if result.hits.total.value:
+                links[pid][name] = result.hits.total.value
+        return links
+
+    def reasons_to_keep(self):
+        """Reasons aside from record links to keep a record."""
         return {}
 
+    def reasons_not_to_delete(self, links=None):
+        """Record deletion reasons.
+
+        :param links: the count of linked records by link name, computed if
+            not given.
+        """
+        cannot_delete = {}
+        others = self.reasons_to_keep()
+        if links is None:
+            links = self.get_links_to_me()
+        if others:
+            cannot_delete['others'] = others
+        if links:
+            cannot_delete['links'] = links
+        return cannot_delete
+
     @property
     def can_delete(self):
         """Record can be deleted.
@@ -455,6 +742,25 @@ class IlsRecord(Record):
         reasons = self.reasons_not_to_delete()
         return len(reasons) == 0, reasons
 
+    @classmethod
+    def can_delete_many(cls, pids):
+        """Records can be deleted.
+
+        The links of all the records are counted with one multi search.
+
+        :param pids: the records pids.
+        :return a dict with, by existing record pid, a tuple with True|False
+            and reasons not to delete if False.
+        """
+        links = cls.get_links_to_many(pids)
+        result = {}
+        for pid in pids:
+            record = cls.get_record_by_pid(pid)
+            if record:
+                reasons = record.reasons_not_to_delete(links=links[pid])
+                result[pid] = len(reasons) == 0, reasons
+        return result
+
     @property
     def organisation_pid(self):
         """Get organisation pid for circulation policy."""
@@ -475,7 +781,8 @@ class IlsRecordsIndexer(RecordIndexer):
 
     def index(self, record):
         """Indexing a record."""
-        return_value = super().index(record, arguments=dict(refresh='true'))
+        return_value = super().index(
+            record, arguments=dict(refresh=self._refresh_argument(record)))
         return return_value
 
     def delete(self, record):
@@ -483,9 +790,23 @@ class IlsRecordsIndexer(RecordIndexer):
 
         :param record: Record instance.
         """
-        return_value = super().delete(record, refresh='true')
+        return_value = super().delete(
+            record, refresh=self._refresh_argument(record))
         return return_value
 
+    def _refresh_argument(self, record):
+        """Get the elasticsearch refresh argument for a record.
+
+        See `RERO_ILS_INDEXER_REFRESH` for the possible modes.
+
+        :param record: Record instance.
+        :return: the refresh argument value.
+        """
+        index, _ = self.record_to_index(record)
+        provider = getattr(record, 'provider', None)
+        return get_refresh_argument(
+            index, pid_type=getattr(provider, 'pid_type', None))
+
     def bulk_index(self, record_id_iterator, doc_type=None, index=None):
         """Bulk index records.
 
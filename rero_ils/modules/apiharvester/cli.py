@@ -133,3 +133,9 @@ def info():
         click.echo(f'\tmimetype : {api.mimetype}')
         click.echo(f'\tsize     : {api.size}')
         click.echo(f'\tcomment  : {api.comment}')
+        click.echo(f'\tnext url : {api.next_url}')
+        click.echo(
+            f'\tharvested: {api.harvested or 0} records in '
+            f'{api.harvest_duration or 0:.2f}s '
+            f'({api.throughput:.2f} records/s)'
+        )
@@ -41,6 +41,11 @@ class ApiHarvestConfig(RecordIdentifier):
     default_last_run = datetime.strptime('1900-1-1', '%Y-%m-%d')
     lastrun = db.Column(db.DateTime, default=pytz.utc.localize(
         default_last_run), nullable=True)
+    # url of the next page to harvest, set while a harvest is not finished
+    next_url = db.Column(db.Text, nullable=True)
+    # records harvested and duration (in seconds) of the current/last run
+    harvested = db.Column(db.Integer, nullable=True, default=0)
+    harvest_duration = db.Column(db.Float, nullable=True, default=0)
 
     def save(self):
         """Save object to persistent storage."""
@@ -50,3 +55,27 @@ class ApiHarvestConfig(RecordIdentifier):
     def update_lastrun(self, new_date=None):
         """Update the 'lastrun' attribute of object to now."""
         self.lastrun = new_date or datetime.now(timezone.utc)
+
+    def update_cursor(self, next_url, count, duration):
+        """Save the progress of the harvest after a processed page.
+
+        :param next_url: the url of the next page, None at the end.
+        :param count: number of records of the processed page.
+        :param duration: processing duration of the page (in seconds).
+        """
+        self.next_url = next_url
+        self.harvested = (self.harvested or 0) + count
+        self.harvest_duration = (self.harvest_duration or 0) + duration
+
+    def reset_cursor(self):
+        """Reset the progress of the harvest for a new run."""
+        self.next_url = None
+        self.harvested = 0
+        self.harvest_duration = 0
+
+    @property
+    def throughput(self):
+        """Harvested records by second of the current/last run."""
+        if self.harvest_duration:
+            return (self.harvested or 0) / self.harvest_duration
+        return 0
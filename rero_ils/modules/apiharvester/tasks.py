@@ -28,19 +28,28 @@ from .utils import get_records
 @shared_task(ignore_result=True)
 def harvest_records(url=None, name=None, from_date=None, signals=True, size=0,
                     max=0, verbose=False):
-    """Harvest records."""
+    """Harvest records.
+
+    Without a given `from_date`, an interrupted harvest of the config is
+    resumed from its saved cursor.
+    """
+    next_url = None
     config = ApiHarvestConfig.query.filter_by(name=name).first()
     if config:
         if not url:
             url = config.url
-        if not from_date:
-            from_date = config.lastrun
-            config.update_lastrun()
+        if not from_date and config.next_url:
+            next_url = config.next_url
+        else:
+            if not from_date:
+                from_date = config.lastrun
+                config.update_lastrun()
+            config.reset_cursor()
         if size == 0:
             size = config.size
 
     for next, records in get_records(
         url=url, name=name, from_date=from_date, size=size, max=max,
-        signals=signals, verbose=verbose
+        signals=signals, verbose=verbose, next_url=next_url
     ):
         pass
@@ -19,6 +19,10 @@
 
 from __future__ import absolute_import, print_function
 
+import time
+from queue import Empty, Queue
+from threading import Event, Thread
+
 import click
 import requests
 from dateutil import parser
@@ -27,6 +31,7 @@ from invenio_db import db
 
 from .models import ApiHarvestConfig
 from .signals import apiharvest_part
+from ..utils import requests_retry_session
 
 
 def api_source(name, url='', mimetype='', size=100, comment='', update=False):
@@ -77,53 +82,126 @@ def extract_records(data):
     return records
 
 
+def fetch_pages(session, url, pages, stop):
+    """Fetch the pages of records following their next links.
+
+    It runs in a background thread, ahead of the pages processing. The
+    pages queue is bounded, the fetching waits for the processing when it
+    is full.
+
+    :param session: the requests session.
+    :param url: the url of the first page.
+    :param pages: the queue of the fetched pages, a page is a tuple with its
+        url and its data (or the fetching error), `(None, None)` at the end.
+    :param stop: event set to stop the fetching.
+    """
+    try:
+        while url and not stop.is_set():
+            response = session.get(url)
+            response.raise_for_status()
+            data = response.json()
+            pages.put((url, data))
+            url = data.get('links', {}).get('next')
+    except Exception as error:
+        pages.put((url, error))
+    pages.put((None, None))
+
+
 def get_records(url=None, name=None, from_date=None, max=0, size=100,
-                signals=True, verbose=False, **kwargs):
-    """Harvest multiple records from invenio api."""
-    url += f'/?size={size}'
-    if from_date:
-        if isinstance(from_date, str):
-            from_date = parser.parse(from_date)
-        from_date = from_date.isoformat()
-        # we have to urlencode the : from the time with \:
-        from_date = from_date.replace(':', '%5C:')
-        url += f'&q=_updated:>{from_date}'
-    url += f'&size={size}'
+                signals=True, verbose=False, next_url=None, **kwargs):
+    """Harvest multiple records from invenio api.
+
+    The pages are fetched with a retrying session in a background thread,
+    up to `RERO_ILS_APIHARVESTER_PREFETCH_PAGES` pages ahead of their
+    processing. The url of the next page is saved in the harvest config
+    of `name` after each processed page.
+
+    :param next_url: url of the page to resume an interrupted harvest from.
+    """
+    if next_url:
+        url = next_url
+    else:
+        url += f'/?size={size}'
+        if from_date:
+            if isinstance(from_date, str):
+                from_date = parser.parse(from_date)
+            from_date = from_date.isoformat()
+            # we have to urlencode the : from the time with \:
+            from_date = from_date.replace(':', '%5C:')
+            url += f'&q=_updated:>{from_date}'
+        url += f'&size={size}'
 
     if verbose:
         click.echo(f'Get records from {url}')
 
+    config = None
+    if name:
+        config = ApiHarvestConfig.query.filter_by(name=name).first()
+    pages = Queue(maxsize=current_app.config.get(
+        'RERO_ILS_APIHARVESTER_PREFETCH_PAGES', 2))
+    stop = Event()
+    fetcher = Thread(
+        target=fetch_pages,
+        args=(requests_retry_session(), url, pages, stop),
+        daemon=True
+    )
     try:
         count = 0
-        request = requests.get(url)
-        data = request.json()
+        start_time = page_time = time.monotonic()
+        fetcher.start()
+        page_url, data = pages.get()
+        if isinstance(data, Exception):
+            raise data
 
         total = data['hits']['total']['value']
         click.echo(f'API records found: {total}')
 
-        next_url = data.get('links', {}).get('self', True)
-        while next_url and (count < max or max == 0):
+        while page_url and (count < max or max == 0):
+            if isinstance(data, Exception):
+                raise data
             records = extract_records(data)
             count += len(records)
+            if max and count > max:
+                records = records[:len(records) - (count - max)]
+                count = max
 
-            if count - max > 0 and max != 0:
-                records = records[:max]
-
-            request = requests.get(next_url)
-            data = request.json()
             if signals:
                 apiharvest_part.send(
                     records=records,
                     name=name,
-                    url=next,
+                    url=page_url,
                     verbose=verbose,
                     **kwargs)
             else:
-                yield next_url, records
-            next_url = data.get('links', {}).get('next', None)
+                yield page_url, records
+
+            # the page is processed, save the cursor
+            if config:
+                now = time.monotonic()
+                config.update_cursor(
+                    data.get('links', {}).get('next'),
+                    len(records),
+                    now - page_time
+                )
+                page_time = now
+                db.session.commit()
+            page_url, data = pages.get()
+        duration = time.monotonic() - start_time
+        current_app.logger.info(
+            f'API records harvested from {name}: {count} in {duration:.2f}s '
+            f'({count / (duration or 1):.2f} records/s)'
+        )
     except Exception as error:
         click.secho(
             f'Harvesting API ConnectionRefusedError: {error}',
             fg='red'
         )
         yield url, []
+    finally:
+        stop.set()
+        # free the queue for a fetcher waiting to put a page
+        while fetcher.is_alive():
+            try:
+                pages.get_nowait()
+            except Empty:
+                fetcher.join(0.1)
@@ -27,7 +27,6 @@ from ..fetchers import id_fetcher
 from ..minters import id_minter
 from ..organisations.api import Organisation
 from ..providers import Provider
-from ..utils import sorted_pids
 
 # provider
 BudgetProvider = type(
@@ -68,32 +67,16 @@ class Budget(IlsRecord):
         }
     }
 
-    def get_links_to_me(self, get_pids=False):
-        """Record links.
+    @classmethod
+    def get_links_queries(cls, pid):
+        """Get the queries of the records linked to a record.
 
-        :param get_pids: if True list of linked pids
-                         if False count of linked records
+        :param pid: the record pid.
+        :return: a dict with, by link name, the search of the linked records.
         """
-        links = {}
-        query = AcqAccountsSearch().filter('term', budget__pid=self.pid)
-        if get_pids:
-            acq_accounts = sorted_pids(query)
-        else:
-            acq_accounts = query.count()
-        if acq_accounts:
-            links['acq_accounts'] = acq_accounts
-        return links
-
-    def reasons_not_to_delete(self):
-        """Get reasons not to delete record."""
-        cannot_delete = {}
-        others = self.reasons_to_keep()
-        if others:
-            cannot_delete['others'] = others
-        links = self.get_links_to_me()
-        if links:
-            cannot_delete['links'] = links
-        return cannot_delete
+        return {
+            'acq_accounts': AcqAccountsSearch().filter('term', budget__pid=pid)
+        }
 
     def reasons_to_keep(self):
         """Reasons aside from record_links to keep a budget."""
@@ -24,6 +24,8 @@ import sys
 from functools import partial
 
 from elasticsearch_dsl import Q
+from flask import current_app
+from invenio_cache.proxies import current_cache
 
 from .models import CircPolicyIdentifier, CircPolicyMetadata
 from ..api import IlsRecord, IlsRecordsIndexer, IlsRecordsSearch
@@ -256,6 +258,88 @@ class CircPolicy(IlsRecord):
         except StopIteration:
             return None
 
+    @classmethod
+    def get_policies_table(cls, organisation_pid):
+        """Get the circulation policies lookup table of an organisation.
+
+        The table is built from all the policies of the organisation with one
+        query, using the same matching rules as `get_circ_policy_by_LPI`,
+        `get_circ_policy_by_OPI` and `get_default_circ_policy`. It is cached
+        until a policy of the organisation changes (see
+        `circ_policies.listener.invalidate_circ_policies_table`).
+
+        :param organisation_pid: the organisation pid.
+        :return a dict with the `LPI` policy pids by
+                library/patron type/item type, the `OPI` policy pids by
+                patron type/item type and the `default` policy pid.
+        """
+        key = cls._policies_table_key(organisation_pid)
+        table = current_cache.get(key)
+        if table is None:
+            table = {'LPI': {}, 'OPI': {}, 'default': None}
+            query = CircPoliciesSearch()\
+                .filter('term', organisation__pid=organisation_pid)\
+                .source(['pid', 'is_default', 'policy_library_level',
+                         'libraries', 'settings'])
+            for hit in query.scan():
+                hit = hit.to_dict()
+                pid = hit['pid']
+                if hit.get('is_default') and not table['default']:
+                    table['default'] = pid
+                settings = [
+                    (setting['patron_type']['pid'],
+                     setting['item_type']['pid'])
+                    for setting in hit.get('settings', [])
+                ]
+                library_level = hit.get('policy_library_level')
+                for ptty_pid, itty_pid in settings:
+                    if library_level is True:
+                        for library in hit.get('libraries', []):
+                            table['LPI'].setdefault(
+                                f'{library["pid"]}:{ptty_pid}:{itty_pid}',
+                                pid
+                            )
+                    elif library_level is False:
+                        table['OPI'].setdefault(f'{ptty_pid}:{itty_pid}', pid)
+            current_cache.set(
+                key,
+                table,
+                timeout=current_app.config.get(
+                    'RERO_ILS_CIRC_POLICIES_TABLE_TIMEOUT', 0)
+            )
+        return table
+
+    @classmethod
+    def clear_policies_table(cls, organisation_pid):
+        """Remove the cached circulation policies table of an organisation.
+
+        :param organisation_pid: the organisation pid.
+        """
+        current_cache.delete(cls._policies_table_key(organisation_pid))
+
+    @classmethod
+    def _policies_table_key(cls, organisation_pid):
+        """Get the cache key of the circulation policies table."""
+        return f'circ_policies_table:{organisation_pid}'
+
+    @classmethod
+    def get_circ_policy_pid(cls, organisation_pid, library_pid,
+                            patron_type_pid, item_type_pid):
+        """Return the circ policy pid for library/patron/item.
+
+        :param organisation_pid: the organisation_pid.
+        :param library_pid: the library pid.
+        :param patron_type_pid: the patron type_pid.
+        :param item_type_pid: the item_type pid.
+        :return the pid of the best circulation policy corresponding to
+                criteria.
+        """
+        table = cls.get_policies_table(organisation_pid)
+        return table['LPI'].get(
+            f'{library_pid}:{patron_type_pid}:{item_type_pid}') \
+            or table['OPI'].get(f'{patron_type_pid}:{item_type_pid}') \
+            or table['default']
+
     @classmethod
     def provide_circ_policy(cls, organisation_pid, library_pid,
                             patron_type_pid, item_type_pid):
@@ -267,22 +351,10 @@ class CircPolicy(IlsRecord):
         :param item_type_pid: the item_type pid.
         :return the best circulation policy corresponding to criteria.
         """
-        LPI_policy = CircPolicy.get_circ_policy_by_LPI(
-            organisation_pid,
-            library_pid,
-            patron_type_pid,
-            item_type_pid
-        )
-        if LPI_policy:
-            return LPI_policy
-        PI_policy = CircPolicy.get_circ_policy_by_OPI(
-            organisation_pid,
-            patron_type_pid,
-            item_type_pid
-        )
-        if PI_policy:
-            return PI_policy
-        return CircPolicy.get_default_circ_policy(organisation_pid)
+        pid = cls.get_circ_policy_pid(
+            organisation_pid, library_pid, patron_type_pid, item_type_pid)
+        if pid:
+            return CircPolicy.get_record_by_pid(pid)
 
     def reasons_to_keep(self):
         """Reasons aside from record_links to keep a circ policy."""
@@ -292,17 +364,6 @@ class CircPolicy(IlsRecord):
             others['is_default'] = is_default
         return others
 
-    def reasons_not_to_delete(self):
-        """Get reasons not to delete policy."""
-        cannot_delete = {}
-        others = self.reasons_to_keep()
-        links = self.get_links_to_me()
-        if others:
-            cannot_delete['others'] = others
-        if links:
-            cannot_delete['links'] = links
-        return cannot_delete
-
     @property
     def can_checkout(self):
         """Shortcut to know if circulation policy allow checkout."""
@@ -432,6 +493,27 @@ class CircPoliciesIndexer(IlsRecordsIndexer):
 
     record_cls = CircPolicy
 
+    def index(self, record):
+        """Index a circulation policy.
+
+        The cached policies table of the organisation is invalidated once the
+        index is up to date.
+
+        :param record: Record instance.
+        """
+        return_value = super().index(record)
+        CircPolicy.clear_policies_table(record.organisation_pid)
+        return return_value
+
+    def delete(self, record):
+        """Delete a circulation policy from the index.
+
+        :param record: Record instance.
+        """
+        return_value = super().delete(record)
+        CircPolicy.clear_policies_table(record.organisation_pid)
+        return return_value
+
     def bulk_index(self, record_id_iterator):
         """Bulk index records.
 
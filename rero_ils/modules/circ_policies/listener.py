@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+#
+# RERO ILS
+# Copyright (C) 2021 RERO
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Signals connector for circulation policies."""
+
+from .api import CircPolicy
+
+
+def invalidate_circ_policies_table(sender, record=None, *args, **kwargs):
+    """Invalidate the cached policies table when a policy changes.
+
+    :param sender: the sender of the signal.
+    :param record: the created, updated or deleted record.
+    """
+    if isinstance(record, CircPolicy):
+        CircPolicy.clear_policies_table(record.organisation_pid)
@@ -29,7 +29,7 @@ import os
 import re
 import sys
 import traceback
-from collections import OrderedDict
+from collections import OrderedDict, deque
 from datetime import datetime
 from glob import glob
 from pprint import pprint
@@ -40,6 +40,7 @@ import click
 import dateparser
 import yaml
 from celery import current_app as current_celery
+from celery import group
 from dojson.contrib.marc21.utils import create_record
 from elasticsearch_dsl.query import Q
 from flask import current_app
@@ -58,7 +59,8 @@ from invenio_search.cli import es_version_check
 from invenio_search.proxies import current_search, current_search_client
 from jsonpatch import make_patch
 from jsonschema import validate
-from jsonschema.exceptions import ValidationError
+from jsonschema.exceptions import ValidationError, best_match
+from jsonschema.validators import validator_for
 from lxml import etree
 from werkzeug.local import LocalProxy
 from werkzeug.security import gen_salt
@@ -74,6 +76,7 @@ from .documents.dojson.contrib.marc21tojson import marc21
 from .documents.views import get_cover_art
 from .holdings.cli import create_patterns
 from .ill_requests.cli import create_ill_requests
+from .indexer_utils import PartitionedReindex
 from .items.api import Item
 from .items.cli import create_items, reindex_items
 from .libraries.api import Library
@@ -83,12 +86,13 @@ from .operation_logs.cli import create_operation_logs, \
     destroy_operation_logs, dump_operation_logs
 from .patrons.cli import import_users, users_validate
 from .selfcheck.cli import create_terminal, list_terminal, update_terminal
-from .tasks import process_bulk_queue
+from .tasks import index_partition, process_bulk_queue
 from .utils import JsonWriter, bulk_load_metadata, bulk_load_pids, \
     bulk_load_pidstore, bulk_save_metadata, bulk_save_pids, \
-    bulk_save_pidstore, csv_metadata_line, csv_pidstore_line, \
+    bulk_save_pidstore, chunks, csv_metadata_line, csv_pidstore_line, \
     extracted_data_from_ref, get_record_class_from_schema_or_pid_type, \
-    number_records_in_file, read_json_record, read_xml_record
+    number_records_in_file, read_json_record, read_xml_record, \
+    read_xml_records
 from ..modules.providers import append_fixtures_new_identifiers
 from ..modules.utils import get_schema_for_resource
 
@@ -1065,13 +1069,51 @@ def check_validate(jsonfile, type, verbose, debug, error_file_name,
                 pprint(data)
 
 
-def do_worker(marc21records, results, pid_required, debug, schema=None):
-    """Worker for marc21 to json transformation."""
-    for data in marc21records:
-        data_json = data['json']
-        pid = data_json.get('001', '???')
+# state of a marc21 to json worker process (see `init_marc21_worker`)
+marc21_worker = {}
+
+
+def init_marc21_worker(schema, pid_required, debug):
+    """Initialize a marc21 to json worker process.
+
+    The dojson rules and the json schema validator are built once by worker
+    process instead of once by chunk of records.
+
+    :param schema: the document json schema with resolved refs.
+    :param pid_required: if True the pid is required by the validation.
+    :param debug: if True print the failed records.
+    """
+    if not marc21.index:
+        marc21.build()
+    validator = None
+    if schema:
+        validator_class = validator_for(schema)
+        validator_class.check_schema(schema)
+        validator = validator_class(schema)
+    marc21_worker.update(
+        validator=validator,
+        pid_required=pid_required,
+        debug=debug
+    )
+
+
+def do_worker(marc21records):
+    """Worker for marc21 to json transformation.
+
+    :param marc21records: list of marc21 xml records (bytes).
+    :return: the list of results in the order of the records.
+    """
+    validator = marc21_worker.get('validator')
+    pid_required = marc21_worker.get('pid_required')
+    debug = marc21_worker.get('debug')
+    results = []
+    for marc21xml in marc21records:
+        data_json = {}
+        pid = '???'
         record = {}
         try:
+            data_json = create_record(etree.fromstring(marc21xml))
+            pid = data_json.get('001', '???')
             record = marc21.do(data_json)
             if not record.get("$schema"):
                 # create dummy schema in data
@@ -1080,8 +1122,10 @@ def do_worker(marc21records, results, pid_required, debug, schema=None):
                 if not record.get("pid"):
                     # create dummy pid in data
                     record["pid"] = 'dummy'
-            if schema:
-                validate(record, schema)
+            if validator:
+                error = best_match(validator.iter_errors(record))
+                if error is not None:
+                    raise error
             if record["$schema"] == 'dummy':
                 del record["$schema"]
             if not pid_required:
@@ -1094,15 +1138,14 @@ def do_worker(marc21records, results, pid_required, debug, schema=None):
         except ValidationError as err:
             if debug:
                 pprint(record)
-            trace_lines = traceback.format_exc(1).split('\n')
-            trace = trace_lines[5].strip()
             rero_pid = data_json.get('035__', {}).get('a'),
-            msg = f'ERROR:\t{pid}\t{rero_pid}\t{err.args[0]}\t-\t{trace}'
+            msg = f'ERROR:\t{pid}\t{rero_pid}\t{err.args[0]}\t-\t' \
+                f'{list(err.absolute_path)}'
             click.secho(msg, fg='red')
             results.append({
                 'pid': pid,
                 'status': False,
-                'data': data['xml']
+                'data': marc21xml
             })
         except Exception as err:
             rero_pid = data_json.get('035__', {}).get('a'),
@@ -1113,17 +1156,23 @@ def do_worker(marc21records, results, pid_required, debug, schema=None):
             results.append({
                 'pid': pid,
                 'status': False,
-                'data': data['xml']
+                'data': marc21xml
             })
+    return results
 
 
 class Marc21toJson():
-    """Class for Marc21 recorts to Json transformation."""
+    """Class for Marc21 recorts to Json transformation.
+
+    The xml records are read with a streaming parser and sent by chunk to a
+    pool of worker processes. The results are written in the order of the
+    records as soon as they are available, at most two chunks by worker
+    are pending.
+    """
 
     __slots__ = ['xml_file', 'json_file_ok', 'xml_file_error', 'parallel',
                  'chunk', 'verbose', 'debug', 'pid_required',
-                 'count', 'count_ok', 'count_ko', 'ctx',
-                 'results', 'active_buffer', 'buffer', 'first_result',
+                 'count', 'count_ok', 'count_ko', 'ctx', 'first_result',
                  'schema']
 
     def __init__(self, xml_file, json_file_ok, xml_file_error,
@@ -1149,22 +1198,18 @@ class Marc21toJson():
             multiprocessing.log_to_stderr(logging.DEBUG)
         self.pid_required = pid_required
         self.ctx = multiprocessing.get_context("spawn")
-        manager = self.ctx.Manager()
-        self.results = manager.list()
-        self.active_buffer = 0
-        self.buffer = []
-        for index in range(parallel):
-            self.buffer.append({'process': None, 'records': []})
         self.start()
 
     def counts(self):
         """Get the counters."""
         return self.count, self.count_ok, self.count_ko
 
-    def write_results(self):
-        """Write results from multiprocess to file."""
-        while self.results:
-            value = self.results.pop(0)
+    def write_results(self, results):
+        """Write results of a chunk to files.
+
+        :param results: the results of a chunk.
+        """
+        for value in results:
             status = value.get('status')
             data = value.get('data')
             if status:
@@ -1179,49 +1224,6 @@ class Marc21toJson():
                 self.count_ko += 1
                 self.xml_file_error.write(data)
 
-    def wait_free_process(self):
-        """Wait for next process to finish."""
-        index = (self.active_buffer + 1) % self.parallel
-        process = self.buffer[index]['process']
-        if process:
-            process.join()
-        # reset data for finished jobs
-        for index in range(self.parallel):
-            process = self.buffer[index].get('process')
-            if process and process.exitcode is not None:
-                del self.buffer[index]['process']
-                self.buffer[index].clear()
-                self.buffer[index] = {'process': None, 'records': []}
-
-    def next_active_buffer(self):
-        """Set the next active buffer index."""
-        self.active_buffer = (self.active_buffer + 1) % self.parallel
-
-    def wait_all_free_process(self):
-        """Wait for all processes to finish."""
-        for index in range(self.parallel):
-            self.wait_free_process()
-            self.next_active_buffer()
-
-    def start_new_process(self):
-        """Start a new process in context."""
-        new_process = self.ctx.Process(
-            target=do_worker,
-            args=(self.active_records, self.results, self.pid_required,
-                  self.debug, self.schema)
-        )
-        self.wait_free_process()
-        new_process.start()
-        self.active_process = new_process
-        if self.verbose:
-            if self.count < self.chunk:
-                start = 1
-            else:
-                start = self.count - len(self.active_records) + 1
-            pid = new_process.pid
-            click.echo(f'Start process: {pid} records: {start}..{self.count}')
-        self.next_active_buffer()
-
     def write_start(self):
         """Write initial lines to files."""
         self.json_file_ok.write('[')
@@ -1235,51 +1237,45 @@ class Marc21toJson():
         self.json_file_ok.write('\n]')
         self.xml_file_error.write(b'\n</collection>')
 
+    def read_records(self):
+        """Read the xml records.
+
+        :return: generator of the serialized xml records.
+        """
+        for marc21xml in read_xml_records(self.xml_file):
+            self.count += 1
+            yield etree.tostring(
+                marc21xml,
+                pretty_print=True,
+                encoding='UTF-8'
+            ).strip()
+
     def start(self):
         """Start the transformation."""
         self.write_start()
-        for marc21xml in read_xml_record(self.xml_file):
-            marc21json_record = create_record(marc21xml)
-            self.active_records.append({
-                'json': marc21json_record,
-                'xml': etree.tostring(
-                    marc21xml,
-                    pretty_print=True,
-                    encoding='UTF-8'
-                ).strip()
-            })
-            self.count += 1
-            if len(self.active_records) % self.chunk == 0:
-                self.write_results()
-                self.start_new_process()
-
-        # process the remaining records
-        self.write_results()
-        if self.active_records:
-            self.start_new_process()
-        self.wait_all_free_process()
-        self.write_results()
+        pending = deque()
+        with self.ctx.Pool(
+            processes=self.parallel,
+            initializer=init_marc21_worker,
+            initargs=(self.schema, self.pid_required, self.debug)
+        ) as pool:
+            for records in chunks(self.read_records(), self.chunk):
+                if self.verbose:
+                    start = self.count - len(records) + 1
+                    click.echo(f'Send records: {start}..{self.count}')
+                pending.append(pool.apply_async(do_worker, (records,)))
+                # write the finished chunks in order
+                while pending and (len(pending) >= 2 * self.parallel
+                                   or pending[0].ready()):
+                    self.write_results(pending.popleft().get())
+            while pending:
+                self.write_results(pending.popleft().get())
         self.write_stop()
         return self.count, self.count_ok, self.count_ko
 
-    @property
-    def active_process(self):
-        """Get the active process."""
-        return self.buffer[self.active_buffer]['process']
-
-    @active_process.setter
-    def active_process(self, process):
-        """Set the active process."""
-        self.buffer[self.active_buffer]['process'] = process
-
-    @property
-    def active_records(self):
-        """Get the active records."""
-        return self.buffer[self.active_buffer]['records']
-
 
 @utils.command('marc21tojson')
-@click.argument('xml_file', type=click.File('r'))
+@click.argument('xml_file', type=click.File('rb'))
 @click.argument('json_file_ok', type=click.File('w'))
 @click.argument('xml_file_error', type=click.File('wb'))
 @click.option('-p', '--parallel', 'parallel', default=8)
@@ -1552,6 +1548,138 @@ def reindex(pid_types, no_info, from_date, until_date, direct, count, index):
         )
 
 
+@utils.command('partitioned_reindex')
+@click.option('--yes-i-know', is_flag=True, callback=abort_if_false,
+              expose_value=False,
+              prompt='Do you really want to reindex records?')
+@click.option('-t', '--pid-types', multiple=True)
+@click.option('-r', '--run', 'run', default=None,
+              help='Name of the run, to resume an interrupted run.')
+@click.option('-s', '--size', 'size', type=int, default=10000,
+              help='Number of records by partition.')
+@click.option('-n', '--new-index', 'new_index', is_flag=True, default=False,
+              help='Index into fresh indices and switch the aliases.')
+@click.option('-d', '--delayed', 'delayed', is_flag=True, default=False,
+              help='Index the partitions with celery tasks.')
+@click.option('-q', '--queue', 'queue', type=str,
+              help='Name of the celery queue used to put the tasks into.')
+@click.option('--timeout', 'timeout', type=int, default=3600,
+              help='Maximum waiting time in seconds for the next delayed '
+                   'partition to complete.')
+@click.option('-f', '--force', 'force', is_flag=True, default=False,
+              help='Switch the aliases even with errors or missing '
+                   'partitions.')
+@with_appcontext
+def partitioned_reindex(pid_types, run, size, new_index, delayed, queue,
+                        timeout, force):
+    """Reindex records split into partitions.
+
+    The progress of each run is stored: an interrupted run is resumed by
+    executing the command again with the same run name. With fresh indices
+    the records written during the run are indexed again before the aliases
+    switch, the writes should be stopped to not lose the last ones.
+
+    :param pid_types: Pid types.
+    :param run: Name of the run.
+    :param size: Number of records by partition.
+    :param new_index: Index into fresh indices and switch the aliases.
+    :param delayed: Index the partitions with celery tasks.
+    :param queue: Name of the celery queue used to put the tasks into.
+    :param timeout: Maximum waiting time for a delayed partition.
+    :param force: Switch the aliases even with errors.
+    """
+    endpoints = current_app.config.get('RECORDS_REST_ENDPOINTS')
+    pid_types = pid_types or list(endpoints)
+    run = run or datetime.now().strftime('%Y%m%d%H%M%S')
+    reindex = PartitionedReindex(run)
+    plan = reindex.plan
+    if plan:
+        click.secho(f'Resume run {run}', fg='green')
+    else:
+        for pid_type in pid_types:
+            if pid_type not in endpoints:
+                click.secho(
+                    f'ERROR type does not exist: {pid_type}', fg='red')
+                return
+        click.secho(f'Create run {run}', fg='green')
+        plan = reindex.create_plan(pid_types, size=size, new_index=new_index)
+    for pid_type, index in plan['indices'].items():
+        click.echo(f'{pid_type:>6}: new index {index}')
+
+    def display(partition_id, stats):
+        """Display the statistics of a completed partition."""
+        click.echo(
+            f'{partition_id:>12}: {stats["count"]} records in '
+            f'{stats["duration"]:.2f}s ({stats["rate"]:.2f} records/s), '
+            f'{stats["errors"]} errors'
+        )
+
+    pending = [partition['id'] for partition in reindex.pending()]
+    click.secho(
+        f'Partitions: {len(plan["partitions"])} pending: {len(pending)}',
+        fg='green'
+    )
+    if delayed:
+        celery_kwargs = {'queue': queue} if queue else {}
+        group(
+            index_partition.si(run, partition_id)
+            for partition_id in pending
+        ).apply_async(**celery_kwargs)
+        last_progress = datetime.now()
+        while pending:
+            sleep(5)
+            stats = reindex.stats
+            failed = reindex.failed
+            for partition_id in [
+                    pid for pid in pending if pid in stats or pid in failed]:
+                if partition_id in stats:
+                    display(partition_id, stats[partition_id])
+                else:
+                    click.secho(
+                        f'{partition_id:>12}: failed {failed[partition_id]}',
+                        fg='red')
+                pending.remove(partition_id)
+                last_progress = datetime.now()
+            if (datetime.now() - last_progress).total_seconds() > timeout:
+                click.secho(
+                    f'No partition completed since {timeout}s: '
+                    f'{len(pending)} partitions pending',
+                    fg='red'
+                )
+                break
+    else:
+        for partition_id in pending:
+            try:
+                display(partition_id, reindex.index_partition(partition_id))
+            except Exception as error:
+                click.secho(f'{partition_id:>12}: failed {error}', fg='red')
+
+    all_stats = reindex.stats.values()
+    count = sum(stats['count'] for stats in all_stats)
+    duration = sum(stats['duration'] for stats in all_stats)
+    errors = sum(stats['errors'] for stats in all_stats)
+    click.secho(
+        f'Indexed: {count} records, {errors} errors, '
+        f'{count / duration if duration else 0:.2f} records/s by partition',
+        fg='yellow'
+    )
+    if not plan['indices']:
+        return
+    missing = reindex.pending()
+    if (errors or missing) and not force:
+        click.secho(
+            f'Aliases not switched: {errors} errors, {len(missing)} '
+            'partitions not completed. Resume the run or use --force.',
+            fg='red'
+        )
+        return
+    for pid_type, count in reindex.catch_up().items():
+        click.echo(f'{pid_type:>6}: {count} records written during the run')
+    for old_index, index in reindex.switch_aliases().items():
+        click.secho(f'Aliases switched from {old_index} to {index}',
+                    fg='green')
+
+
 @utils.command('reindex_missing')
 @click.option('-t', '--pid-types', multiple=True, required=True)
 @click.option('-v', '--verbose', 'verbose', is_flag=True, default=False)
@@ -1825,38 +1953,44 @@ def export(verbose, pid_type, outfile_name, pidfile, indent, schema):
     record_class = get_record_class_from_schema_or_pid_type(pid_type=pid_type)
 
     if pidfile:
-        pids = list(filter(None, [line.rstrip() for line in pidfile]))
+        pids = filter(None, [line.rstrip() for line in pidfile])
+        pids_chunks = chunks(pids, 1000)
     else:
-        pids = record_class.get_all_pids()
+        pids_chunks = record_class.get_all_pids(limit=1000, chunk=True)
 
     count = 0
     output = '['
     offset = '{character:{indent}}'.format(character=' ', indent=indent)
-    for pid in pids:
-        try:
-            rec = record_class.get_record_by_pid(pid)
-            count += 1
-            if verbose:
-                click.echo(
-                    f'{count: <8} {pid_type} export {rec.pid}:{rec.id}')
-
-            outfile.write(output)
-            if not schema:
-                rec.pop('$schema', None)
-                contributions_sources = current_app.config.get(
-                    'RERO_ILS_CONTRIBUTIONS_SOURCES', [])
-                for contributions_source in contributions_sources:
-                    try:
-                        del rec[contributions_source]['$schema']
-                    except Exception:
-                        pass
-            output = ''
-            lines = json.dumps(rec, indent=indent).split('\n')
-            for line in lines:
-                output += f'\n{offset}{line}'
-        except Exception as err:
-            click.echo(err)
-            click.echo(f'ERROR: Can not export pid:{pid}')
+    for pids_chunk in pids_chunks:
+        records = {
+            record.pid: record
+            for record in record_class.get_records_by_pids(pids_chunk)
+        }
+        for pid in pids_chunk:
+            try:
+                rec = records[pid]
+                count += 1
+                if verbose:
+                    click.echo(
+                        f'{count: <8} {pid_type} export {rec.pid}:{rec.id}')
+
+                outfile.write(output)
+                if not schema:
+                    rec.pop('$schema', None)
+                    contributions_sources = current_app.config.get(
+                        'RERO_ILS_CONTRIBUTIONS_SOURCES', [])
+                    for contributions_source in contributions_sources:
+                        try:
+                            del rec[contributions_source]['$schema']
+                        except Exception:
+                            pass
+                output = ''
+                lines = json.dumps(rec, indent=indent).split('\n')
+                for line in lines:
+                    output += f'\n{offset}{line}'
+            except Exception as err:
+                click.echo(err)
+                click.echo(f'ERROR: Can not export pid:{pid}')
 
 
 def create_personal(
@@ -19,32 +19,46 @@
 
 from __future__ import absolute_import, print_function
 
+import time
+
 import click
 from celery import shared_task
 from flask import current_app
 
 from .api import Contribution
+from ..api import IlsRecordError
 
 
 @shared_task(ignore_result=True)
 def create_mef_records(records, verbose=False):
-    """Records creation and indexing.
+    """Records creation or update and indexing.
+
+    The records are written in one transaction, the existing ones are
+    updated, and they are queued for bulk indexing. The written records are
+    kept if some records fail, but an error is raised to stop the harvest
+    before its cursor is saved.
 
-    :param records: records to create
+    :param records: records to create or update
     :param verbose: verbose output
     :return: count of records
+    :raises IlsRecordError.NotWritten: if some records can not be written.
     """
-    # TODO: check update an existing record
-    for record in records:
-        rec = Contribution.create(
-            record,
-            dbcommit=True,
-            reindex=True,
-            delete_pid=False
-        )
-        if verbose:
+    start_time = time.monotonic()
+    created, updated, failed = Contribution.create_or_update_many(
+        records, dbcommit=True, reindex=True)
+    if verbose:
+        for rec in created + updated:
             click.echo(f'record uuid: {rec.id}')
-    return len(records)
+    count = len(created) + len(updated)
+    duration = time.monotonic() - start_time
+    current_app.logger.info(
+        f'mef records: {len(created)} created, {len(updated)} updated in '
+        f'{duration:.2f}s ({count / (duration or 1):.2f} records/s)'
+    )
+    if failed:
+        raise IlsRecordError.NotWritten(
+            f'mef records not written: {", ".join(map(str, failed))}')
+    return count
 
 
 @shared_task(ignore_result=True)
@@ -19,10 +19,15 @@
 """API for manipulating documents."""
 
 
+from datetime import datetime
 from functools import partial
 
+import pytz
+from elasticsearch.exceptions import NotFoundError
+from elasticsearch_dsl import Q
 from flask import current_app
 from invenio_circulation.search.api import search_by_pid
+from invenio_search import current_search_client
 from invenio_search.api import RecordsSearch
 
 from .models import DocumentIdentifier, DocumentMetadata
@@ -31,11 +36,12 @@ from .utils import edition_format_text, publication_statement_text, \
 from ..acq_order_lines.api import AcqOrderLinesSearch
 from ..api import IlsRecord, IlsRecordsIndexer
 from ..fetchers import id_fetcher
+from ..indexer_utils import get_refresh_argument
 from ..minters import id_minter
 from ..operation_logs.extensions import OperationLogObserverExtension
 from ..organisations.api import Organisation
 from ..providers import Provider
-from ..utils import sorted_pids
+from ..utils import date_string_to_utc
 
 # provider
 DocumentProvider = type(
@@ -109,6 +115,114 @@ class Document(IlsRecord):
                     raise ValueError(msg)
         return False
 
+    @classmethod
+    def get_availability_by_pids(cls, pids, view_code):
+        """Get availability for a list of documents.
+
+        The rules are the same as `is_available` but the whole list is
+        resolved with a fixed number of Elasticsearch queries (holdings,
+        items, item types and loans) whatever the number of documents.
+
+        :param pids: the document pids.
+        :param view_code: the current view code.
+        :return: a dict with the document pid as key and the availability as
+                 value.
+        """
+        from ..holdings.api import HoldingsSearch
+        from ..holdings.models import HoldingTypes
+        from ..item_types.api import ItemTypesSearch
+        from ..items.api import ItemsSearch
+        from ..items.models import ItemIssueStatus, TypeOfItem
+        from ..loans.api import LoansSearch, LoanState
+
+        availability = {pid: False for pid in pids}
+        if not availability:
+            return availability
+
+        # holdings: electronic holdings are always available, masked
+        # holdings are never available.
+        query = HoldingsSearch()\
+            .filter('terms', document__pid=list(availability))\
+            .source(['pid', 'document.pid', 'holdings_type', '_masked'])
+        if view_code != current_app.config.get(
+                'RERO_ILS_SEARCH_GLOBAL_VIEW_CODE'):
+            org_pid = Organisation.get_record_by_viewcode(view_code)['pid']
+            query = query.filter('term', organisation__pid=org_pid)
+        holdings = {}
+        for hit in query.scan():
+            hit = hit.to_dict()
+            document_pid = hit['document']['pid']
+            if hit.get('holdings_type') == HoldingTypes.ELECTRONIC:
+                availability[document_pid] = True
+            elif not hit.get('_masked', False):
+                holdings[hit['pid']] = document_pid
+        holdings = {
+            holding_pid: document_pid
+            for holding_pid, document_pid in holdings.items()
+            if not availability[document_pid]
+        }
+        if not holdings:
+            return availability
+
+        # items: masked items and not received issues are never available.
+        query = ItemsSearch()\
+            .filter('terms', holding__pid=list(holdings))\
+            .exclude('term', _masked=True)\
+            .source(['pid', 'holding.pid', 'item_type.pid',
+                     'temporary_item_type', 'type', 'issue.status'])
+        now_date = pytz.utc.localize(datetime.now())
+        items = {}
+        for hit in query.scan():
+            hit = hit.to_dict()
+            if hit.get('type') == TypeOfItem.ISSUE and \
+                    hit.get('issue', {}).get('status') != \
+                    ItemIssueStatus.RECEIVED:
+                continue
+            # same rules as `Item.item_type_circulation_category_pid`
+            circ_category_pid = hit.get('item_type', {}).get('pid')
+            tmp_item_type = hit.get('temporary_item_type', {})
+            if tmp_item_type.get('pid'):
+                end_date = tmp_item_type.get('end_date')
+                if not end_date or date_string_to_utc(end_date) >= now_date:
+                    circ_category_pid = tmp_item_type['pid']
+            items[hit['pid']] = (
+                holdings[hit['holding']['pid']], circ_category_pid)
+        if not items:
+            return availability
+
+        # item types: negative availability circulation categories.
+        circ_category_pids = {value[1] for value in items.values()}
+        query = ItemTypesSearch()\
+            .filter('terms', pid=list(circ_category_pids))\
+            .filter('term', negative_availability=True)\
+            .source(['pid'])
+        negative_pids = {hit.pid for hit in query.scan()}
+        items = {
+            item_pid: value for item_pid, value in items.items()
+            if value[1] not in negative_pids
+        }
+        if not items:
+            return availability
+
+        # loans: items with an active loan or a request.
+        states = [LoanState.PENDING] + \
+            current_app.config['CIRCULATION_STATES_LOAN_ACTIVE']
+        query = LoansSearch()\
+            .filter('terms', item_pid__value=list(items))\
+            .filter('term', item_pid__type='item')\
+            .filter('terms', state=states)\
+            .extra(size=0)
+        query.aggs.bucket(
+            'item', 'terms', field='item_pid.value', size=len(items))
+        busy_pids = {
+            bucket.key
+            for bucket in query.execute().aggregations.item.buckets
+        }
+        for item_pid, (document_pid, _) in items.items():
+            if item_pid not in busy_pids:
+                availability[document_pid] = True
+        return availability
+
     @property
     def harvested(self):
         """Is this record harvested from an external service."""
@@ -120,81 +234,42 @@ class Document(IlsRecord):
         # TODO: Make this condition on data
         return not self.harvested
 
-    def get_links_to_me(self, get_pids=False):
-        """Record links.
+    @classmethod
+    def get_links_queries(cls, pid):
+        """Get the queries of the records linked to a record.
 
-        :param get_pids: if True list of linked pids
-                         if False count of linked records
+        :param pid: the record pid.
+        :return: a dict with, by link name, the search of the linked records.
         """
-        links = {}
         from ..holdings.api import HoldingsSearch
         from ..items.api import ItemsSearch
         from ..loans.api import LoanState
-        hold_query = HoldingsSearch().filter('term', document__pid=self.pid)
-        item_query = ItemsSearch().filter('term', document__pid=self.pid)
-        loan_query = search_by_pid(
-            document_pid=self.pid,
-            exclude_states=[LoanState.CANCELLED, LoanState.ITEM_RETURNED]
-        )
-        acq_order_lines_query = AcqOrderLinesSearch() \
-            .filter('term', document__pid=self.pid)
-        relation_types = {
-            'partOf': 'partOf.document.pid',
-            'supplement': 'supplement.pid',
-            'supplementTo': 'supplementTo.pid',
-            'otherEdition': 'otherEdition__pid',
-            'otherPhysicalFormat': 'otherPhysicalFormat.pid',
-            'issuedWith': 'issuedWith.pid',
-            'precededBy': 'precededBy.pid',
-            'succeededBy': 'succeededBy.pid',
-            'relatedTo': 'relatedTo__pid',
-            'hasReproduction': 'hasReproduction.pid',
-            'reproductionOf': 'reproductionOf.pid'
+        relation_fields = [
+            'partOf.document.pid', 'supplement.pid', 'supplementTo.pid',
+            'otherEdition.pid', 'otherPhysicalFormat.pid', 'issuedWith.pid',
+            'precededBy.pid', 'succeededBy.pid', 'relatedTo.pid',
+            'hasReproduction.pid', 'reproductionOf.pid'
+        ]
+        return {
+            'holdings': HoldingsSearch().filter('term', document__pid=pid),
+            'items': ItemsSearch().filter('term', document__pid=pid),
+            'loans': search_by_pid(
+                document_pid=pid,
+                exclude_states=[LoanState.CANCELLED, LoanState.ITEM_RETURNED]
+            ),
+            'acq_order_lines': AcqOrderLinesSearch()
+            .filter('term', document__pid=pid),
+            'documents': DocumentsSearch().filter('bool', should=[
+                Q('term', **{field: pid}) for field in relation_fields
+            ])
         }
 
-        if get_pids:
-            holdings = sorted_pids(hold_query)
-            items = sorted_pids(item_query)
-            loans = sorted_pids(loan_query)
-            acq_order_lines = sorted_pids(acq_order_lines_query)
-            documents = {}
-            for relation, relation_es in relation_types.items():
-                doc_query = DocumentsSearch() \
-                    .filter({'term': {relation_es: self.pid}})
-                pids = sorted_pids(doc_query)
-                if pids:
-                    documents[relation] = pids
-        else:
-            holdings = hold_query.count()
-            items = item_query.count()
-            loans = loan_query.count()
-            acq_order_lines = acq_order_lines_query.count()
-            documents = 0
-            for relation, relation_es in relation_types.items():
-                doc_query = DocumentsSearch() \
-                    .filter({'term': {relation_es: self.pid}})
-                documents += doc_query.count()
-        if holdings:
-            links['holdings'] = holdings
-        if items:
-            links['items'] = items
-        if loans:
-            links['loans'] = loans
-        if acq_order_lines:
-            links['acq_order_lines'] = acq_order_lines
-        if documents:
-            links['documents'] = documents
-        return links
-
-    def reasons_not_to_delete(self):
-        """Get reasons not to delete record."""
-        cannot_delete = {}
-        links = self.get_links_to_me()
-        if links:
-            cannot_delete['links'] = links
+    def reasons_to_keep(self):
+        """Reasons aside from record links to keep a document."""
+        others = {}
         if self.harvested:
-            cannot_delete['others'] = dict(harvested=True)
-        return cannot_delete
+            others['harvested'] = True
+        return others
 
     @classmethod
     def post_process(cls, dump):
@@ -355,6 +430,142 @@ class DocumentsIndexer(IlsRecordsIndexer):
         record.index_contributions(bulk=True)
         return return_value
 
+    @classmethod
+    def _patch_holdings(cls, document_pid, patch):
+        """Patch the holdings part of an indexed document.
+
+        The document is not enriched again: only the given patch is applied
+        on its indexed `holdings` and it is reindexed with the same version.
+        If the document is not indexed or if the patch can not be applied,
+        the document is fully reindexed.
+
+        :param document_pid: the document pid.
+        :param patch: a function taking the list of the document holdings
+                      and returning False if it can not be applied.
+        """
+        es_doc = None
+        document_id = Document.get_id_by_pid(document_pid)
+        if document_id:
+            try:
+                es_doc = current_search_client.get(
+                    DocumentsSearch.Meta.index, document_id)
+            except NotFoundError:
+                pass
+        if es_doc:
+            data = es_doc['_source']
+            holdings = data.get('holdings', [])
+            if patch(holdings) is not False:
+                data.pop('holdings', None)
+                if holdings:
+                    data['holdings'] = holdings
+                # reindex the document with the same version
+                current_search_client.index(
+                    index=DocumentsSearch.Meta.index,
+                    id=es_doc['_id'],
+                    body=data,
+                    version=es_doc['_version'],
+                    version_type='external_gte',
+                    refresh=get_refresh_argument(
+                        DocumentsSearch.Meta.index, 'doc')
+                )
+                return
+        document = Document.get_record_by_pid(document_pid)
+        if document:
+            document.reindex()
+
+    @classmethod
+    def update_holding(cls, holding):
+        """Update a holding in its indexed document.
+
+        The items already indexed into the document holding are kept.
+
+        :param holding: the holding record, already indexed.
+        """
+        from .listener import get_holding_document_data
+        from ..holdings.api import HoldingsSearch
+        try:
+            es_holding = current_search_client.get(
+                HoldingsSearch.Meta.index, holding.id)['_source']
+        except NotFoundError:
+            return
+
+        def patch(holdings):
+            hold_data = get_holding_document_data(es_holding)
+            for idx, hold in enumerate(holdings):
+                if hold['pid'] == holding.pid:
+                    if hold.get('items'):
+                        hold_data['items'] = hold['items']
+                    holdings[idx] = hold_data
+                    break
+            else:
+                holdings.append(hold_data)
+
+        cls._patch_holdings(holding.document_pid, patch)
+
+    @classmethod
+    def delete_holding(cls, document_pid, holding_pid):
+        """Remove a holding and its items from its indexed document.
+
+        :param document_pid: the document pid.
+        :param holding_pid: the holding pid.
+        """
+        def patch(holdings):
+            holdings[:] = [h for h in holdings if h['pid'] != holding_pid]
+
+        cls._patch_holdings(document_pid, patch)
+
+    @classmethod
+    def update_item(cls, item):
+        """Update an item in its indexed document.
+
+        :param item: the item record, already indexed.
+        """
+        from .listener import get_item_document_data
+        from ..items.api import ItemsSearch
+        try:
+            es_item = current_search_client.get(
+                ItemsSearch.Meta.index, item.id)['_source']
+        except NotFoundError:
+            return
+
+        def patch(holdings):
+            for hold in holdings:
+                if hold['pid'] == item.holding_pid:
+                    items = [
+                        i for i in hold.get('items', [])
+                        if i['pid'] != item.pid
+                    ]
+                    items.append(get_item_document_data(es_item, hold))
+                    hold['items'] = items
+                    return
+            # the parent holding is not yet in the document
+            return False
+
+        cls._patch_holdings(item.document_pid, patch)
+
+    @classmethod
+    def delete_item(cls, document_pid, item_pid, holding_pid=None):
+        """Remove an item from its indexed document.
+
+        :param document_pid: the document pid.
+        :param item_pid: the item pid.
+        :param holding_pid: the holding pid of the item, if given only this
+            holding is patched as the item can be moved to another holding
+            of the same document.
+        """
+        def patch(holdings):
+            for hold in holdings:
+                if holding_pid and hold['pid'] != holding_pid:
+                    continue
+                items = [
+                    i for i in hold.get('items', []) if i['pid'] != item_pid
+                ]
+                hold.pop('items', None)
+                if items:
+                    hold['items'] = items
+
+        cls._patch_holdings(document_pid, patch)
+
     def bulk_index(self, record_id_iterator):
         """Bulk index records.
 
@@ -48,72 +48,14 @@ def enrich_document_data(sender, json=None, record=None, index=None,
             .scan()
         for holding in es_holdings:
             holding = holding.to_dict()
-            hold_data = {
-                'pid': holding['pid'],
-                'location': {
-                    'pid': holding['location']['pid'],
-                },
-                'circulation_category': {
-                    'pid': holding['circulation_category']['pid'],
-                },
-                'organisation': {
-                    'organisation_pid': holding['organisation']['pid'],
-                    'library_pid': holding['library']['pid']
-                }
-            }
-            # Index additional holdings fields into the document record
-            holdings_fields = [
-                'call_number', 'second_call_number', 'index',
-                'enumerationAndChronology', 'supplementaryContent',
-                'local_fields'
-            ]
-            for field in holdings_fields:
-                if field in holding:
-                    hold_data[field] = holding.get(field)
-            # Index holdings notes
-            notes = [n['content'] for n in holding.get('notes', []) if n]
-            if notes:
-                hold_data['notes'] = notes
-
+            hold_data = get_holding_document_data(holding)
             # Index items attached to each holdings record
             es_items = ItemsSearch()\
                 .filter('term', holding__pid=holding['pid'])\
                 .scan()
             for item in es_items:
-                item = item.to_dict()
-                item_data = {
-                    'pid': item['pid'],
-                    'barcode': item['barcode'],
-                    'status': item['status'],
-                    'local_fields': item.get('local_fields'),
-                    'call_number': item.get('call_number'),
-                    'second_call_number': item.get('second_call_number')
-                }
-                item_data = {k: v for k, v in item_data.items() if v}
-
-                # item acquisition part.
-                #   We need to store the acquisition data of the items into the
-                #   document. As we need to link acquisition date and
-                #   org/lib/loc, we need to store theses data together in a
-                #   'nested' structure.
-                acq_date = item.get('acquisition_date')
-                if acq_date:
-                    item_data['acquisition'] = {
-                        'organisation_pid': holding['organisation']['pid'],
-                        'library_pid': holding['library']['pid'],
-                        'location_pid': holding['location']['pid'],
-                        'date': acq_date
-                    }
-                # item notes content.
-                #   index the content of the public notes into the document.
-                public_notes_content = [
-                    n['content']
-                    for n in item.get('notes', [])
-                    if n['type'] in ItemNoteTypes.PUBLIC
-                ]
-                if public_notes_content:
-                    item_data['notes'] = public_notes_content
-                hold_data.setdefault('items', []).append(item_data)
+                hold_data.setdefault('items', []).append(
+                    get_item_document_data(item.to_dict(), hold_data))
             holdings.append(hold_data)
 
         if holdings:
@@ -188,3 +130,82 @@ def enrich_document_data(sender, json=None, record=None, index=None,
             json['sort_date_new'] = \
                 pub_provision.get('endDate', pub_provision.get('startDate'))
             json['sort_date_old'] = pub_provision.get('startDate')
+
+
+def get_holding_document_data(holding):
+    """Get the data of a holding to index into its document.
+
+    :param holding: the holding data from the holdings index.
+    :return: the holding data without the attached items.
+    """
+    hold_data = {
+        'pid': holding['pid'],
+        'location': {
+            'pid': holding['location']['pid'],
+        },
+        'circulation_category': {
+            'pid': holding['circulation_category']['pid'],
+        },
+        'organisation': {
+            'organisation_pid': holding['organisation']['pid'],
+            'library_pid': holding['library']['pid']
+        }
+    }
+    # Index additional holdings fields into the document record
+    holdings_fields = [
+        'call_number', 'second_call_number', 'index',
+        'enumerationAndChronology', 'supplementaryContent',
+        'local_fields'
+    ]
+    for field in holdings_fields:
+        if field in holding:
+            hold_data[field] = holding.get(field)
+    # Index holdings notes
+    notes = [n['content'] for n in holding.get('notes', []) if n]
+    if notes:
+        hold_data['notes'] = notes
+    return hold_data
+
+
+def get_item_document_data(item, hold_data):
+    """Get the data of an item to index into its document.
+
+    :param item: the item data from the items index.
+    :param hold_data: the data of the parent holding in the document (see
+                      `get_holding_document_data`).
+    :return: the item data.
+    """
+    item_data = {
+        'pid': item['pid'],
+        'barcode': item['barcode'],
+        'status': item['status'],
+        'local_fields': item.get('local_fields'),
+        'call_number': item.get('call_number'),
+        'second_call_number': item.get('second_call_number')
+    }
+    item_data = {k: v for k, v in item_data.items() if v}
+
+    # item acquisition part.
+    #   We need to store the acquisition data of the items into the
+    #   document. As we need to link acquisition date and
+    #   org/lib/loc, we need to store theses data together in a
+    #   'nested' structure.
+    acq_date = item.get('acquisition_date')
+    if acq_date:
+        item_data['acquisition'] = {
+            'organisation_pid':
+                hold_data['organisation']['organisation_pid'],
+            'library_pid': hold_data['organisation']['library_pid'],
+            'location_pid': hold_data['location']['pid'],
+            'date': acq_date
+        }
+    # item notes content.
+    #   index the content of the public notes into the document.
+    public_notes_content = [
+        n['content']
+        for n in item.get('notes', [])
+        if n['type'] in ItemNoteTypes.PUBLIC
+    ]
+    if public_notes_content:
+        item_data['notes'] = public_notes_content
+    return item_data
@@ -23,7 +23,7 @@ from dcxml import simpledc
 from dojson._compat import iteritems, string_types
 # from dojson.contrib.to_marc21.utils import dumps
 from dojson.utils import GroupableOrderedDict
-from flask import current_app, request
+from flask import current_app, request, stream_with_context
 from invenio_records_rest.serializers.dc import \
     DublinCoreSerializer as BaseDublinCoreSerializer
 from invenio_records_rest.serializers.response import record_responsify, \
@@ -40,13 +40,24 @@ from ..documents.api import Document
 from ..documents.utils import title_format_text_head
 from ..documents.views import create_title_alternate_graphic, \
     create_title_responsibilites, create_title_variants
-from ..libraries.api import LibrariesSearch
-from ..organisations.api import OrganisationsSearch
+from ..organisations.api import Organisation
+from ..reference_labels import get_reference_label, get_reference_record
 from ..serializers import JSONSerializer, RecordSchemaJSONV1
 
 DEFAULT_LANGUAGE = 'en'
 
 
+def split_xml_records(root):
+    """Split a search response etree around its empty `records` element.
+
+    :param root: the search response etree with an empty `records` element.
+    :returns: a tuple with the XML before and after the records.
+    """
+    data = etree.tostring(root, xml_declaration=True, encoding='UTF-8')
+    head, tail = data.split(b'<records/>', 1)
+    return head + b'<records>\n', b'</records>' + tail + b'\n'
+
+
 class DocumentJSONSerializer(JSONSerializer):
     """Mixin serializing records as JSON."""
 
@@ -95,13 +106,15 @@ class DocumentJSONSerializer(JSONSerializer):
         viewcode = request.args.get('view', global_view_code)
         if viewcode != global_view_code:
             # Maybe one more if here!
-            view_id = OrganisationsSearch()\
-                .get_record_by_viewcode(viewcode, 'pid').pid
+            view_id = Organisation.get_record_by_viewcode(viewcode)['pid']
         records = results.get('hits', {}).get('hits', {})
+        availability = Document.get_availability_by_pids(
+            [record.get('metadata', {}).get('pid') for record in records],
+            viewcode
+        )
         for record in records:
             metadata = record.get('metadata', {})
-            metadata['available'] = Document.is_available(
-                metadata.get('pid'), viewcode)
+            metadata['available'] = availability.get(metadata.get('pid'))
             titles = metadata.get('title', [])
             text_title = title_format_text_head(titles, with_subtitle=False)
             if text_title:
@@ -129,8 +142,7 @@ class DocumentJSONSerializer(JSONSerializer):
             for org_term in results.get('aggregations', {})\
                     .get('organisation', {}).get('buckets', []):
                 pid = org_term.get('key')
-                org_term['name'] = OrganisationsSearch()\
-                    .get_record_by_pid(pid, ['name']).name
+                org_term['name'] = get_reference_label('org', pid)
                 if pid not in aggr_org:
                     org_term.get('library', {}).pop('buckets', None)
                 else:
@@ -177,15 +189,10 @@ class DocumentJSONSerializer(JSONSerializer):
         :return processed buckets
         """
         processed_buckets = []
-        libraries = {}
-        records = LibrariesSearch()\
-            .get_libraries_by_organisation_pid(org, ['pid', 'name'])
-        for record in records:
-            libraries[record.pid] = record.name
         for bucket in lib_buckets:
-            key = bucket.get('key')
-            if key in libraries:
-                bucket['name'] = libraries[key]
+            library = get_reference_record('lib', bucket.get('key'))
+            if library and library['organisation.pid'] == org:
+                bucket['name'] = library['name']
                 processed_buckets.append(bucket)
         return processed_buckets
 
@@ -257,7 +264,10 @@ class DocumentMARCXMLSerializer(JSONSerializer):
                           with_holdings_items=True, organisation_pids=None,
                           library_pids=None, location_pids=None,
                           item_links_factory=None):
-        """Transform records into an intermediate representation."""
+        """Transform records into an intermediate representation.
+
+        :returns: a generator of the transformed records.
+        """
         # get all linked contributions
         contribution_pids = []
         for hit in hits:
@@ -275,7 +285,6 @@ class DocumentMARCXMLSerializer(JSONSerializer):
         order = current_app.config.get(
             'RERO_ILS_CONTRIBUTIONS_LABEL_ORDER', [])
         source_order = order.get(language, order.get(order['fallback'], []))
-        records = []
         for hit in hits:
             document = hit['_source']
             contributions = document.get('contribution', [])
@@ -300,8 +309,7 @@ class DocumentMARCXMLSerializer(JSONSerializer):
             )
             # complete the contributions from refs
 
-            records.append(record)
-        return records
+            yield record
 
     # Needed if we use it for documents serialization !
     # def serialize_search(self, pid_fetcher, search_result,
@@ -327,136 +335,152 @@ class DocumentMARCXMLSerializer(JSONSerializer):
 class DocumentMARCXMLSRUSerializer(DocumentMARCXMLSerializer):
     """DoJSON based MARCXML SRU serializer for documents.
 
-    Note: This serializer is not suitable for serializing large number of
-    records due to high memory usage.
+    Search results are streamed record by record (see `dumps_stream`).
     """
 
     MARC21_NS = "http://www.loc.gov/MARC21/slim"
     """MARCXML XML Schema"""
 
-    def dumps_etree(self, total, records, sru, xslt_filename=None,
-                    prefix=None):
-        """Dump records into a etree."""
-        element = ElementMaker(
-            namespace=self.MARC21_NS,
-            nsmap={prefix: self.MARC21_NS}
-        )
+    def dump_record(self, record, element):
+        """Dump a single record into an etree.
 
-        def dump_record(record):
-            """Dump a single record."""
-            rec_element = ElementMaker(
-                namespace=self.MARC21_NS,
-                nsmap={prefix: self.MARC21_NS}
-            )
-            rec = element.record()
-            rec.append(element.recordPacking('xml'))
-            rec.append(element.recordSchema('marcxml'))
-            rec_record_data = element.recordData()
-
-            rec_data = rec_element.record()
-            rec_data.attrib['xmlns'] = self.MARC21_NS
-            rec_data.attrib['type'] = "Bibliographic"
+        :param record: the MARC21 record intermediate representation.
+        :param element: the `ElementMaker` used to build the elements.
+        :returns: the record etree.
+        """
+        rec = element.record()
+        rec.append(element.recordPacking('xml'))
+        rec.append(element.recordSchema('marcxml'))
+        rec_record_data = element.recordData()
 
-            leader = record.get('leader')
-            if leader:
-                rec_data.append(element.leader(leader))
+        rec_data = element.record()
+        rec_data.attrib['xmlns'] = self.MARC21_NS
+        rec_data.attrib['type'] = "Bibliographic"
 
-            if isinstance(record, GroupableOrderedDict):
-                items = record.iteritems(with_order=False, repeated=True)
-            else:
-                items = iteritems(record)
+        leader = record.get('leader')
+        if leader:
+            rec_data.append(element.leader(leader))
 
-            for df, subfields in items:
-                # Control fields
-                if len(df) == 3:
-                    if isinstance(subfields, string_types):
-                        controlfield = element.controlfield(subfields)
+        if isinstance(record, GroupableOrderedDict):
+            items = record.iteritems(with_order=False, repeated=True)
+        else:
+            items = iteritems(record)
+
+        for df, subfields in items:
+            # Control fields
+            if len(df) == 3:
+                if isinstance(subfields, string_types):
+                    controlfield = element.controlfield(subfields)
+                    controlfield.attrib['tag'] = df[0:3]
+                    rec_data.append(controlfield)
+                elif isinstance(subfields, (list, tuple, set)):
+                    for subfield in subfields:
+                        controlfield = element.controlfield(subfield)
                         controlfield.attrib['tag'] = df[0:3]
                         rec_data.append(controlfield)
-                    elif isinstance(subfields, (list, tuple, set)):
-                        for subfield in subfields:
-                            controlfield = element.controlfield(subfield)
-                            controlfield.attrib['tag'] = df[0:3]
-                            rec_data.append(controlfield)
-                else:
-                    # Skip leader.
-                    if df == 'leader':
-                        continue
-
-                    if not isinstance(subfields, (list, tuple, set)):
-                        subfields = (subfields,)
-
-                    df = df.replace('_', ' ')
-                    for subfield in subfields:
-                        if not isinstance(subfield, (list, tuple, set)):
-                            subfield = [subfield]
-
-                        for s in subfield:
-                            datafield = element.datafield()
-                            datafield.attrib['tag'] = df[0:3]
-                            datafield.attrib['ind1'] = df[3]
-                            datafield.attrib['ind2'] = df[4]
-
-                            if isinstance(s, GroupableOrderedDict):
-                                items = s.iteritems(
-                                    with_order=False, repeated=True)
-                            elif isinstance(s, dict):
-                                items = iteritems(s)
+            else:
+                # Skip leader.
+                if df == 'leader':
+                    continue
+
+                if not isinstance(subfields, (list, tuple, set)):
+                    subfields = (subfields,)
+
+                df = df.replace('_', ' ')
+                for subfield in subfields:
+                    if not isinstance(subfield, (list, tuple, set)):
+                        subfield = [subfield]
+
+                    for s in subfield:
+                        datafield = element.datafield()
+                        datafield.attrib['tag'] = df[0:3]
+                        datafield.attrib['ind1'] = df[3]
+                        datafield.attrib['ind2'] = df[4]
+
+                        if isinstance(s, GroupableOrderedDict):
+                            items = s.iteritems(
+                                with_order=False, repeated=True)
+                        elif isinstance(s, dict):
+                            items = iteritems(s)
+                        else:
+                            datafield.append(element.subfield(s))
+
+                            items = tuple()
+
+                        for code, value in items:
+                            if not isinstance(value, string_types):
+                                if value:
+                                    for v in value:
+                                        datafield.append(
+                                            element.subfield(v, code=code))
                             else:
-                                datafield.append(element.subfield(s))
-
-                                items = tuple()
-
-                            for code, value in items:
-                                if not isinstance(value, string_types):
-                                    if value:
-                                        for v in value:
-                                            datafield.append(
-                                                element.subfield(v, code=code))
-                                else:
-                                    datafield.append(element.subfield(
-                                        value, code=code))
-
-                            rec_data.append(datafield)
-                rec_record_data.append(rec_data)
-                rec.append(rec_record_data)
-            return rec
+                                datafield.append(element.subfield(
+                                    value, code=code))
+
+                        rec_data.append(datafield)
+        rec_record_data.append(rec_data)
+        rec.append(rec_record_data)
+        return rec
+
+    def dumps_search_etree(self, total, records, sru, element):
+        """Dump the SRU search retrieve response into an etree.
+
+        :param total: the search total (`value` and `relation`).
+        :param records: the MARC21 records intermediate representations.
+        :param sru: the SRU request parameters.
+        :param element: the `ElementMaker` used to build the elements.
+        :returns: the search retrieve response etree.
+        """
+        number_of_records = total['value']
+        start_record = sru.get('start_record', 0)
+        maximum_records = sru.get('maximum_records', 0)
+        query = sru.get('query')
+        query_es = sru.get('query_es')
+        next_record = start_record + maximum_records
+        root = element.searchRetrieveResponse()
+        root.append(element.version('1.1'))
+        root.append(element.numberOfRecords(str(number_of_records)))
+        if next_record > 1 and next_record < number_of_records:
+            root.append(element.nextRecordPosition(str(next_record)))
+        data = element.records()
+        for record in records:
+            data.append(self.dump_record(record, element))
+        root.append(data)
+        echoed_search_rr = element.echoedSearchRetrieveRequest()
+        if query:
+            echoed_search_rr.append(element.query(query))
+        if query_es:
+            echoed_search_rr.append(element.query_es(query_es))
+        if start_record:
+            echoed_search_rr.append(
+                element.startRecord(str(start_record)))
+        if maximum_records:
+            echoed_search_rr.append(
+                element.maximumRecords(str(maximum_records)))
+        echoed_search_rr.append(element.recordPacking('XML'))
+        echoed_search_rr.append(
+            element.recordSchema(
+                'info:sru/schema/1/marcxml-v1.1-light'))
+        echoed_search_rr.append(element.resultSetTTL('0'))
+        root.append(echoed_search_rr)
+        return root
 
+    def dumps_etree(self, total, records, sru, xslt_filename=None,
+                    prefix=None):
+        """Dump records into a etree."""
+        element = ElementMaker(
+            namespace=self.MARC21_NS,
+            nsmap={prefix: self.MARC21_NS}
+        )
         if isinstance(records, dict):
-            root = dump_record(records)
+            root = self.dump_record(records, element)
         else:
-            number_of_records = total['value']
-            start_record = sru.get('start_record', 0)
-            maximum_records = sru.get('maximum_records', 0)
-            query = sru.get('query')
-            query_es = sru.get('query_es')
-            next_record = start_record + maximum_records
-            root = element.searchRetrieveResponse()
-            root.append(element.version('1.1'))
-            root.append(element.numberOfRecords(str(number_of_records)))
-            if next_record > 1 and next_record < number_of_records:
-                root.append(element.nextRecordPosition(str(next_record)))
-            data = element.records()
-            for record in records:
-                data.append(dump_record(record))
-            root.append(data)
-            echoed_search_rr = element.echoedSearchRetrieveRequest()
-            if query:
-                echoed_search_rr.append(element.query(query))
-            if query_es:
-                echoed_search_rr.append(element.query_es(query_es))
-            if start_record:
-                echoed_search_rr.append(
-                    element.startRecord(str(start_record)))
-            if maximum_records:
-                echoed_search_rr.append(
-                    element.maximumRecords(str(maximum_records)))
-            echoed_search_rr.append(element.recordPacking('XML'))
-            echoed_search_rr.append(
-                element.recordSchema(
-                    'info:sru/schema/1/marcxml-v1.1-light'))
-            echoed_search_rr.append(element.resultSetTTL('0'))
-            root.append(echoed_search_rr)
+            root = self.dumps_search_etree(
+                total=total,
+                records=records,
+                sru=sru,
+                element=element
+            )
 
         # Needed if we use display with XSLT file.
         # if xslt_filename is not None:
@@ -482,6 +506,39 @@ class DocumentMARCXMLSRUSerializer(DocumentMARCXMLSerializer):
             **kwargs
         )
 
+    def dumps_stream(self, total, records, sru):
+        """Dump records into a MarcXMLSRU file, record by record.
+
+        The response envelope is serialized once and split around its
+        empty `records` element, every record is then serialized on its
+        own. The records are built without namespace as they inherit the
+        default namespace of the envelope.
+
+        :param total: the search total (`value` and `relation`).
+        :param records: the MARC21 records intermediate representations.
+        :param sru: the SRU request parameters.
+        :returns: a generator of XML chunks.
+        """
+        root = self.dumps_search_etree(
+            total=total,
+            records=[],
+            sru=sru,
+            element=ElementMaker(
+                namespace=self.MARC21_NS,
+                nsmap={None: self.MARC21_NS}
+            )
+        )
+        head, tail = split_xml_records(root)
+        yield head
+        element = ElementMaker()
+        for record in records:
+            yield etree.tostring(
+                self.dump_record(record, element),
+                pretty_print=True,
+                encoding='UTF-8'
+            )
+        yield tail
+
     def serialize_search(self, pid_fetcher, search_result,
                          item_links_factory=None, **kwargs):
         """Serialize a search result.
@@ -490,7 +547,7 @@ class DocumentMARCXMLSRUSerializer(DocumentMARCXMLSerializer):
         :param search_result: Elasticsearch search result.
         :param item_links_factory: Factory function for the items in result.
             (Default: ``None``)
-        :returns: The objects serialized.
+        :returns: a generator of the serialized objects.
         """
         language = request.args.get('ln', DEFAULT_LANGUAGE)
         with_holdings_items = True
@@ -517,19 +574,17 @@ class DocumentMARCXMLSRUSerializer(DocumentMARCXMLSerializer):
             location_pids=location_pids,
             item_links_factory=item_links_factory
         )
-        return self.dumps(
+        return stream_with_context(self.dumps_stream(
             total=search_result['hits']['total'],
             sru=sru,
-            records=records,
-            **self.dumps_kwargs
-        )
+            records=records
+        ))
 
 
 class DublinCoreSerializer(BaseDublinCoreSerializer):
     """Dublin Core serializer for records.
 
-    Note: This serializer is not suitable for serializing large number of
-    records.
+    Search results are streamed record by record.
     """
 
     from ..utils import get_base_url
@@ -601,9 +656,12 @@ class DublinCoreSerializer(BaseDublinCoreSerializer):
                          item_links_factory=None, **kwargs):
         """Serialize a search result.
 
+        The records are streamed one by one after the response envelope.
+
         :param pid_fetcher: Persistent identifier fetcher.
         :param search_result: Elasticsearch search result.
         :param links: Dictionary of links to add to response.
+        :returns: a generator of the serialized objects.
         """
         total = search_result['hits']['total']['value']
         sru = search_result['hits'].get('sru', {})
@@ -618,27 +676,7 @@ class DublinCoreSerializer(BaseDublinCoreSerializer):
         if sru:
             xml_root.append(element.version('1.1'))
         xml_root.append(element.numberOfRecords(str(total)))
-        xml_records = element.records()
-
-        language = request.args.get('ln', DEFAULT_LANGUAGE)
-        for hit in search_result['hits']['hits']:
-            record = hit['_source']
-            pid = record['pid']
-            record = self.transform_search_hit(
-                pid=pid,
-                record=record,
-                links_factory=item_links_factory,
-                language=language,
-                **kwargs
-            )
-            element_record = simpledc.dump_etree(
-                record,
-                container=self.container_element,
-                nsmap=self.namespace,
-                attribs=self.container_attribs
-            )
-            xml_records.append(element_record)
-        xml_root.append(xml_records)
+        xml_root.append(element.records())
 
         if sru:
             echoed_search_rr = element.echoedSearchRetrieveRequest()
@@ -666,8 +704,33 @@ class DublinCoreSerializer(BaseDublinCoreSerializer):
         #     if next_link:
         #         xml_links.append(element.next(f'{next_link}&format=dc'))
         #     xml_root.append(xml_links)
-        return etree.tostring(xml_root, encoding='utf-8', method='xml',
-                              pretty_print=True)
+        language = request.args.get('ln', DEFAULT_LANGUAGE)
+
+        def generate():
+            """Generate the response record by record."""
+            head, tail = split_xml_records(xml_root)
+            yield head
+            for hit in search_result['hits']['hits']:
+                record = hit['_source']
+                pid = record['pid']
+                record = self.transform_search_hit(
+                    pid=pid,
+                    record=record,
+                    links_factory=item_links_factory,
+                    language=language,
+                    **kwargs
+                )
+                element_record = simpledc.dump_etree(
+                    record,
+                    container=self.container_element,
+                    nsmap=self.namespace,
+                    attribs=self.container_attribs
+                )
+                yield etree.tostring(element_record, encoding='utf-8',
+                                     method='xml', pretty_print=True)
+            yield tail
+
+        return stream_with_context(generate())
 
 
 json_doc = DocumentJSONSerializer(RecordSchemaJSONV1)
@@ -455,8 +455,10 @@ def document_availability(document_pid):
     document = Document.get_record_by_pid(document_pid)
     if not document:
         abort(404)
+    availability = Document.get_availability_by_pids(
+        [document_pid], view_code)
     return jsonify({
-        'availability': Document.is_available(document_pid, view_code)
+        'availability': availability[document_pid]
     })
 
 
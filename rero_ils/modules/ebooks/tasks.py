@@ -19,21 +19,28 @@
 
 from __future__ import absolute_import, print_function
 
+import time
+
 from celery import shared_task
 # from celery.task.control import inspect
 from flask import current_app
+from invenio_db import db
 
-from .utils import create_document_holding, update_document_holding
-from ..documents.api import Document, DocumentsSearch
-from ..utils import do_bulk_index
+from .utils import create_or_update_document_holdings, \
+    get_document_pids_by_harvested_ids, get_harvested_id
+from ..documents.api import Document
 
 
 @shared_task(ignore_result=True)
 def create_records(records):
-    """Records creation and indexing."""
-    n_updated = 0
-    n_created = 0
-    uuids = []
+    """Records creation and indexing.
+
+    The already harvested documents are found with one query, the records
+    are written in one transaction and indexed in bulk.
+    """
+    start_time = time.time()
+    pids = get_document_pids_by_harvested_ids(
+        get_harvested_id(record) for record in records)
     for record in records:
         # add document type
         record['type'] = [{
@@ -41,38 +48,21 @@ def create_records(records):
             'subtype': 'docsubtype_e-book'
         }]
         # check if already harvested
-        pid = None
-        for identifier in record.get('identifiedBy'):
-            if identifier.get('source') == 'cantook':
-                harvested_id = identifier.get('value')
-                query = DocumentsSearch().filter(
-                    'term',
-                    identifiedBy__value=harvested_id
-                ).source(includes=['pid'])
-                try:
-                    pid = next(query.scan()).pid
-                except StopIteration:
-                    pid = None
-
-        try:
-            if pid:
-                # update the record
-                record['pid'] = pid
-                existing_record = update_document_holding(record, pid)
-                n_updated += 1
-                uuids.append(existing_record.id)
-            else:
-                # create a new record
-                new_record = create_document_holding(record)
-                if new_record:
-                    n_created += 1
-                    uuids.append(new_record.id)
-        except Exception as err:
-            current_app.logger.error(f'EBOOKS CREATE RECORDS: {err} {record}')
-    do_bulk_index(uuids, doc_type='doc', process=True)
-
+        pid = pids.get(get_harvested_id(record))
+        if pid:
+            record['pid'] = pid
+    n_created = n_updated = 0
+    try:
+        created, updated = create_or_update_document_holdings(records)
+        n_created, n_updated = len(created), len(updated)
+    except Exception as err:
+        db.session.rollback()
+        current_app.logger.error(f'EBOOKS CREATE RECORDS: {err}')
+    duration = time.time() - start_time
     current_app.logger.info(
-        f'create_records: {n_updated} updated, {n_created} new'
+        f'create_records: {n_updated} updated, {n_created} new '
+        f'in {duration:.2f}s '
+        f'({(n_created + n_updated) / max(duration, 0.001):.2f} records/s)'
     )
     return n_created, n_updated
 
@@ -80,28 +70,9 @@ def create_records(records):
 @shared_task(ignore_result=True)
 def delete_records(records):
     """Records deleting."""
-    count = 0
-    for record in records:
-        # check if exist
-        pid = None
-        for identifier in record.get('identifiedBy'):
-            if identifier.get('source') == 'cantook':
-                harvested_id = identifier.get('value')
-                query = DocumentsSearch().filter(
-                    'term',
-                    identifiedBy__value=harvested_id
-                ).source(includes=['pid'])
-                try:
-                    pid = [r.pid for r in query.scan()].pop()
-                except IndexError:
-                    pid = None
-        try:
-            if pid:
-                # update the record
-                existing_record = Document.get_record_by_pid(pid)
-                # TODO: delete record and linked references
-                count += 1
-        except Exception as err:
-            current_app.logger.error(f'EBOOKS DELETE RECORDS: {err} {record}')
+    pids = get_document_pids_by_harvested_ids(
+        get_harvested_id(record) for record in records)
+    # TODO: delete record and linked references
+    count = len(Document.get_records_by_pids(pids.values()))
     current_app.logger.info(f'delete_records: {count}')
     return count
@@ -21,9 +21,8 @@ from flask import current_app
 from invenio_db import db
 from invenio_oaiharvester.models import OAIHarvestConfig
 
-from ..documents.api import Document
-from ..holdings.api import Holding, create_holding, \
-    get_holding_pid_by_doc_location_item_type
+from ..documents.api import Document, DocumentsSearch
+from ..holdings.api import Holding, HoldingsSearch, create_holding
 from ..organisations.api import Organisation
 
 
@@ -75,76 +74,159 @@ def get_harvested_sources(record):
     return harvested_sources
 
 
-def create_document_holding(record):
-    """Create a document and a holding for a harvested ebook."""
-    harvested_sources = get_harvested_sources(record)
-    new_record = None
-    doc_created = False
-    for harvested_source in harvested_sources:
-        org = Organisation.get_record_by_online_harvested_source(
-            source=harvested_source['source'])
-        if org:
-            if not doc_created:
-                new_record = Document.create(
-                    record,
-                    dbcommit=True,
-                    reindex=True
+def get_harvested_id(record):
+    """Get the harvested identifier of a record.
+
+    :param record: the harvested record.
+    :return: the cantook identifier or None.
+    """
+    for identifier in record.get('identifiedBy', []):
+        if identifier.get('source') == 'cantook':
+            return identifier.get('value')
+
+
+def get_document_pids_by_harvested_ids(harvested_ids):
+    """Get the pids of the harvested documents with one query.
+
+    :param harvested_ids: the cantook identifiers of the records.
+    :return: a dict with the document pid by harvested identifier.
+    """
+    harvested_ids = {
+        harvested_id for harvested_id in harvested_ids if harvested_id}
+    pids = {}
+    if not harvested_ids:
+        return pids
+    query = DocumentsSearch()\
+        .filter('terms', identifiedBy__value=list(harvested_ids))\
+        .source(['pid', 'identifiedBy'])
+    for hit in query.scan():
+        for identifier in hit.to_dict().get('identifiedBy', []):
+            if identifier.get('value') in harvested_ids:
+                pids.setdefault(identifier['value'], hit.pid)
+    return pids
+
+
+def get_electronic_holdings(document_pids):
+    """Get the electronic holdings of documents with one query.
+
+    :param document_pids: the document pids.
+    :return: a dict with the list of holdings metadata by document pid.
+    """
+    holdings = {}
+    if not document_pids:
+        return holdings
+    query = HoldingsSearch()\
+        .filter('terms', document__pid=list(document_pids))\
+        .filter('term', holdings_type='electronic')\
+        .source(['pid', 'document', 'location', 'circulation_category',
+                 'electronic_location'])
+    for hit in query.scan():
+        hit = hit.to_dict()
+        holdings.setdefault(hit['document']['pid'], []).append(hit)
+    return holdings
+
+
+def create_or_update_document_holdings(records):
+    """Create or update the documents and holdings of harvested ebooks.
+
+    The records with a pid update the existing documents. A new document is
+    created only if an organisation harvests one of its sources. The
+    documents and the holdings are written in one transaction, then
+    indexed in bulk: the holdings first as the indexed documents are
+    enriched with them.
+
+    :param records: list of harvested records.
+    :return: a tuple with the created and the updated documents.
+    """
+    online_sources = {}
+
+    def get_online_source(source):
+        """Get the item type and locations of a harvested source."""
+        if source not in online_sources:
+            online_sources[source] = None
+            org = Organisation.get_record_by_online_harvested_source(
+                source=source)
+            if org:
+                online_sources[source] = (
+                    org.online_circulation_category(),
+                    org.get_online_locations()
                 )
-            if new_record:
-                doc_created = True
-                item_type_pid = org.online_circulation_category()
-                locations = org.get_online_locations()
-                for location in locations:
-
-                    create_holding(
-                        document_pid=new_record.pid,
-                        location_pid=location,
-                        item_type_pid=item_type_pid,
-                        electronic_location=harvested_source,
-                        holdings_type='electronic')
-        else:
-            current_app.logger.warning(
-                f"create document holding no org: {harvested_source['source']}"
-            )
-    return new_record
-
-
-def update_document_holding(record, pid):
-    """Update a document and a holding for a harvested ebook."""
-    harvested_sources = get_harvested_sources(record)
-    new_record = None
-    existing_record = Document.get_record_by_pid(pid)
-    new_record = existing_record.replace(
-        record,
-        dbcommit=True,
-        reindex=True
-    )
-    for harvested_source in harvested_sources:
-        org = Organisation.get_record_by_online_harvested_source(
-            source=harvested_source['source'])
-        if org:
-            item_type_pid = org.online_circulation_category()
-            locations = org.get_online_locations()
-            for location_pid in locations:
-                if not get_holding_pid_by_doc_location_item_type(
-                    new_record.pid, location_pid, item_type_pid, 'electronic'
-                ):
-                    create_holding(
-                        document_pid=new_record.pid,
-                        location_pid=location_pid,
-                        item_type_pid=item_type_pid,
-                        electronic_location=harvested_source,
-                        holdings_type='electronic'
-                    )
-
-    source_uris = [harvested_source.get('uri')
-                   for harvested_source in harvested_sources
-                   if 'source' in harvested_source]
-
-    for holding_pid in Holding.get_holdings_pid_by_document_pid(pid):
-        holding = Holding.get_record_by_pid(holding_pid)
-        for electronic_location in holding.get('electronic_location', []):
-            if electronic_location.get('source') and \
-                    electronic_location.get('uri') not in source_uris:
-                holding.delete(force=False, dbcommit=True, delindex=True)
-    return new_record
+            else:
+                current_app.logger.warning(
+                    f'create document holding no org: {source}')
+        return online_sources[source]
+
+    harvested_sources = []
+    documents_data = []
+    for record in records:
+        sources = get_harvested_sources(record)
+        if record.get('pid') or any(
+                [get_online_source(source['source']) for source in sources]):
+            harvested_sources.append(sources)
+            documents_data.append(record)
+    created, updated, _ = Document.create_or_update_many(
+        documents_data, dbcommit=False)
+    written_pids = {document.pid for document in created + updated}
+    existing_holdings = get_electronic_holdings(
+        [document.pid for document in updated])
+
+    new_holdings = []
+    holding_pids_to_delete = []
+    for record, sources in zip(documents_data, harvested_sources):
+        document_pid = record.get('pid')
+        if document_pid not in written_pids:
+            continue
+        holdings = existing_holdings.get(document_pid, [])
+        keys = {
+            (holding['location']['pid'],
+             holding['circulation_category']['pid'])
+            for holding in holdings
+        }
+        for source in sources:
+            online_source = get_online_source(source['source'])
+            if not online_source:
+                continue
+            item_type_pid, location_pids = online_source
+            for location_pid in location_pids:
+                if (location_pid, item_type_pid) in keys:
+                    continue
+                keys.add((location_pid, item_type_pid))
+                try:
+                    with db.session.begin_nested():
+                        new_holdings.append(create_holding(
+                            document_pid=document_pid,
+                            location_pid=location_pid,
+                            item_type_pid=item_type_pid,
+                            electronic_location=source,
+                            holdings_type='electronic',
+                            dbcommit=False,
+                            reindex=False
+                        ))
+                except Exception as err:
+                    current_app.logger.error(
+                        f'EBOOKS CREATE HOLDING: {err} {document_pid}')
+        source_uris = [source.get('uri') for source in sources]
+        for holding in holdings:
+            for electronic_location in holding.get('electronic_location', []):
+                if electronic_location.get('source') and \
+                        electronic_location.get('uri') not in source_uris:
+                    holding_pids_to_delete.append(holding['pid'])
+                    break
+
+    deleted_holdings = []
+    for holding in Holding.get_records_by_pids(holding_pids_to_delete):
+        try:
+            with db.session.begin_nested():
+                holding.delete(force=False, dbcommit=False, delindex=False)
+            deleted_holdings.append(holding)
+        except Exception as err:
+            current_app.logger.error(
+                f'EBOOKS DELETE HOLDING: {err} {holding.pid}')
+    db.session.commit()
+
+    for holding in deleted_holdings:
+        holding.delete_from_index()
+    Holding.bulk_reindex(new_holdings)
+    HoldingsSearch.flush_and_refresh()
+    Document.bulk_reindex(created + updated)
+    return created, updated
@@ -25,15 +25,18 @@ from flask_bootstrap import Bootstrap
 from flask_login.signals import user_loaded_from_cookie, user_logged_in
 from flask_wiki import Wiki
 from invenio_circulation.signals import loan_state_changed
+from invenio_db import db
 from invenio_indexer.signals import before_record_index
 from invenio_oaiharvester.signals import oaiharvest_finished
-from invenio_records.signals import after_record_insert, after_record_update, \
-    before_record_update
+from invenio_records.signals import after_record_delete, after_record_insert, \
+    after_record_revert, after_record_update, before_record_update
 from invenio_records_rest.errors import JSONSchemaValidationError
 from invenio_userprofiles.signals import after_profile_update
 from jsonschema.exceptions import ValidationError
+from sqlalchemy import event
 
 from .apiharvester.signals import apiharvest_part
+from .circ_policies.listener import invalidate_circ_policies_table
 from .collections.listener import enrich_collection_data
 from .contributions.listener import enrich_contributions_data
 from .contributions.receivers import publish_api_harvested_records
@@ -43,21 +46,27 @@ from .holdings.listener import enrich_holding_data
 from .ill_requests.listener import enrich_ill_request_data
 from .imports.views import ImportsListResource, ImportsResource, \
     ResultNotFoundOnTheRemoteServer
+from .indexer_utils import refresh_deferred_indices
 from .item_types.listener import negative_availability_changes
 from .items.listener import enrich_item_data
 from .loans.listener import enrich_loan_data, listener_loan_state_changed
 from .locations.listener import enrich_location_data
 from .normalizer_stop_words import NormalizerStopWords
 from .notifications.listener import enrich_notification_data
+from .operation_logs.writer import close_operation_logs_buffer
 from .patron_transaction_events.listener import \
     enrich_patron_transaction_event_data
 from .patron_transactions.listener import enrich_patron_transaction_data
 from .patrons.listener import create_subscription_patron_transaction, \
     enrich_patron_data, update_from_profile
+from .record_identity_map import close_record_identity_map, \
+    invalidate_record_identity_map
+from .reference_labels import remove_reference_label, update_reference_label, \
+    warm_reference_labels
 from .sru.views import SRUDocumentsSearch
 from .templates.listener import prepare_template_data
 from .users.views import UsersCreateResource, UsersResource
-from .utils import set_user_name
+from .utils import clear_known_pids, set_user_name
 from ..filter import empty_data, format_date_filter, get_record_by_ref, \
     jsondumps, node_assets, text_to_id, to_pretty_json
 from ..version import __version__
@@ -102,6 +111,18 @@ class REROILSAPP(object):
         self.register_import_api_blueprint(app)
         self.register_users_api_blueprint(app)
         self.register_sru_api_blueprint(app)
+        # refresh the indices touched in deferred mode
+        app.teardown_appcontext(refresh_deferred_indices)
+        # close the record identity map of the request or task
+        app.teardown_request(close_record_identity_map)
+        app.teardown_appcontext(close_record_identity_map)
+        # index the buffered operation logs of the request or task
+        app.teardown_request(close_operation_logs_buffer)
+        app.teardown_appcontext(close_operation_logs_buffer)
+        # load the cached reference records (organisations view codes)
+        app.before_first_request(warm_reference_labels)
+        # the minted pids are not known anymore after a rollback
+        event.listen(db.session, 'after_rollback', clear_known_pids)
         # import logging
         # logging.getLogger('sqlalchemy.engine').setLevel(logging.INFO)
 
@@ -209,6 +230,18 @@ class REROILSAPP(object):
 
         before_record_update.connect(negative_availability_changes)
 
+        after_record_insert.connect(invalidate_circ_policies_table)
+        after_record_update.connect(invalidate_circ_policies_table)
+        after_record_delete.connect(invalidate_circ_policies_table)
+
+        after_record_insert.connect(update_reference_label)
+        after_record_update.connect(update_reference_label)
+        after_record_delete.connect(remove_reference_label)
+
+        after_record_update.connect(invalidate_record_identity_map)
+        after_record_delete.connect(invalidate_record_identity_map)
+        after_record_revert.connect(invalidate_record_identity_map)
+
         loan_state_changed.connect(listener_loan_state_changed, weak=False)
 
         oaiharvest_finished.connect(publish_harvested_records, weak=False)
@@ -20,9 +20,8 @@
 from __future__ import absolute_import, print_function
 
 from builtins import classmethod
-from copy import deepcopy
 from datetime import datetime, timezone
-from functools import partial
+from functools import lru_cache, partial
 
 from dateutil.relativedelta import relativedelta
 from elasticsearch_dsl import Q
@@ -35,7 +34,7 @@ from rero_ils.modules.items.models import ItemIssueStatus
 
 from .models import HoldingIdentifier, HoldingMetadata, HoldingTypes
 from ..api import IlsRecord, IlsRecordError, IlsRecordsIndexer
-from ..documents.api import Document
+from ..documents.api import Document, DocumentsIndexer
 from ..errors import MissingRequiredParameterError, RegularReceiveNotAllowed
 from ..fetchers import id_fetcher
 from ..items.api import Item, ItemsSearch
@@ -46,7 +45,7 @@ from ..organisations.api import Organisation
 from ..providers import Provider
 from ..record_extensions import OrgLibRecordExtension
 from ..utils import extracted_data_from_ref, get_ref_for_pid, \
-    get_schema_for_resource, sorted_pids
+    get_schema_for_resource
 from ..vendors.api import Vendor
 from ...filter import format_date_filter
 
@@ -66,6 +65,16 @@ JINJA_ENV = Environment()
 JINJA_ENV.filters['format_date_filter'] = format_date_filter
 
 
+@lru_cache(maxsize=1024)
+def get_pattern_template(template):
+    """Get the compiled template of holdings patterns.
+
+    :param template: the template text of the patterns.
+    :return: the compiled jinja template.
+    """
+    return JINJA_ENV.from_string(template)
+
+
 class HoldingsSearch(RecordsSearch):
     """RecordsSearch for holdings."""
 
@@ -372,40 +381,42 @@ class Holding(IlsRecord):
                         item['call_number'] = issue_call_number
                     yield item
 
-    def get_links_to_me(self, get_pids=False):
-        """Record links.
+    @classmethod
+    def get_links_queries(cls, pid):
+        """Get the queries of the records linked to a record.
 
-        :param get_pids: if True list of linked pids
-                         if False count of linked records
+        :param pid: the record pid.
+        :return: a dict with, by link name, the search of the linked records.
         """
-        links = {}
-        query = ItemsSearch().filter('term', holding__pid=self.pid)
-        if get_pids:
-            items = sorted_pids(query)
-        else:
-            items = query.count()
-        # get number of attached items
-        if items:
-            links['items'] = items
-        return links
-
-    def reasons_not_to_delete(self):
-        """Get reasons not to delete record."""
+        return {
+            'items': ItemsSearch().filter('term', holding__pid=pid)
+        }
+
+    def reasons_not_to_delete(self, links=None):
+        """Get reasons not to delete record.
+
+        :param links: the count of linked records by link name, computed if
+            not given.
+        """
+        if not self.is_serial:
+            return super().reasons_not_to_delete(links=links)
         cannot_delete = {}
-        if self.is_serial:
-            # Find out if we can delete all items
-            not_deleteable_items = [
-                item for item in self.get_items if item.reasons_not_to_delete()
-            ]
-            if not_deleteable_items:
-                count = len(not_deleteable_items)
-                cannot_delete['others'] = {
-                    _('has {count} items with loan attached'.format(
-                        count=count)): count}
-        else:
-            links = self.get_links_to_me()
-            if links:
-                cannot_delete['links'] = links
+        # Find out if we can delete all standard items and received issues
+        query = ItemsSearch() \
+            .filter('term', holding__pid=self.pid) \
+            .filter('bool', should=[
+                Q('bool', must_not=[Q('exists', field='issue.status')]),
+                Q('term', issue__status=ItemIssueStatus.RECEIVED)
+            ])
+        item_pids = [hit.pid for hit in query.source('pid').scan()]
+        count = len([
+            pid for pid, (can, _) in Item.can_delete_many(item_pids).items()
+            if not can
+        ])
+        if count:
+            cannot_delete['others'] = {
+                _('has {count} items with loan attached'.format(
+                    count=count)): count}
         return cannot_delete
 
     def get_holding_loan_conditions(self):
@@ -452,37 +463,79 @@ class Holding(IlsRecord):
         :param patterns: List of a valid holdings patterns.
         :return: A display text of the next predicted issue.
         """
-        issue_data = {}
+        return cls.predict_issues(patterns)[0]
+
+    @classmethod
+    def predict_issues(cls, patterns, predictions=1):
+        """Predict the next issues of the given patterns.
+
+        The issues are predicted in one pass, the levels values and the
+        expected date are incremented locally with the same rules as
+        `_increment_next_prediction`. The given patterns are not modified.
+
+        :param patterns: A valid holdings patterns.
+        :param predictions: Number of the next issues to predict.
+        :return: A list of tuples with the display text and the expected
+                 date of each issue.
+        """
+        # the levels of each pattern as lists of
+        # [name, mapping, starting value, max value, next value]
+        pattern_levels = []
         for pattern in patterns.get('values', []):
-            pattern_name = pattern.get('name', '')
-            level_data = {}
+            levels = []
             for level in pattern.get('levels', []):
-                text_value = level.get('next_value', level.get(
-                    'starting_value', 1))
+                starting_value = level.get('starting_value', 1)
                 mapping = level.get('mapping_values')
-                if mapping:
-                    text_value = mapping[text_value - 1]
-                level_data.update({
-                    level.get(
-                        'number_name', level.get('list_name')
-                    ): str(text_value)
-                })
-            issue_data[pattern_name] = level_data
+                levels.append([
+                    level.get('number_name', level.get('list_name')),
+                    mapping,
+                    starting_value,
+                    len(mapping) if mapping else level.get('completion_value'),
+                    level.get('next_value', starting_value)
+                ])
+            pattern_levels.append((pattern.get('name', ''), levels))
 
         # TODO: inform the PO about the use of filter format_date_filter
         # for additional manipulation of the expected date
-        tmpl = JINJA_ENV.from_string(patterns.get('template'))
-
+        tmpl = get_pattern_template(patterns.get('template'))
+        frequency = patterns.get('frequency')
+        interval = cls.frequencies[frequency] if frequency else None
         next_expected_date = patterns.get('next_expected_date')
-        # send the expected date info with the issue data
         expected_date = datetime.strptime(next_expected_date, '%Y-%m-%d')
-        issue_data['next_expected_date'] = next_expected_date
-        issue_data['expected_date'] = {
-                    'day': expected_date.day,
-                    'month': expected_date.month,
-                    'year': expected_date.year
+        issues = []
+        for number in range(predictions):
+            issue_data = {
+                pattern_name: {
+                    name: str(mapping[value - 1] if mapping else value)
+                    for name, mapping, starting_value, max_value, value
+                    in levels
                 }
-        return tmpl.render(**issue_data), next_expected_date
+                for pattern_name, levels in pattern_levels
+            }
+            # send the expected date info with the issue data
+            issue_data['next_expected_date'] = next_expected_date
+            issue_data['expected_date'] = {
+                'day': expected_date.day,
+                'month': expected_date.month,
+                'year': expected_date.year
+            }
+            issues.append((tmpl.render(**issue_data), next_expected_date))
+
+            # increment the levels values and the expected date
+            for pattern_name, levels in pattern_levels:
+                for level in reversed(levels):
+                    name, mapping, starting_value, max_value, value = level
+                    if max_value == value:
+                        level[4] = starting_value
+                    else:
+                        level[4] = value + 1
+                        break
+            if interval:
+                # the expected dates are days, the time is dropped
+                expected_date = (expected_date + interval).replace(
+                    hour=0, minute=0, second=0, microsecond=0)
+                next_expected_date = expected_date.strftime('%Y-%m-%d')
+        return issues
 
     def increment_next_prediction(self):
         """Increment next prediction."""
@@ -529,16 +582,8 @@ class Holding(IlsRecord):
         :param predictions: Number of the next issues to predict.
         :return: An array of issues display text.
         """
-        text = []
-        if self.patterns and self.patterns.get('values'):
-            patterns = deepcopy(self.patterns)
-            for r in range(predictions):
-                issue, expected_date = self._get_next_issue_display_text(
-                    patterns)
-                issue_data = self._prepare_issue_data(issue, expected_date)
-                text.append(issue_data)
-                patterns = self._increment_next_prediction(patterns)
-        return text
+        return self.prediction_issues_preview_for_pattern(
+            self.patterns, predictions)
 
     @classmethod
     def prediction_issues_preview_for_pattern(
@@ -549,15 +594,13 @@ class Holding(IlsRecord):
         :param patterns: The patterns to predict.
         :return: An array of issues display text.
         """
-        text = []
-        if patterns and patterns.get('values'):
-            for r in range(number_of_predictions):
-                issue, expected_date = cls._get_next_issue_display_text(
-                    patterns)
-                issue_data = cls._prepare_issue_data(issue, expected_date)
-                text.append(issue_data)
-                patterns = Holding._increment_next_prediction(patterns)
-        return text
+        if not patterns or not patterns.get('values'):
+            return []
+        return [
+            cls._prepare_issue_data(issue, expected_date)
+            for issue, expected_date
+            in cls.predict_issues(patterns, number_of_predictions)
+        ]
 
     @staticmethod
     def _prepare_issue_data(issue, expected_date):
@@ -662,7 +705,7 @@ def create_holding(
         acquisition_status=None, acquisition_expected_end_date=None,
         acquisition_method=None, general_retention_policy=None,
         completeness=None, composite_copy_report=None, issue_binding=None,
-        masked=False):
+        masked=False, dbcommit=True, reindex=True):
     """Create a new holdings record from a given list of fields.
 
     :param document_pid: the document pid.
@@ -687,6 +730,8 @@ def create_holding(
     :param composite_copy_report: composite_copy_report.
     :param issue_binding: issue_binding.
     :param masked: holdings masking.
+    :param dbcommit: if True commit the database.
+    :param reindex: if True index the created holdings record.
     :return: the created holdings record.
     """
     if not (document_pid and location_pid and item_type_pid):
@@ -731,8 +776,8 @@ def create_holding(
         data['patterns'] = patterns
     return Holding.create(
         data,
-        dbcommit=True,
-        reindex=True,
+        dbcommit=dbcommit,
+        reindex=reindex,
         delete_pid=True
     )
 
@@ -745,11 +790,10 @@ class HoldingsIndexer(IlsRecordsIndexer):
     def index(self, record):
         """Indexing a holding record.
 
-        Parent document is indexed as well.
+        The holding part of the parent indexed document is updated as well.
         """
         return_value = super().index(record)
-        document = Document.get_record_by_pid(record.document_pid)
-        document.reindex()
+        DocumentsIndexer.update_holding(record)
         return return_value
 
     def delete(self, record):
@@ -762,9 +806,8 @@ class HoldingsIndexer(IlsRecordsIndexer):
             query = ItemsSearch().filter('term', holding__pid=record.pid)
             query.delete()
             ItemsSearch.flush_and_refresh()
-        document = Document.get_record_by_pid(record.document_pid)
         return_value = super().delete(record)
-        document.reindex()
+        DocumentsIndexer.delete_holding(record.document_pid, record.pid)
         return return_value
 
     def bulk_index(self, record_id_iterator):
@@ -17,11 +17,32 @@
 
 """Utility functions for indexer data processing."""
 
+import json
 import re
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
 
-from flask import current_app
-from invenio_indexer.utils import schema_to_index
-from invenio_search import current_search
+from elasticsearch import VERSION as ES_VERSION
+from elasticsearch.helpers import bulk
+from elasticsearch.helpers import expand_action as default_expand_action
+from flask import current_app, g
+from invenio_db import db
+from invenio_indexer.utils import _es7_expand_action, schema_to_index
+from invenio_pidstore.models import PersistentIdentifier, PIDStatus
+from invenio_search import current_search, current_search_client
+from invenio_search.utils import build_alias_name
+from redis import Redis
+from sqlalchemy import func
+
+
+class IndexerRefresh:
+    """Enum class to list all possible indexer refresh modes."""
+
+    TRUE = 'true'
+    WAIT_FOR = 'wait_for'
+    DEFERRED = 'deferred'
 
 
 def record_to_index(record):
@@ -49,3 +70,481 @@ def record_to_index(record):
     else:
         return (current_app.config['INDEXER_DEFAULT_INDEX'],
                 current_app.config['INDEXER_DEFAULT_DOC_TYPE'])
+
+
+def get_indexer_refresh(pid_type=None):
+    """Get the refresh mode to use to index a record.
+
+    The mode set for the current request or task with `indexer_refresh` has
+    the priority over the mode configured for the record type and over the
+    default one.
+
+    :param pid_type: the pid type of the indexed record.
+    :return: a refresh mode (see ``IndexerRefresh``).
+    """
+    mode = g.get('indexer_refresh')
+    if mode:
+        return mode
+    config = current_app.config
+    return config.get('RERO_ILS_INDEXER_REFRESH_BY_PID_TYPE', {}).get(
+        pid_type, config.get('RERO_ILS_INDEXER_REFRESH', IndexerRefresh.TRUE))
+
+
+@contextmanager
+def indexer_refresh(mode):
+    """Set the refresh mode for all records indexed within the context.
+
+    :param mode: a refresh mode (see ``IndexerRefresh``).
+    """
+    previous_mode = g.get('indexer_refresh')
+    g.indexer_refresh = mode
+    try:
+        yield
+    finally:
+        g.indexer_refresh = previous_mode
+
+
+def with_indexer_refresh(mode):
+    """Decorator to set the refresh mode for a view or a task.
+
+    Circulation views use it to keep read-your-writes when a deferred mode
+    is configured.
+
+    :param mode: a refresh mode (see ``IndexerRefresh``).
+    """
+    def decorator(func):
+        @wraps(func)
+        def decorated_view(*args, **kwargs):
+            with indexer_refresh(mode):
+                return func(*args, **kwargs)
+        return decorated_view
+    return decorator
+
+
+def get_refresh_argument(index, pid_type=None):
+    """Get the elasticsearch refresh argument for an index operation.
+
+    In deferred mode the index is registered to be refreshed once at the end
+    of the current request or task (see `refresh_deferred_indices`).
+
+    :param index: the elasticsearch index name.
+    :param pid_type: the pid type of the indexed record.
+    :return: the value of the refresh argument of the elasticsearch client.
+    """
+    mode = get_indexer_refresh(pid_type)
+    if mode == IndexerRefresh.DEFERRED:
+        g.setdefault('indexer_deferred_indices', set()).add(
+            build_alias_name(index))
+        return 'false'
+    return mode
+
+
+def refresh_deferred_indices(exception=None):
+    """Refresh once every index touched in deferred mode.
+
+    It is called at the teardown of the application context, i.e. at the end
+    of each request and celery task.
+
+    :param exception: the teardown exception if any.
+    """
+    indices = g.pop('indexer_deferred_indices', None)
+    if indices:
+        try:
+            current_search_client.indices.refresh(
+                index=','.join(sorted(indices)))
+        except Exception as error:
+            current_app.logger.error(
+                f'Can not refresh deferred indices {indices}: {error}')
+
+
+class ReindexQueue:
+    """Deduplicating queue of parent records to reindex.
+
+    When an item changes, its holding and its document have to be reindexed.
+    With the queue enabled (`RERO_ILS_REINDEX_QUEUE`), these parents are
+    stored by pid type and pid into a redis set instead of being reindexed
+    synchronously. A debounced celery task flushes the queue and reindexes
+    each queued parent only once.
+    """
+
+    key = 'reindex_queue'
+    flush_key = 'reindex_queue:flush'
+    metrics_key = 'reindex_queue:metrics'
+
+    @classmethod
+    def enabled(cls):
+        """Is the reindex queue enabled."""
+        return current_app.config.get('RERO_ILS_REINDEX_QUEUE', False)
+
+    @classmethod
+    def redis(cls):
+        """Get the redis connection of the queue."""
+        return Redis.from_url(
+            current_app.config.get('RERO_ILS_REINDEX_QUEUE_URL'))
+
+    @classmethod
+    def add(cls, pid_type, pid):
+        """Queue a record to reindex.
+
+        The first queued record schedules a flush of the queue after
+        `RERO_ILS_REINDEX_QUEUE_COUNTDOWN` seconds.
+
+        :param pid_type: the record pid type.
+        :param pid: the record pid.
+        :return: False if the record was already queued.
+        """
+        from .tasks import flush_reindex_queue
+        redis = cls.redis()
+        added = redis.sadd(cls.key, f'{pid_type}:{pid}')
+        redis.hincrby(cls.metrics_key, 'queued')
+        if not added:
+            redis.hincrby(cls.metrics_key, 'coalesced')
+        countdown = current_app.config.get(
+            'RERO_ILS_REINDEX_QUEUE_COUNTDOWN', 10)
+        if redis.set(cls.flush_key, 1, nx=True, ex=countdown + 60):
+            flush_reindex_queue.apply_async(countdown=countdown)
+        return bool(added)
+
+    @classmethod
+    def flush(cls, batch_size=1000):
+        """Reindex once each queued record.
+
+        :param batch_size: number of records taken from the queue at once.
+        :return: the number of reindexed records.
+        """
+        from .utils import get_record_class_from_schema_or_pid_type
+        redis = cls.redis()
+        # records queued from now will schedule a new flush
+        redis.delete(cls.flush_key)
+        order = current_app.config.get('RERO_ILS_REINDEX_QUEUE_ORDER', [])
+        count = 0
+        while True:
+            values = redis.spop(cls.key, batch_size)
+            if not values:
+                break
+            entries = sorted(
+                value.decode().split(':', 1) for value in values)
+            entries.sort(key=lambda entry: order.index(entry[0])
+                         if entry[0] in order else len(order))
+            for pid_type, pid in entries:
+                record_class = get_record_class_from_schema_or_pid_type(
+                    pid_type=pid_type)
+                record = record_class.get_record_by_pid(pid)
+                if record:
+                    record.reindex()
+                    count += 1
+        redis.hincrby(cls.metrics_key, 'reindexed', count)
+        return count
+
+    @classmethod
+    def metrics(cls):
+        """Get the queue metrics.
+
+        :return: a dict with the number of queued records, of coalesced
+                 records (already queued), of reindexed records and the
+                 current size of the queue.
+        """
+        redis = cls.redis()
+        metrics = {
+            key.decode(): int(value)
+            for key, value in redis.hgetall(cls.metrics_key).items()
+        }
+        data = {
+            key: metrics.get(key, 0)
+            for key in ['queued', 'coalesced', 'reindexed']
+        }
+        data['size'] = redis.scard(cls.key)
+        return data
+
+
+class PartitionedReindex:
+    """Reindex of records split into partitions.
+
+    The records of each pid type are split into partitions of consecutive
+    record uuids. Each partition is indexed with a single elasticsearch bulk
+    stream, in the current process or by a celery task
+    (`tasks.index_partition`). The plan of a run (its partitions) and the
+    statistics of the completed partitions are stored into redis
+    (`RERO_ILS_PARTITIONED_REINDEX_URL`), so an interrupted run can be
+    resumed. The records can be indexed into fresh indices, the aliases are
+    then switched to them once all the partitions are completed. The records
+    written during the run still go to the previous indices: they are
+    indexed again into the fresh indices by `catch_up` before the switch.
+    """
+
+    key_prefix = 'partitioned_reindex'
+
+    def __init__(self, run):
+        """Initialize the reindex run.
+
+        :param run: the run name.
+        """
+        self.run = run
+        self.key = f'{self.key_prefix}:{run}'
+
+    @classmethod
+    def redis(cls):
+        """Get the redis connection of the checkpoints."""
+        return Redis.from_url(
+            current_app.config.get('RERO_ILS_PARTITIONED_REINDEX_URL'))
+
+    @property
+    def plan(self):
+        """Get the plan of the run, `None` if not created."""
+        plan = self.redis().get(f'{self.key}:plan')
+        if plan:
+            return json.loads(plan)
+
+    @property
+    def stats(self):
+        """Get the statistics of the completed partitions by partition id."""
+        return {
+            key.decode(): json.loads(value)
+            for key, value in self.redis().hgetall(f'{self.key}:done').items()
+        }
+
+    @property
+    def failed(self):
+        """Get the errors of the failed partitions by partition id."""
+        return {
+            key.decode(): value.decode()
+            for key, value
+            in self.redis().hgetall(f'{self.key}:failed').items()
+        }
+
+    def pending(self):
+        """Get the partitions not yet completed.
+
+        :return: a list of partitions.
+        """
+        done = self.stats
+        return [
+            partition for partition in self.plan['partitions']
+            if partition['id'] not in done
+        ]
+
+    @classmethod
+    def get_query(cls, pid_type):
+        """Get the query of the record uuids of a pid type."""
+        return PersistentIdentifier.query\
+            .filter_by(object_type='rec', status=PIDStatus.REGISTERED)\
+            .filter_by(pid_type=pid_type)\
+            .with_entities(PersistentIdentifier.object_uuid)
+
+    @classmethod
+    def get_partitions(cls, pid_type, size):
+        """Split the records of a pid type into uuid ranges.
+
+        :param pid_type: the pid type.
+        :param size: the number of records of a partition.
+        :return: a list of (start, end) uuid tuples; start is included, end
+                 is excluded (`None` for the last partition).
+        """
+        uuids = cls.get_query(pid_type)\
+            .add_columns(func.row_number().over(
+                order_by=PersistentIdentifier.object_uuid).label('row'))\
+            .subquery()
+        starts = [
+            str(row[0]) for row in db.session.query(uuids.c.object_uuid)
+            .filter((uuids.c.row - 1) % size == 0)
+            .order_by(uuids.c.object_uuid)
+        ]
+        return list(zip(starts, starts[1:] + [None]))
+
+    def create_plan(self, pid_types, size=10000, new_index=False):
+        """Create the plan of the run.
+
+        :param pid_types: the pid types to reindex.
+        :param size: the number of records of a partition.
+        :param new_index: if True, index the records into fresh indices.
+        :return: the plan.
+        """
+        plan = {
+            'partitions': [],
+            'indices': {},
+            'started': datetime.utcnow().isoformat()
+        }
+        for pid_type in pid_types:
+            index = None
+            if new_index:
+                index = self.create_index(pid_type)
+                plan['indices'][pid_type] = index
+            for idx, (start, end) in enumerate(
+                    self.get_partitions(pid_type, size)):
+                plan['partitions'].append({
+                    'id': f'{pid_type}-{idx}',
+                    'pid_type': pid_type,
+                    'start': start,
+                    'end': end,
+                    'index': index
+                })
+        self.redis().set(f'{self.key}:plan', json.dumps(plan))
+        return plan
+
+    def create_index(self, pid_type):
+        """Create a fresh index for a pid type.
+
+        The refresh of the index is disabled until the aliases switch.
+
+        :param pid_type: the pid type.
+        :return: the index name.
+        """
+        endpoints = current_app.config.get('RECORDS_REST_ENDPOINTS')
+        alias = endpoints[pid_type]['search_index']
+        name, mapping = list(current_search.aliases[alias].items())[0]
+        index = build_alias_name(f'{name}-{self.run}')
+        with open(mapping) as mapping_file:
+            body = json.load(mapping_file)
+        current_search_client.indices.create(index=index, body=body)
+        current_search_client.indices.put_settings(
+            index=index, body={'index': {'refresh_interval': -1}})
+        return index
+
+    def index_partition(self, partition_id):
+        """Index the records of a partition.
+
+        A partition failing with an exception is stored as failed with its
+        error, it is indexed again when the run is resumed.
+
+        :param partition_id: the partition id.
+        :return: the partition statistics.
+        """
+        from .utils import get_record_class_from_schema_or_pid_type
+        self.redis().hdel(f'{self.key}:failed', partition_id)
+        partition = next(
+            partition for partition in self.plan['partitions']
+            if partition['id'] == partition_id)
+        pid_type = partition['pid_type']
+        indexer = get_record_class_from_schema_or_pid_type(
+            pid_type=pid_type).get_indexer_class()()
+        query = self.get_query(pid_type)\
+            .filter(PersistentIdentifier.object_uuid >= partition['start'])
+        if partition['end']:
+            query = query.filter(
+                PersistentIdentifier.object_uuid < partition['end'])
+        stats = {'count': 0, 'errors': 0}
+
+        def actions():
+            """Get the bulk index actions of the partition."""
+            for uuid, in query.order_by(PersistentIdentifier.object_uuid):
+                stats['count'] += 1
+                try:
+                    yield indexer._index_action(payload={
+                        'id': str(uuid),
+                        'index': partition['index'],
+                        'doc_type': pid_type
+                    })
+                except Exception:
+                    stats['errors'] += 1
+                    current_app.logger.error(
+                        f'Failed to index record {uuid}', exc_info=True)
+
+        start_time = time.time()
+        try:
+            _, errors = bulk(
+                current_search_client,
+                actions(),
+                stats_only=True,
+                raise_on_error=False,
+                request_timeout=current_app.config[
+                    'INDEXER_BULK_REQUEST_TIMEOUT'],
+                expand_action_callback=(
+                    _es7_expand_action if ES_VERSION[0] >= 7
+                    else default_expand_action
+                )
+            )
+        except Exception as error:
+            self.redis().hset(
+                f'{self.key}:failed', partition_id, str(error))
+            raise
+        stats['errors'] += errors
+        stats['duration'] = time.time() - start_time
+        stats['rate'] = stats['count'] / stats['duration'] \
+            if stats['duration'] else 0
+        self.redis().hset(f'{self.key}:done', partition_id, json.dumps(stats))
+        return stats
+
+    def catch_up(self):
+        """Index the records written since the start of the run.
+
+        The records created or updated during the run are indexed into the
+        fresh indices, the records deleted during the run are removed from
+        them. The writes done after the catch up and before the aliases
+        switch are still lost, the writes should be stopped for large runs.
+
+        :return: a dict with the number of records by pid type.
+        """
+        from .utils import get_record_class_from_schema_or_pid_type
+        started = self.plan.get('started')
+        counts = {}
+        if not started:
+            return counts
+        for pid_type, index in self.plan['indices'].items():
+            record_class = get_record_class_from_schema_or_pid_type(
+                pid_type=pid_type)
+            indexer = record_class.get_indexer_class()()
+            model_cls = record_class.model_cls
+            query = db.session\
+                .query(model_cls.id, model_cls.json == None)\
+                .filter(model_cls.updated >= started)  # noqa
+            counts[pid_type] = 0
+
+            def actions():
+                """Get the bulk actions of the written records."""
+                for uuid, deleted in query:
+                    counts[pid_type] += 1
+                    if deleted:
+                        yield {
+                            '_op_type': 'delete',
+                            '_index': index,
+                            '_id': str(uuid)
+                        }
+                    else:
+                        yield indexer._index_action(payload={
+                            'id': str(uuid),
+                            'index': index,
+                            'doc_type': pid_type
+                        })
+
+            bulk(
+                current_search_client,
+                actions(),
+                stats_only=True,
+                raise_on_error=False,
+                request_timeout=current_app.config[
+                    'INDEXER_BULK_REQUEST_TIMEOUT'],
+                expand_action_callback=(
+                    _es7_expand_action if ES_VERSION[0] >= 7
+                    else default_expand_action
+                )
+            )
+        return counts
+
+    def switch_aliases(self):
+        """Move the aliases of the current indices to the fresh indices.
+
+        The previous indices are kept.
+
+        :return: a dict of the new indices by the previous ones.
+        """
+        endpoints = current_app.config.get('RECORDS_REST_ENDPOINTS')
+        switched = {}
+        for pid_type, index in self.plan['indices'].items():
+            current_search_client.indices.put_settings(
+                index=index, body={'index': {'refresh_interval': None}})
+            current_search_client.indices.refresh(index=index)
+            alias = build_alias_name(endpoints[pid_type]['search_index'])
+            actions = []
+            for old_index in current_search_client.indices.get_alias(
+                    name=alias):
+                aliases = current_search_client.indices.get_alias(
+                    index=old_index)[old_index]['aliases']
+                for name in aliases:
+                    actions += [
+                        {'remove': {'index': old_index, 'alias': name}},
+                        {'add': {'index': index, 'alias': name}}
+                    ]
+                switched[old_index] = index
+            current_search_client.indices.update_aliases(
+                body={'actions': actions})
+        return switched
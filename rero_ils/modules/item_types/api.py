@@ -31,7 +31,7 @@ from ..circ_policies.api import CircPoliciesSearch
 from ..fetchers import id_fetcher
 from ..minters import id_minter
 from ..providers import Provider
-from ..utils import extracted_data_from_ref, sorted_pids
+from ..utils import extracted_data_from_ref
 
 # provider
 ItemTypeProvider = type(
@@ -122,47 +122,29 @@ class ItemType(IlsRecord):
         except StopIteration:
             return None
 
-    def get_links_to_me(self, get_pids=False):
-        """Record links.
+    @classmethod
+    def get_links_queries(cls, pid):
+        """Get the queries of the records linked to a record.
 
-        :param get_pids: if True list of linked pids
-                         if False count of linked records
+        :param pid: the record pid.
+        :return: a dict with, by link name, the search of the linked records.
         """
         from ..items.api import ItemsSearch
-        links = {}
-        items_query = ItemsSearch().filter('bool', should=[
-            Q('term', item_type__pid=self.pid),
-            Q('term', temporary_item_type__pid=self.pid)
-        ])
-        cipo_query = CircPoliciesSearch() \
-            .filter(
+        return {
+            'items': ItemsSearch().filter('bool', should=[
+                Q('term', item_type__pid=pid),
+                Q('term', temporary_item_type__pid=pid)
+            ]),
+            'circ_policies': CircPoliciesSearch().filter(
                 'nested',
                 path='settings',
                 query=Q(
                     'bool', must=[
-                        Q('match', settings__item_type__pid=self.pid)
+                        Q('match', settings__item_type__pid=pid)
                     ]
                 )
             )
-        if get_pids:
-            items = sorted_pids(items_query)
-            circ_policies = sorted_pids(cipo_query)
-        else:
-            items = items_query.count()
-            circ_policies = cipo_query.count()
-        if items:
-            links['items'] = items
-        if circ_policies:
-            links['circ_policies'] = circ_policies
-        return links
-
-    def reasons_not_to_delete(self):
-        """Get reasons not to delete record."""
-        cannot_delete = {}
-        links = self.get_links_to_me()
-        if links:
-            cannot_delete['links'] = links
-        return cannot_delete
+        }
 
     def get_label(self, language=None):
         """Get the best name possible related to the current language.
@@ -27,8 +27,9 @@ from .circulation import ItemCirculation
 from .issue import ItemIssue
 from ..models import ItemIdentifier, ItemMetadata
 from ...api import IlsRecordError, IlsRecordsIndexer, IlsRecordsSearch
-from ...documents.api import DocumentsSearch
+from ...documents.api import DocumentsIndexer, DocumentsSearch
 from ...fetchers import id_fetcher
+from ...indexer_utils import ReindexQueue
 from ...minters import id_minter
 from ...organisations.api import Organisation
 from ...patrons.api import current_librarian
@@ -88,14 +89,6 @@ class Item(ItemCirculation, ItemIssue):
         except NotFoundError:
             pass
 
-    def reasons_not_to_delete(self):
-        """Get reasons not to delete record."""
-        cannot_delete = {}
-        links = self.get_links_to_me()
-        if links:
-            cannot_delete['links'] = links
-        return cannot_delete
-
     def in_collection(self, **kwargs):
         """Get published collection pids for current item."""
         from ...collections.api import CollectionsSearch
@@ -236,8 +229,6 @@ class ItemsIndexer(IlsRecordsIndexer):
         :param record: an item object
         "returns: the elastiscsearch client result
         """
-        from ...holdings.api import Holding
-
         # get previous indexed version
         es_item = self._es_item(record)
 
@@ -249,18 +240,21 @@ class ItemsIndexer(IlsRecordsIndexer):
             self._update_status_in_doc(record, es_item)
             return return_value
 
-        # reindex the holding / doc for non circulation operations
+        # reindex the holding and update the item in the document for non
+        # circulation operations
         holding_pid = extracted_data_from_ref(record.get('holding'))
-        holding = Holding.get_record_by_pid(holding_pid)
-        holding.reindex()
+        self._reindex_parents(holding_pid, record.document_pid, item=record)
         # reindex the old holding
         old_holding_pid = None
         if es_item:
             # reindex old holding ot update hte count
             old_holding_pid = es_item.get('holding', {}).get('pid')
             if old_holding_pid != holding_pid:
-                old_holding = Holding.get_record_by_pid(old_holding_pid)
-                old_holding.reindex()
+                self._reindex_parents(
+                    old_holding_pid,
+                    es_item.get('document', {}).get('pid'),
+                    deleted_item_pid=record.pid
+                )
         return return_value
 
     def delete(self, record):
@@ -285,9 +279,37 @@ class ItemsIndexer(IlsRecordsIndexer):
                 pass
         if not deleted:
             # for items count
-            holding.reindex()
+            self._reindex_parents(
+                holding_pid, holding.document_pid, deleted_item_pid=record.pid)
         return return_value
 
+    @classmethod
+    def _reindex_parents(cls, holding_pid, document_pid, item=None,
+                         deleted_item_pid=None):
+        """Reindex the parent holding and document of an item.
+
+        With the reindex queue enabled, the holding and the document are
+        queued to be reindexed only once for all the changed items.
+
+        :param holding_pid: the parent holding pid.
+        :param document_pid: the parent document pid.
+        :param item: the indexed item if any.
+        :param deleted_item_pid: the item pid to remove from the document.
+        """
+        from ...holdings.api import Holding
+
+        if ReindexQueue.enabled():
+            ReindexQueue.add('hold', holding_pid)
+            ReindexQueue.add('doc', document_pid)
+            return
+        holding = Holding.get_record_by_pid(holding_pid)
+        holding.reindex()
+        if item:
+            DocumentsIndexer.update_item(item)
+        elif document_pid:
+            DocumentsIndexer.delete_item(
+                document_pid, deleted_item_pid, holding_pid=holding_pid)
+
     def bulk_index(self, record_id_iterator):
         """Bulk index records.
 
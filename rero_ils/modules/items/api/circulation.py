@@ -48,7 +48,7 @@ from ...loans.api import Loan, LoanAction, LoanState, \
     get_last_transaction_loc_for_item, get_request_by_item_pid_by_patron_pid
 from ...locations.api import Location
 from ...patrons.api import Patron
-from ...utils import extracted_data_from_ref, sorted_pids
+from ...utils import extracted_data_from_ref
 from ....filter import format_date_filter
 
 
@@ -1153,36 +1153,27 @@ class ItemCirculation(ItemRecord):
             LoanAction.RETURN_MISSING: None
         }
 
-    def get_links_to_me(self, get_pids=False):
-        """Record links.
+    @classmethod
+    def get_links_queries(cls, pid):
+        """Get the queries of the records linked to a record.
 
-        :param get_pids: if True list of linked pids
-                         if False count of linked records
+        :param pid: the record pid.
+        :return: a dict with, by link name, the search of the linked records.
         """
-        links = {}
-        query_loans = search_by_pid(
-            item_pid=item_pid_to_object(self.pid),
-            exclude_states=[
-                LoanState.CREATED,
-                LoanState.CANCELLED,
-                LoanState.ITEM_RETURNED,
-            ]
-        )
-        query_fees = PatronTransactionsSearch()\
-            .filter('term', item__pid=self.pid)\
-            .filter('term', status='open')\
+        return {
+            'loans': search_by_pid(
+                item_pid=item_pid_to_object(pid),
+                exclude_states=[
+                    LoanState.CREATED,
+                    LoanState.CANCELLED,
+                    LoanState.ITEM_RETURNED,
+                ]
+            ),
+            'fees': PatronTransactionsSearch()
+            .filter('term', item__pid=pid)
+            .filter('term', status='open')
             .filter('range', total_amount={'gt': 0})
-        if get_pids:
-            loans = sorted_pids(query_loans)
-            fees = sorted_pids(query_fees)
-        else:
-            loans = query_loans.count()
-            fees = query_fees.count()
-        if loans:
-            links['loans'] = loans
-        if fees:
-            links['fees'] = fees
-        return links
+        }
 
     def get_requests(self, sort_by=None, output=None):
         """Return sorted pending, item_on_transit, item_at_desk loans.
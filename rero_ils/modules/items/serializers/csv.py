@@ -19,18 +19,19 @@
 """Item serializers."""
 
 import csv
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 import ciso8601
-from elasticsearch_dsl import A
+from elasticsearch_dsl import A, Search
 from flask import current_app, request, stream_with_context
 from invenio_i18n.ext import current_i18n
 from invenio_records_rest.serializers.csv import CSVSerializer, Line
 
 from rero_ils.modules.documents.api import DocumentsSearch
-from rero_ils.modules.item_types.api import ItemTypesSearch
-from rero_ils.modules.libraries.api import LibrariesSearch
 from rero_ils.modules.loans.api import LoansSearch
-from rero_ils.modules.locations.api import LocationsSearch
+from rero_ils.modules.reference_labels import get_reference_labels
+from rero_ils.modules.utils import chunks, search_after_pages
 from rero_ils.utils import get_i18n_supported_languages
 
 from ..models import ItemNoteTypes
@@ -60,227 +61,285 @@ role_filter = [
 
 
 class ItemCSVSerializer(CSVSerializer):
-    """Serialize item search for csv."""
+    """Serialize item search for csv.
+
+    The items are read by pages, the documents and the loans of the next
+    page are loaded while the rows of the current page are written. Only
+    two pages are kept in memory.
+    """
 
     def serialize_search(self, pid_fetcher, search_result, links=None,
                          item_links_factory=None):
         """Serialize a search result.
 
         :param pid_fetcher: Persistent identifier fetcher.
-        :param search_result: Elasticsearch search result.
+        :param search_result: Elasticsearch search (read with a cursor),
+            search result or iterable of hits.
         :param links: Dictionary of links to add to response.
         :param item_links_factory: Factory function for record links.
         """
-        # define chunk size
-        chunk_size = 1000
-
         # language
         language = request.args.get("lang", current_i18n.language)
         if not language or language not in get_i18n_supported_languages():
             language = current_app.config.get('BABEL_DEFAULT_LANGUAGE', 'en')
 
+        # return streamed content
+        return stream_with_context(self.generate_csv(search_result, language))
+
+    def generate_csv(self, search_result, language):
+        """Generate the CSV lines of the items.
+
+        :param search_result: Elasticsearch search, search result or
+            iterable of hits.
+        :param language: the language of the contributions.
+        :return: generator of CSV lines.
+        """
         # prepare mapping dictionnaries
-        item_types_map = {}
-        for item_type in ItemTypesSearch().scan():
-            item_types_map[item_type.pid] = item_type.name
-        locations_map = {}
-        for location in LocationsSearch().scan():
-            locations_map[location.pid] = location.name
-        libraries_map = {}
-        for library in LibrariesSearch().scan():
-            libraries_map[library.pid] = library.name
-
-        def generate_csv():
-            def batch(results):
-                """Chunk search results.
-
-                :param results: search results.
-                :return list of chuncked item pids and search records
-                """
-                records = []
-                pids = []
-                for result in results:
-                    pids.append(result.pid)
-                    records.append(result)
-                    if len(records) % chunk_size == 0:
-                        yield pids, records
-                        pids = []
-                        records = []
-                yield pids, records
-
-            def get_documents_by_item_pids(item_pids):
-                """Get documents for the given item pid list."""
-
-                def _build_doc(data):
-                    document_data = {
-                        'document_title': next(
-                            filter(lambda x: x.get('type') == 'bf:Title',
-                                   data.get('title'))
-                        ).get('_text')
-                    }
-                    # process contributions
-                    creator = []
-                    if 'contribution' in data:
-                        for contribution in data.get('contribution'):
-                            if any(role in contribution.get('role')
-                                   for role in role_filter):
-                                authorized_access_point = \
-                                    f'authorized_access_point_{language}'
-                                if authorized_access_point in contribution\
-                                        .get('agent'):
-                                    creator.append(
-                                        contribution['agent'][
-                                            authorized_access_point]
-                                    )
-                    document_data['document_creator'] = ' ; '.join(creator)
-                    document_main_type = []
-                    document_sub_type = []
-                    for document_type in data.get('type'):
-                        # data = document_type.to_dict()
-                        document_main_type.append(
-                            document_type.get('main_type'))
-                        document_sub_type.append(
-                            document_type.get('subtype', ''))
-                    document_data['document_main_type'] = ', '.join(
-                        document_main_type)
-                    document_data['document_sub_type'] = ', '.join(
-                        document_sub_type)
-                    # TODO : build provision activity
-                    return document_data
-
-                doc_search = DocumentsSearch() \
-                    .filter('terms', holdings__items__pid=list(item_pids)) \
-                    .source(
-                    ['pid', 'title', 'contribution', 'provisionActivity',
-                     'type'])
-                docs = {}
-                for doc in doc_search.scan():
-                    docs[doc.pid] = _build_doc(doc.to_dict())
-                return docs
-
-            def get_loans_by_item_pids(item_pids):
-                """Get loans for the given item pid list."""
-                states = ['PENDING'] + \
-                    current_app.config['CIRCULATION_STATES_LOAN_ACTIVE']
-                loan_search = LoansSearch() \
-                    .filter('terms', state=states) \
-                    .filter('terms', item_pid__value=item_pids) \
-                    .source(['pid', 'item_pid.value', '_created'])
-                agg = A('terms', field='item_pid.value', size=chunk_size)
-                loan_search.aggs.bucket('loans_count', agg)
-
-                loan_search = loan_search.extra(
-                    collapse={
-                        'field': 'item_pid.value',
-                        "inner_hits": {
-                            "name": "most_recent",
-                            "size": 1,
-                            "sort": [{"_created": "desc"}],
-                        }
-                    }
+        item_types_map = get_reference_labels('itty')
+        locations_map = get_reference_labels('loc')
+        libraries_map = get_reference_labels('lib')
+
+        headers = dict.fromkeys(self.csv_included_fields)
+
+        # write the CSV output in memory
+        line = Line()
+        writer = csv.DictWriter(line,
+                                quoting=csv.QUOTE_ALL,
+                                fieldnames=headers)
+        writer.writeheader()
+        yield line.read()
+
+        count = 0
+        start_time = time.monotonic()
+        for hits, documents, loans in self.prefetch_related_records(
+                search_result, language):
+            for csv_data in hits:
+                csv_data['library_name'] = libraries_map[
+                    csv_data['library']['pid']]
+                csv_data['location_name'] = locations_map[
+                    csv_data['location']['pid']]
+
+                try:
+                    # update csv data with document
+                    csv_data.update(documents.get(csv_data['document']['pid']))
+                except Exception as err:
+                    current_app.logger.error(
+                        'ERROR in csv serializer: '
+                        '{message} on document: {pid}'.format(
+                            message=err,
+                            pid=csv_data['document']['pid'])
+                    )
+
+                # update csv data with loan
+                csv_data.update(loans.get(csv_data['pid'], {'loans_count': 0}))
+
+                # process item type and temporary item type
+                csv_data['item_type'] = item_types_map[
+                    csv_data['item_type']['pid']]
+                temporary_item_type = csv_data.get('temporary_item_type')
+                if temporary_item_type:
+                    csv_data['temporary_item_type'] = item_types_map[
+                        temporary_item_type['pid']]
+                    csv_data['temporary_item_type_end_date'] = \
+                        temporary_item_type.get('end_date')
+
+                # process note
+                for note in csv_data.get('notes', []):
+                    if any(note_type in note.get('type')
+                           for note_type in
+                           ItemNoteTypes.INVENTORY_LIST_CATEGORY):
+                        csv_data[note.get('type')] = note.get(
+                            'content')
+
+                csv_data['created'] = ciso8601.parse_datetime(
+                        csv_data['_created']).date()
+
+                # process item issue
+                if csv_data['type'] == 'issue':
+                    issue = csv_data['issue']
+                    if issue.get('inherited_first_call_number') \
+                            and not csv_data.get('call_number'):
+                        csv_data['call_number'] = \
+                            issue.get('inherited_first_call_number')
+                    csv_data['issue_status'] = issue.get('status')
+                    if issue.get('status_date'):
+                        csv_data['issue_status_date'] = \
+                            ciso8601.parse_datetime(
+                                issue.get('status_date')).date()
+                    csv_data['issue_claims_count'] = \
+                        issue.get('claims_count', 0)
+                    csv_data['issue_expected_date'] = \
+                        issue.get('expected_date')
+                    csv_data['issue_regular'] = issue.get('regular')
+
+                # prevent key error
+                del (csv_data['type'])
+
+                # write csv data
+                data = self.process_dict(csv_data)
+                writer.writerow(data)
+                count += 1
+                yield line.read()
+
+        duration = time.monotonic() - start_time
+        current_app.logger.info(
+            f'Items CSV export: {count} rows in {duration:.2f}s '
+            f'({count / (duration or 1):.2f} rows/s)'
+        )
+
+    def prefetch_related_records(self, search_result, language):
+        """Get the pages of items with their documents and loans.
+
+        The documents and the loans of a page are loaded in a worker thread
+        while the previous page is processed.
+
+        :param search_result: Elasticsearch search, search result or
+            iterable of hits.
+        :param language: the language of the contributions.
+        :return: generator of tuples with the items data, the documents
+            data by pid and the loans data by item pid.
+        """
+        app = current_app._get_current_object()
+
+        def fetch(hits):
+            with app.app_context():
+                return (
+                    hits,
+                    self.get_documents(
+                        {hit['document']['pid'] for hit in hits}, language),
+                    self.get_loans([hit['pid'] for hit in hits])
                 )
 
-                results = loan_search.execute()
-                agg_buckets = {}
-                for result in results.aggregations.loans_count.buckets:
-                    agg_buckets[result.key] = result.doc_count
-                loans = {}
-                for loan_hit in results:
-                    # get most recent loans
-                    loan_data = loan_hit.meta.inner_hits.most_recent[0]\
-                        .to_dict()
-                    item_pid = loan_data['item_pid']['value']
-                    loans[item_pid] = {
-                        'loans_count': agg_buckets.get(item_pid, 0),
-                        'last_transaction_date': ciso8601.parse_datetime(
-                            loan_data['_created']).date()
-                    }
-                return loans
-
-            headers = dict.fromkeys(self.csv_included_fields)
-
-            # write the CSV output in memory
-            line = Line()
-            writer = csv.DictWriter(line,
-                                    quoting=csv.QUOTE_ALL,
-                                    fieldnames=headers)
-            writer.writeheader()
-            yield line.read()
-
-            for pids, batch_results in batch(search_result):
-                # get documents
-                documents = get_documents_by_item_pids(pids)
-
-                # get loans
-                loans = get_loans_by_item_pids(pids)
-
-                for hit in batch_results:
-                    csv_data = hit.to_dict()
-                    csv_data['library_name'] = libraries_map[
-                        hit['library']['pid']]
-                    csv_data['location_name'] = locations_map[
-                        hit['location']['pid']]
-
-                    try:
-                        # update csv data with document
-                        csv_data.update(documents.get(hit['document']['pid']))
-                    except Exception as err:
-                        current_app.logger.error(
-                            'ERROR in csv serializer: '
-                            '{message} on document: {pid}'.format(
-                                message=err,
-                                pid=hit['document']['pid'])
-                        )
-
-                    # update csv data with loan
-                    csv_data.update(loans.get(hit['pid'], {'loans_count': 0}))
-
-                    # process item type and temporary item type
-                    csv_data['item_type'] = item_types_map[
-                        hit['item_type']['pid']]
-                    temporary_item_type = csv_data.get('temporary_item_type')
-                    if temporary_item_type:
-                        csv_data['temporary_item_type'] = item_types_map[
-                            temporary_item_type['pid']]
-                        csv_data['temporary_item_type_end_date'] = \
-                            temporary_item_type.get('end_date')
-
-                    # process note
-                    for note in csv_data.get('notes', []):
-                        if any(note_type in note.get('type')
-                               for note_type in
-                               ItemNoteTypes.INVENTORY_LIST_CATEGORY):
-                            csv_data[note.get('type')] = note.get(
-                                'content')
-
-                    csv_data['created'] = ciso8601.parse_datetime(
-                            hit['_created']).date()
-
-                    # process item issue
-                    if hit['type'] == 'issue':
-                        issue = csv_data['issue']
-                        if issue.get('inherited_first_call_number') \
-                                and not csv_data.get('call_number'):
-                            csv_data['call_number'] = \
-                                issue.get('inherited_first_call_number')
-                        csv_data['issue_status'] = issue.get('status')
-                        if issue.get('status_date'):
-                            csv_data['issue_status_date'] = \
-                                ciso8601.parse_datetime(
-                                    issue.get('status_date')).date()
-                        csv_data['issue_claims_count'] = \
-                            issue.get('claims_count', 0)
-                        csv_data['issue_expected_date'] = \
-                            issue.get('expected_date')
-                        csv_data['issue_regular'] = issue.get('regular')
-
-                    # prevent key error
-                    del (csv_data['type'])
-
-                    # write csv data
-                    data = self.process_dict(csv_data)
-                    writer.writerow(data)
-                    yield line.read()
-
-        # return streamed content
-        return stream_with_context(generate_csv())
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = None
+            for hits in self.get_items_pages(search_result):
+                next_future = executor.submit(fetch, hits)
+                if future:
+                    yield future.result()
+                future = next_future
+            if future:
+                yield future.result()
+
+    @staticmethod
+    def get_items_pages(search_result):
+        """Get the items by pages.
+
+        An Elasticsearch search is read with `search_after` within a point
+        in time if the cluster supports it.
+
+        :param search_result: Elasticsearch search, search result or
+            iterable of hits.
+        :return: generator of lists of items data.
+        """
+        size = current_app.config.get('RERO_ILS_ITEMS_CSV_CHUNK_SIZE', 1000)
+        if isinstance(search_result, Search):
+            yield from search_after_pages(search_result, size)
+            return
+        if isinstance(search_result, dict):
+            search_result = search_result.get('hits', {}).get('hits', [])
+        for hits in chunks(search_result, size):
+            yield [
+                hit.get('_source', hit) if isinstance(hit, dict)
+                else hit.to_dict()
+                for hit in hits
+            ]
+
+    @staticmethod
+    def get_documents(document_pids, language):
+        """Get documents data for the given document pids.
+
+        :param document_pids: the document pids.
+        :param language: the language of the contributions.
+        :return: a dict with the documents data by pid.
+        """
+        def _build_doc(data):
+            document_data = {
+                'document_title': next(
+                    filter(lambda x: x.get('type') == 'bf:Title',
+                           data.get('title'))
+                ).get('_text')
+            }
+            # process contributions
+            creator = []
+            if 'contribution' in data:
+                for contribution in data.get('contribution'):
+                    if any(role in contribution.get('role')
+                           for role in role_filter):
+                        authorized_access_point = \
+                            f'authorized_access_point_{language}'
+                        if authorized_access_point in contribution\
+                                .get('agent'):
+                            creator.append(
+                                contribution['agent'][
+                                    authorized_access_point]
+                            )
+            document_data['document_creator'] = ' ; '.join(creator)
+            document_main_type = []
+            document_sub_type = []
+            for document_type in data.get('type'):
+                document_main_type.append(
+                    document_type.get('main_type'))
+                document_sub_type.append(
+                    document_type.get('subtype', ''))
+            document_data['document_main_type'] = ', '.join(
+                document_main_type)
+            document_data['document_sub_type'] = ', '.join(
+                document_sub_type)
+            # TODO : build provision activity
+            return document_data
+
+        doc_search = DocumentsSearch() \
+            .filter('terms', pid=list(document_pids)) \
+            .source(['pid', 'title', 'contribution', 'provisionActivity',
+                     'type'])
+        doc_search = doc_search[0:len(document_pids)]
+        docs = {}
+        for doc in doc_search.execute():
+            docs[doc.pid] = _build_doc(doc.to_dict())
+        return docs
+
+    @staticmethod
+    def get_loans(item_pids):
+        """Get loans data for the given item pids.
+
+        :param item_pids: the item pids.
+        :return: a dict with the loans count and the last transaction date
+            by item pid.
+        """
+        states = ['PENDING'] + \
+            current_app.config['CIRCULATION_STATES_LOAN_ACTIVE']
+        loan_search = LoansSearch() \
+            .filter('terms', state=states) \
+            .filter('terms', item_pid__value=item_pids) \
+            .source(['pid', 'item_pid.value', '_created'])
+        agg = A('terms', field='item_pid.value', size=len(item_pids))
+        loan_search.aggs.bucket('loans_count', agg)
+
+        loan_search = loan_search.extra(
+            collapse={
+                'field': 'item_pid.value',
+                "inner_hits": {
+                    "name": "most_recent",
+                    "size": 1,
+                    "sort": [{"_created": "desc"}],
+                }
+            }
+        )
+        loan_search = loan_search[0:len(item_pids)]
+
+        results = loan_search.execute()
+        agg_buckets = {}
+        for result in results.aggregations.loans_count.buckets:
+            agg_buckets[result.key] = result.doc_count
+        loans = {}
+        for loan_hit in results:
+            # get most recent loans
+            loan_data = loan_hit.meta.inner_hits.most_recent[0]\
+                .to_dict()
+            item_pid = loan_data['item_pid']['value']
+            loans[item_pid] = {
+                'loans_count': agg_buckets.get(item_pid, 0),
+                'last_transaction_date': ciso8601.parse_datetime(
+                    loan_data['_created']).date()
+            }
+        return loans
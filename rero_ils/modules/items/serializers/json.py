@@ -21,12 +21,10 @@
 from rero_ils.modules.documents.api import search_document_by_pid
 from rero_ils.modules.documents.utils import filter_document_type_buckets, \
     title_format_text_head
-from rero_ils.modules.item_types.api import ItemType
 from rero_ils.modules.items.api import Item
 from rero_ils.modules.items.models import ItemStatus
-from rero_ils.modules.libraries.api import Library
-from rero_ils.modules.locations.api import Location
 from rero_ils.modules.organisations.api import Organisation
+from rero_ils.modules.reference_labels import get_reference_label
 from rero_ils.modules.serializers import JSONSerializer
 from rero_ils.modules.vendors.api import Vendor
 
@@ -42,8 +40,6 @@ class ItemsJSONSerializer(JSONSerializer):
         """
         records = results.get('hits', {}).get('hits', {})
         orgs = {}
-        libs = {}
-        locs = {}
         for record in records:
             metadata = record.get('metadata', {})
             document = search_document_by_pid(
@@ -75,11 +71,8 @@ class ItemsJSONSerializer(JSONSerializer):
             # Temporary location
             temp_location = metadata.get('temporary_location')
             if temp_location:
-                temp_location_pid = temp_location['pid']
-                if temp_location_pid not in locs:
-                    locs[temp_location_pid] = Location \
-                        .get_record_by_pid(temp_location_pid)
-                temp_location['name'] = locs[temp_location_pid].get('name')
+                temp_location['name'] = get_reference_label(
+                    'loc', temp_location['pid'])
 
             # Organisation
             organisation = metadata['organisation']
@@ -89,33 +82,17 @@ class ItemsJSONSerializer(JSONSerializer):
             organisation['viewcode'] = orgs[organisation['pid']].get('code')
             # Library
             library = metadata['library']
-            if library['pid'] not in libs:
-                libs[library['pid']] = Library \
-                    .get_record_by_pid(library['pid'])
-            library['name'] = libs[library['pid']].get('name')
+            library['name'] = get_reference_label('lib', library['pid'])
             # Location
             location = metadata['location']
-            if location['pid'] not in locs:
-                locs[location['pid']] = Location \
-                    .get_record_by_pid(location['pid'])
-            location['name'] = locs[location['pid']].get('name')
+            location['name'] = get_reference_label('loc', location['pid'])
 
-        # Add library name
-        for lib_term in results.get('aggregations', {}).get(
-                'library', {}).get('buckets', []):
-            lib = Library.get_record_by_pid(lib_term.get('key'))
-            lib_term['name'] = lib.get('name')
-        # Add location name
-        for loc_term in results.get('aggregations', {}).get(
-                'location', {}).get('buckets', []):
-            loc = Location.get_record_by_pid(loc_term.get('key'))
-            loc_term['name'] = loc.get('name')
-
-        # Add item type name
-        for item_type_term in results.get('aggregations', {}).get(
-                'item_type', {}).get('buckets', []):
-            item_type = ItemType.get_record_by_pid(item_type_term.get('key'))
-            item_type_term['name'] = item_type.get('name')
+        # Add library, location and item type names
+        for agg_name, pid_type in [('library', 'lib'), ('location', 'loc'),
+                                   ('item_type', 'itty')]:
+            for term in results.get('aggregations', {}).get(
+                    agg_name, {}).get('buckets', []):
+                term['name'] = get_reference_label(pid_type, term.get('key'))
 
         # Add vendor name
         for vendor_term in results.get('aggregations', {}).get(
@@ -33,6 +33,7 @@ from werkzeug.exceptions import NotFound
 from rero_ils.modules.circ_policies.api import CircPolicy
 from rero_ils.modules.documents.views import item_library_pickup_locations
 from rero_ils.modules.errors import NoCirculationActionIsPermitted
+from rero_ils.modules.indexer_utils import IndexerRefresh, with_indexer_refresh
 from rero_ils.modules.items.api import Item
 from rero_ils.modules.items.models import ItemCirculationAction
 from rero_ils.modules.items.utils import item_pid_to_object
@@ -94,6 +95,7 @@ def do_loan_jsonify_action(func):
     object and do not need to have direct access to the item object.
     """
     @wraps(func)
+    @with_indexer_refresh(IndexerRefresh.TRUE)
     def decorated_view(*args, **kwargs):
         try:
             data = flask_request.get_json()
@@ -117,6 +119,7 @@ def do_item_jsonify_action(func):
     object before executing the invenio-circulation logic.
     """
     @wraps(func)
+    @with_indexer_refresh(IndexerRefresh.TRUE)
     def decorated_view(*args, **kwargs):
         try:
             data = flask_request.get_json()
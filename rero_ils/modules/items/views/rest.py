@@ -60,5 +60,5 @@ class InventoryListResource(ContentNegotiatedMethodView):
 
         return self.make_response(
             pid_fetcher=None,
-            search_result=search.scan()
+            search_result=search
         )
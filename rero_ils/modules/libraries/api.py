@@ -18,8 +18,11 @@
 
 """API for manipulating libraries."""
 
-from datetime import datetime, timedelta
-from functools import partial
+import json
+from bisect import bisect_left, bisect_right
+from datetime import date as date_cls
+from datetime import datetime, time, timedelta
+from functools import lru_cache, partial
 
 import pytz
 from dateutil import parser
@@ -32,7 +35,7 @@ from ..fetchers import id_fetcher
 from ..locations.api import LocationsSearch
 from ..minters import id_minter
 from ..providers import Provider
-from ..utils import date_string_to_utc, sorted_pids, strtotime
+from ..utils import date_string_to_utc, strtotime
 
 # provider
 LibraryProvider = type(
@@ -46,6 +49,195 @@ library_id_minter = partial(id_minter, provider=LibraryProvider)
 library_id_fetcher = partial(id_fetcher, provider=LibraryProvider)
 
 
+class LibraryCalendar:
+    """Open days of a library.
+
+    The opening hours and the exception dates of a library are expanded, one
+    year at a time, into a sorted list of open days (as date ordinals). Open
+    days counts, next open days and open days ranges are then resolved with
+    bisections instead of testing each day.
+
+    Only the day level is considered (as `Library.is_open` with
+    `day_only=True`): the times of the opening hours and exceptions are
+    ignored.
+    """
+
+    #: number of years to look at to find a next/previous open day.
+    MAX_YEARS = 100
+
+    def __init__(self, opening_hours, exception_dates):
+        """Initialize the calendar.
+
+        :param opening_hours: the opening hours of the library.
+        :param exception_dates: the exception dates of the library.
+        """
+        days = [day.lower() for day in
+                ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday',
+                 'Saturday', 'Sunday']]
+        rules = {}
+        for rule in opening_hours:
+            rules.setdefault(rule['day'], rule.get('is_open', False))
+        self._weekdays = [rules.get(day, False) for day in days]
+        self._exceptions = []
+        for exception in exception_dates:
+            start_date = date_string_to_utc(exception['start_date'])
+            day_gap = 0
+            if exception.get('end_date'):
+                end_date = date_string_to_utc(exception['end_date'])
+                day_gap = (end_date - start_date).days
+            rule = None
+            if exception.get('repeat'):
+                period = exception['repeat']['period'].upper()
+                rule = rrule(
+                    freq=FREQNAMES.index(period),
+                    interval=exception['repeat']['interval'],
+                    dtstart=start_date
+                )
+            self._exceptions.append(
+                (start_date, day_gap, rule, exception['is_open']))
+        self._years = {}
+
+    def _exception_ranges(self, start_date, day_gap, rule, first, last):
+        """Get the days ranges of an exception between two days.
+
+        For a repeatable exception, only the last occurrence starting before
+        a day is relevant for this day.
+
+        :param start_date: the exception start date.
+        :param day_gap: the number of days of the exception.
+        :param rule: the exception recurrence rule, `None` if not repeatable.
+        :param first: the first day ordinal.
+        :param last: the last day ordinal.
+        :return: a generator of (start, end) day ordinals.
+        """
+        if rule is None:
+            start = start_date.date().toordinal()
+            yield start, start + day_gap
+            return
+        tzinfo = start_date.tzinfo
+        occurrences = [
+            occurrence.date().toordinal() for occurrence in rule.between(
+                datetime.combine(
+                    date_cls.fromordinal(max(first - day_gap, 1)),
+                    time.min, tzinfo),
+                datetime.combine(date_cls.fromordinal(last), time.max, tzinfo),
+                inc=True
+            )
+        ]
+        for idx, start in enumerate(occurrences):
+            end = start + day_gap
+            if idx + 1 < len(occurrences):
+                end = min(end, occurrences[idx + 1] - 1)
+            yield start, end
+
+    def _open_days(self, year):
+        """Get the open days of a year.
+
+        :param year: the year.
+        :return: the sorted list of the open days ordinals.
+        """
+        if year not in self._years:
+            first = date_cls(year, 1, 1).toordinal()
+            last = date_cls(year, 12, 31).toordinal()
+            # the ordinal 1 (0001-01-01) is a monday
+            status = [
+                self._weekdays[(ordinal - 1) % 7]
+                for ordinal in range(first, last + 1)
+            ]
+            for start_date, day_gap, rule, is_open in self._exceptions:
+                ranges = self._exception_ranges(
+                    start_date, day_gap, rule, first, last)
+                for start, end in ranges:
+                    start, end = max(start, first), min(end, last)
+                    for ordinal in range(start, end + 1):
+                        status[ordinal - first] = is_open
+            self._years[year] = [
+                first + idx for idx, is_open in enumerate(status) if is_open
+            ]
+        return self._years[year]
+
+    def is_open(self, day):
+        """Check if the library is open for a day.
+
+        :param day: the day to check.
+        :return: True if the library is open, False otherwise.
+        """
+        open_days = self._open_days(day.year)
+        ordinal = day.toordinal()
+        idx = bisect_left(open_days, ordinal)
+        return idx < len(open_days) and open_days[idx] == ordinal
+
+    def open_days(self, start, end):
+        """Get the open days between two days (included).
+
+        :param start: the first day.
+        :param end: the last day.
+        :return: the list of the open days ordinals.
+        """
+        days = []
+        for year in range(start.year, end.year + 1):
+            open_days = self._open_days(year)
+            days.extend(open_days[
+                bisect_left(open_days, start.toordinal()):
+                bisect_right(open_days, end.toordinal())
+            ])
+        return days
+
+    def count_open(self, start, end):
+        """Count the open days between two days (included).
+
+        :param start: the first day.
+        :param end: the last day.
+        :return: the number of open days.
+        """
+        count = 0
+        for year in range(start.year, end.year + 1):
+            open_days = self._open_days(year)
+            count += bisect_right(open_days, end.toordinal()) \
+                - bisect_left(open_days, start.toordinal())
+        return count
+
+    def nth_open(self, day, count):
+        """Get the nth open day after (or before) a day.
+
+        :param day: the reference day (not included).
+        :param count: the number of open days, a negative number to search
+            before the reference day.
+        :return: the open day ordinal, `None` if not found.
+        """
+        ordinal = day.toordinal()
+        if count > 0:
+            for year in range(day.year, day.year + self.MAX_YEARS):
+                open_days = self._open_days(year)
+                idx = bisect_right(open_days, ordinal) + count - 1
+                if idx < len(open_days):
+                    return open_days[idx]
+                count = idx - len(open_days) + 1
+        elif count < 0:
+            for year in range(day.year, day.year - self.MAX_YEARS, -1):
+                if year < 1:
+                    break
+                open_days = self._open_days(year)
+                idx = bisect_left(open_days, ordinal) + count
+                if idx >= 0:
+                    return open_days[idx]
+                count = idx
+                ordinal = date_cls(year, 1, 1).toordinal()
+        else:
+            return ordinal
+
+
+@lru_cache(maxsize=1000)
+def _get_library_calendar(rules):
+    """Get the calendar corresponding to the library rules.
+
+    :param rules: the JSON serialized opening hours and exception dates.
+    :return: a `LibraryCalendar`.
+    """
+    opening_hours, exception_dates = json.loads(rules)
+    return LibraryCalendar(opening_hours, exception_dates)
+
+
 class LibrariesSearch(IlsRecordsSearch):
     """Libraries search."""
 
@@ -198,6 +390,9 @@ class Library(IlsRecord):
             date = date_string_to_utc(date)
         if isinstance(date, datetime) and date.tzinfo is None:
             date = date.replace(tzinfo=pytz.utc)
+        if day_only:
+            day = date.date() if isinstance(date, datetime) else date
+            return self.calendar.is_open(day)
 
         # STEP 1 :: check about regular rules
         #   Each library could defined if a specific weekday is open or closed.
@@ -233,6 +428,19 @@ class Library(IlsRecord):
 
         return is_open
 
+    @property
+    def calendar(self):
+        """Get the calendar of the library.
+
+        The calendar is shared by all libraries having the same opening hours
+        and exception dates, so a changed library gets a new calendar.
+        """
+        rules = json.dumps([
+            self.get('opening_hours', []),
+            self.get('exception_dates', [])
+        ], sort_keys=True)
+        return _get_library_calendar(rules)
+
     def _get_opening_hour_by_day(self, day_name):
         """Get the library opening hour for a specific day."""
         day_name = day_name.lower()
@@ -250,12 +458,10 @@ class Library(IlsRecord):
             raise LibraryNeverOpen
         if isinstance(date, str):
             date = parser.parse(date)
-        add_day = 1
-        if previous:
-            add_day = -1
-        date += timedelta(days=add_day)
-        while not self.is_open(date=date, day_only=True):
-            date += timedelta(days=add_day)
+        ordinal = self.calendar.nth_open(date, -1 if previous else 1)
+        if ordinal is None:
+            raise LibraryNeverOpen
+        date += timedelta(days=ordinal - date.toordinal())
         if not ensure:
             return date
         opening_hour = self._get_opening_hour_by_day(date.strftime('%A'))
@@ -267,72 +473,78 @@ class Library(IlsRecord):
             microsecond=0
         )
 
-    def get_open_days(self, start_date=None, end_date=None):
-        """Get all open days between date interval."""
+    @staticmethod
+    def _get_days_interval(start_date=None, end_date=None):
+        """Get the days of a date interval.
+
+        Days are counted from the start date by step of one day, until the
+        day after the end date (excluded).
+
+        :param start_date: the start date.
+        :param end_date: the end date.
+        :return: a tuple with the start date and the number of days.
+        """
         start_date = start_date or datetime.now(pytz.utc)
         end_date = end_date or datetime.now(pytz.utc)
         if isinstance(start_date, str):
             start_date = date_string_to_utc(start_date)
         if isinstance(end_date, str):
             end_date = date_string_to_utc(end_date)
+        days, rest = divmod(
+            end_date + timedelta(days=1) - start_date, timedelta(days=1))
+        if rest:
+            days += 1
+        return start_date, max(days, 0)
 
-        dates = []
-        end_date += timedelta(days=1)
-        while end_date > start_date:
-            if self.is_open(date=start_date, day_only=True):
-                dates.append(start_date)
-            start_date += timedelta(days=1)
-        return dates
+    def get_open_days(self, start_date=None, end_date=None):
+        """Get all open days between date interval."""
+        start_date, days = self._get_days_interval(start_date, end_date)
+        if not days:
+            return []
+        open_days = self.calendar.open_days(
+            start_date, start_date + timedelta(days=days - 1))
+        return [
+            start_date + timedelta(days=ordinal - start_date.toordinal())
+            for ordinal in open_days
+        ]
 
     def count_open(self, start_date=None, end_date=None):
         """Get number of open day between date interval."""
-        start_date = start_date or datetime.now(pytz.utc)
-        end_date = end_date or datetime.now(pytz.utc)
-        return len(self.get_open_days(start_date, end_date))
+        start_date, days = self._get_days_interval(start_date, end_date)
+        if not days:
+            return 0
+        return self.calendar.count_open(
+            start_date, start_date + timedelta(days=days - 1))
 
     def in_working_days(self, count, date=None):
         """Get date for given working days."""
         date = date or datetime.now(pytz.utc)
-        counting = 1
         if isinstance(date, str):
             date = date_string_to_utc(date)
-        while counting <= count:
-            counting += 1
-            date = self.next_open(date=date)
-        return date
+        if count < 1:
+            return date
+        if not self._has_is_open():
+            raise LibraryNeverOpen
+        ordinal = self.calendar.nth_open(date, count)
+        if ordinal is None:
+            raise LibraryNeverOpen
+        return date + timedelta(days=ordinal - date.toordinal())
 
-    def get_links_to_me(self, get_pids=False):
-        """Record links.
+    @classmethod
+    def get_links_queries(cls, pid):
+        """Get the queries of the records linked to a record.
 
-        :param get_pids: if True list of linked pids
-                         if False count of linked records
+        :param pid: the record pid.
+        :return: a dict with, by link name, the search of the linked records.
         """
         from ..patrons.api import PatronsSearch
-        links = {}
-        ptrn_query = PatronsSearch() \
-            .filter('term', libraries__pid=self.pid) \
+        return {
+            'locations': LocationsSearch()
+            .filter('term', library__pid=pid),
+            'patrons': PatronsSearch()
+            .filter('term', libraries__pid=pid)
             .filter('term', roles='librarian')
-        loc_query = LocationsSearch() \
-            .filter('term', library__pid=self.pid)
-        if get_pids:
-            locations = sorted_pids(loc_query)
-            librarians = sorted_pids(ptrn_query)
-        else:
-            locations = loc_query.count()
-            librarians = ptrn_query.count()
-        if locations:
-            links['locations'] = locations
-        if librarians:
-            links['patrons'] = librarians
-        return links
-
-    def reasons_not_to_delete(self):
-        """Get reasons not to delete record."""
-        cannot_delete = {}
-        links = self.get_links_to_me()
-        if links:
-            cannot_delete['links'] = links
-        return cannot_delete
+        }
 
     def get_timezone(self):
         """Get library timezone."""
@@ -52,7 +52,7 @@ from ..notifications.models import NotificationType
 from ..notifications.utils import number_of_reminders_sent
 from ..patron_transactions.api import PatronTransactionsSearch
 from ..patrons.api import Patron, PatronsSearch
-from ..utils import date_string_to_utc, get_ref_for_pid
+from ..utils import chunks, date_string_to_utc, get_ref_for_pid
 
 
 class LoanState(object):
@@ -129,6 +129,8 @@ class Loan(IlsRecord):
     def __init__(self, data, model=None):
         """Loan init."""
         super().__init__(data, model)
+        # records related to this loan, prefetched by `get_loans_by_pids`.
+        self.related_records = {}
 
     @classmethod
     def can_extend(cls, item, **kwargs):
@@ -613,7 +615,8 @@ class Loan(IlsRecord):
         from ..items.api import Item
         item_pid = self.item_pid
         if item_pid:
-            item = Item.get_record_by_pid(item_pid)
+            item = self.related_records.get('item') \
+                or Item.get_record_by_pid(item_pid)
             return item.organisation_pid
         # return None
         raise IlsRecordError.PidDoesNotExist(
@@ -624,7 +627,9 @@ class Loan(IlsRecord):
     @property
     def library_pid(self):
         """Get library PID regarding loan location."""
-        return Location.get_record_by_pid(self.location_pid).library_pid
+        location = self.related_records.get('location') \
+            or Location.get_record_by_pid(self.location_pid)
+        return location.library_pid
 
     @property
     def location_pid(self):
@@ -634,6 +639,8 @@ class Loan(IlsRecord):
         item_pid = self.item_pid
 
         if not location_pid and item_pid:
+            if self.related_records.get('location'):
+                return self.related_records['location'].pid
             return Item.get_record_by_pid(item_pid).holding_location_pid
         elif location_pid:
             return location_pid
@@ -670,7 +677,8 @@ class Loan(IlsRecord):
 
         # At this point, we know that we need to compute an overdue amount.
         # Initialize some useful variables to perform the job.
-        loan_lib = Library.get_record_by_pid(self.library_pid)
+        loan_lib = self.related_records.get('library') \
+            or Library.get_record_by_pid(self.library_pid)
         # add 1 day to end_date because the first overdue_date is next day
         # after the due date
         end_date = date_string_to_utc(self.end_date) + timedelta(days=1)
@@ -917,8 +925,8 @@ class Loan(IlsRecord):
                  Q('range', transaction_date={'lt': three_month_ago}))
             ]) \
             .source(['pid'])
-        for hit in query.scan():
-            yield Loan.get_record_by_pid(hit.pid)
+        yield from get_loans_by_pids(
+            (hit.pid for hit in query.scan()), with_circ_policy=False)
 
     @classmethod
     def concluded(cls, loan):
@@ -1146,8 +1154,7 @@ def get_due_soon_loans(tstamp=None):
         .params(preserve_order=True) \
         .sort({'_created': {'order': 'asc'}}) \
         .source(['pid'])
-    for hit in results.scan():
-        yield Loan.get_record_by_pid(hit.pid)
+    yield from get_loans_by_pids(hit.pid for hit in results.scan())
 
 
 def get_overdue_loan_pids(patron_pid=None, tstamp=None):
@@ -1180,8 +1187,77 @@ def get_overdue_loans(patron_pid=None, tstamp=None):
     :param tstamp: a timestamp to define the execution time of the function
     :return a generator of Loan
     """
-    for pid in get_overdue_loan_pids(patron_pid, tstamp):
-        yield Loan.get_record_by_pid(pid)
+    yield from get_loans_by_pids(get_overdue_loan_pids(patron_pid, tstamp))
+
+
+def get_loans_by_pids(pids, chunk_size=None, with_circ_policy=True):
+    """Get loans and their related records by chunks.
+
+    Each chunk of loans is loaded with one query, as well as the related
+    items, holdings, patrons, locations, libraries and circulation policies.
+    The related records are available into the `related_records` attribute
+    of each loan. The circulation policy of a loan with a deleted item or
+    patron is not loaded.
+
+    :param pids: an iterable of loan pids.
+    :param chunk_size: the number of loans loaded at once. Default to the
+                       `RERO_ILS_LOANS_CHUNK_SIZE` configuration.
+    :param with_circ_policy: if False the circulation policies are not
+                             loaded.
+    :return a generator of `Loan`.
+    """
+    from .utils import get_circ_policy_pid
+    from ..holdings.api import Holding
+    from ..items.api import Item
+
+    def records_by_pid(record_cls, pids):
+        """Get records of a class indexed by pid."""
+        return {
+            record.pid: record
+            for record in record_cls.get_records_by_pids(pids)
+        }
+
+    chunk_size = chunk_size or current_app.config.get(
+        'RERO_ILS_LOANS_CHUNK_SIZE', 500)
+    for pids_chunk in chunks(pids, chunk_size):
+        loans = Loan.get_records_by_pids(pids_chunk)
+        items = records_by_pid(Item, [loan.item_pid for loan in loans])
+        holdings = records_by_pid(
+            Holding, [item.holding_pid for item in items.values()])
+        patrons = records_by_pid(Patron, [loan.patron_pid for loan in loans])
+        location_pids = {}
+        for loan in loans:
+            item = items.get(loan.item_pid)
+            holding = holdings.get(item.holding_pid) if item else None
+            loan.related_records.update(
+                item=item,
+                holding=holding,
+                patron=patrons.get(loan.patron_pid)
+            )
+            location_pids[loan.pid] = loan.get('transaction_location_pid') \
+                or (holding.location_pid if holding else None)
+        locations = records_by_pid(Location, location_pids.values())
+        libraries = records_by_pid(Library, [
+            location.library_pid for location in locations.values()])
+        for loan in loans:
+            location = locations.get(location_pids[loan.pid])
+            loan.related_records.update(
+                location=location,
+                library=libraries.get(location.library_pid)
+                if location else None
+            )
+        if with_circ_policy:
+            circ_policy_pids = {
+                loan.pid: get_circ_policy_pid(loan) for loan in loans
+                if loan.related_records['item']
+                and loan.related_records['patron']
+            }
+            circ_policies = records_by_pid(
+                CircPolicy, circ_policy_pids.values())
+            for loan in loans:
+                loan.related_records['circ_policy'] = \
+                    circ_policies.get(circ_policy_pids.get(loan.pid))
+        yield from loans
 
 
 def loan_has_open_events(loan_pid=None):
@@ -1247,6 +1323,32 @@ class LoansIndexer(IlsRecordsIndexer):
 
     record_cls = Loan
 
+    def index(self, record):
+        """Index a loan.
+
+        The circulation statistics of the patron are invalidated once the
+        loan is indexed, they can not be cached from the previous state of
+        the index by a concurrent request.
+
+        :param record: the loan record.
+        :return: the elasticsearch client result.
+        """
+        return_value = super().index(record)
+        if record.patron_pid:
+            Patron.clear_circulation_stats(record.patron_pid)
+        return return_value
+
+    def delete(self, record):
+        """Delete a loan from the index.
+
+        :param record: the loan record.
+        :return: the elasticsearch client result.
+        """
+        return_value = super().delete(record)
+        if record.patron_pid:
+            Patron.clear_circulation_stats(record.patron_pid)
+        return return_value
+
     def bulk_index(self, record_id_iterator):
         """Bulk index records.
 
@@ -26,7 +26,7 @@ from rero_ils.modules.serializers import JSONSerializer, RecordSchemaJSONV1
 
 from ..documents.api import DocumentsSearch
 from ..items.api import Item
-from ..libraries.api import Library
+from ..reference_labels import get_reference_label
 
 
 class LoanJSONSerializer(JSONSerializer):
@@ -41,10 +41,9 @@ class LoanJSONSerializer(JSONSerializer):
             loan = Loan.get_record_by_pid(metadata.get('pid'))
             # Library name
             library_pid = metadata.get('library_pid')
-            data = Library.get_record_by_pid(library_pid)
             metadata['library'] = {
-                'pid': data['pid'],
-                'name': data['name']
+                'pid': library_pid,
+                'name': get_reference_label('lib', library_pid)
             }
             del metadata['library_pid']
             # Document
@@ -35,7 +35,8 @@ def loan_anonymizer(dbcommit=True, reindex=True):
     """
     counter = 0
     for loan in Loan.get_anonymized_candidates():
-        if Loan.can_anonymize(loan_data=loan, patron=None):
+        patron = loan.related_records.get('patron')
+        if Loan.can_anonymize(loan_data=loan, patron=patron):
             loan.anonymize(loan, dbcommit=dbcommit, reindex=reindex)
             counter += 1
 
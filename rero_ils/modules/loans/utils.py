@@ -30,20 +30,32 @@ from ..patrons.api import Patron
 from ..utils import get_ref_for_pid
 
 
-def get_circ_policy(loan):
-    """Return a circ policy for loan."""
-    item = Item.get_record_by_pid(loan.item_pid)
-    library_pid = loan.library_pid
-    patron = Patron.get_record_by_pid(loan.get('patron_pid'))
-    patron_type_pid = patron.patron_type_pid
-
-    result = CircPolicy.provide_circ_policy(
+def get_circ_policy_pid(loan):
+    """Return the circ policy pid for loan."""
+    related_records = getattr(loan, 'related_records', {})
+    item = related_records.get('item') or Item.get_record_by_pid(loan.item_pid)
+    patron = related_records.get('patron') \
+        or Patron.get_record_by_pid(loan.get('patron_pid'))
+    item_type_pid = item.temporary_item_type_pid
+    if not item_type_pid:
+        holding = related_records.get('holding')
+        item_type_pid = holding.circulation_category_pid if holding \
+            else item.holding_circulation_category_pid
+
+    return CircPolicy.get_circ_policy_pid(
         loan.organisation_pid,
-        library_pid,
-        patron_type_pid,
-        item.temporary_item_type_pid or item.holding_circulation_category_pid
+        loan.library_pid,
+        patron.patron_type_pid,
+        item_type_pid
     )
-    return result
+
+
+def get_circ_policy(loan):
+    """Return a circ policy for loan."""
+    circ_policy = getattr(loan, 'related_records', {}).get('circ_policy')
+    if circ_policy:
+        return circ_policy
+    return CircPolicy.get_record_by_pid(get_circ_policy_pid(loan))
 
 
 def get_default_loan_duration(loan, initial_loan):
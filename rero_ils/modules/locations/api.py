@@ -28,7 +28,7 @@ from ..errors import MissingRequiredParameterError
 from ..fetchers import id_fetcher
 from ..minters import id_minter
 from ..providers import Provider
-from ..utils import extracted_data_from_ref, sorted_pids
+from ..utils import extracted_data_from_ref
 
 # provider
 LocationProvider = type(
@@ -113,44 +113,26 @@ class Location(IlsRecord):
         library_pid = extracted_data_from_ref(self.get('library'))
         return Library.get_record_by_pid(library_pid)
 
-    def get_links_to_me(self, get_pids=False):
-        """Record links.
+    @classmethod
+    def get_links_queries(cls, pid):
+        """Get the queries of the records linked to a record.
 
-        :param get_pids: if True list of linked pids
-                         if False count of linked records
+        :param pid: the record pid.
+        :return: a dict with, by link name, the search of the linked records.
         """
         from ..items.api import ItemsSearch
         from ..loans.api import LoansSearch, LoanState
-        item_query = ItemsSearch() \
-            .filter('term', location__pid=self.pid)
         exclude_states = [
             LoanState.CANCELLED, LoanState.ITEM_RETURNED, LoanState.CREATED]
-        loan_query = LoansSearch() \
+        return {
+            'items': ItemsSearch().filter('term', location__pid=pid),
+            'loans': LoansSearch()
             .filter('bool', should=[
-                Q('term', pickup_location_pid=self.pid),
-                Q('term', transaction_location_pid=self.pid)
-            ]) \
+                Q('term', pickup_location_pid=pid),
+                Q('term', transaction_location_pid=pid)
+            ])
             .exclude('terms', state=exclude_states)
-        links = {}
-        if get_pids:
-            items = sorted_pids(item_query)
-            loans = sorted_pids(loan_query)
-        else:
-            items = item_query.count()
-            loans = loan_query.count()
-        if items:
-            links['items'] = items
-        if loans:
-            links['loans'] = loans
-        return links
-
-    def reasons_not_to_delete(self):
-        """Get reasons not to delete record."""
-        cannot_delete = {}
-        links = self.get_links_to_me()
-        if links:
-            cannot_delete['links'] = links
-        return cannot_delete
+        }
 
     @property
     def library_pid(self):
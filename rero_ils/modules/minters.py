@@ -19,6 +19,8 @@
 
 from __future__ import absolute_import, print_function, unicode_literals
 
+from .utils import add_known_pid
+
 
 def id_minter(record_uuid, data, provider, pid_key='pid', object_type='rec'):
     """RERO ILS minter."""
@@ -30,4 +32,5 @@ def id_minter(record_uuid, data, provider, pid_key='pid', object_type='rec'):
 
     persistent_identifier = provider.pid
     data[pid_key] = persistent_identifier.pid_value
+    add_known_pid(persistent_identifier.pid_type, data[pid_key])
     return persistent_identifier
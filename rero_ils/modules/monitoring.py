@@ -30,6 +30,7 @@ from invenio_db import db
 from invenio_search import RecordsSearch, current_search_client
 from redis import Redis
 
+from .indexer_utils import ReindexQueue
 from .utils import get_record_class_from_schema_or_pid_type
 from ..permissions import monitoring_permission
 
@@ -295,6 +296,16 @@ def elastic_search():
     return jsonify({'data': info})
 
 
+@api_blueprint.route('/reindex_queue')
+@check_authentication
+def reindex_queue():
+    """Displays the reindex queue metrics.
+
+    :return: jsonified reindex queue metrics.
+    """
+    return jsonify({'data': ReindexQueue.metrics()})
+
+
 @api_blueprint.route('/timestamps')
 @check_authentication
 def timestamps():
@@ -82,7 +82,8 @@ def create_notifications(types=None, tstamp=None, verbose=True):
             logger.debug(f"* Loan#{loan.pid} is considerate as 'overdue'")
             # For each overdue loan, we need to get the 'overdue' reminders
             # to should be sent from the due_date and the current used date.
-            loan_library = Library.get_record_by_pid(loan.library_pid)
+            loan_library = loan.related_records.get('library') \
+                or Library.get_record_by_pid(loan.library_pid)
             open_days = loan_library.count_open(
                 start_date=loan.overdue_date,
                 end_date=tstamp
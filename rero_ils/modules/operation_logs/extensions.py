@@ -83,10 +83,16 @@ class OperationLogObserverExtension(RecordExtension):
         return oplg
 
     def _create_operation_log(self, record, operation, **kwargs):
-        """Build and register an operation log."""
+        """Build and register an operation log.
+
+        The operation log is buffered if the buffering is enabled for the
+        current request or task, otherwise it is indexed immediately.
+        """
         from .api import OperationLog
+        from .writer import buffer_operation_log
         data = self._build_operation_log(record, operation)
-        OperationLog.create(data)
+        if not buffer_operation_log(data):
+            OperationLog.create(data)
 
     post_create = partialmethod(
         _create_operation_log,
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+#
+# RERO ILS
+# Copyright (C) 2021 RERO
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Celery tasks for the operation logs."""
+
+from __future__ import absolute_import, print_function
+
+from celery import shared_task
+
+from .writer import index_operation_logs, replay_operation_logs_spool
+
+
+@shared_task(ignore_result=True)
+def bulk_index_operation_logs(data):
+    """Bulk index buffered operation logs.
+
+    :param data: list of dicts with the operation logs metadata.
+    :return: the number of indexed operation logs.
+    """
+    return index_operation_logs(data)
+
+
+@shared_task(ignore_result=True)
+def replay_spooled_operation_logs():
+    """Index the operation logs spooled when Elasticsearch was unavailable.
+
+    :return: the number of indexed operation logs.
+    """
+    return replay_operation_logs_spool()
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+#
+# RERO ILS
+# Copyright (C) 2021 RERO
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Buffered writer for the operation logs.
+
+The operation logs of a request or a task are collected and indexed with
+one bulk request at its end instead of one index request per log. When
+Elasticsearch is not available the logs are appended to a spool file
+which is replayed later (see `replay_operation_logs_spool`).
+"""
+
+import json
+import os
+import uuid
+from contextlib import contextmanager
+
+from celery import current_task
+from flask import current_app, g, has_request_context
+
+
+def get_operation_logs_spool_file():
+    """Get the path of the operation logs spool file.
+
+    :return: the configured path or a file in the instance folder.
+    """
+    return current_app.config.get('RERO_ILS_OPERATION_LOG_SPOOL_FILE') or \
+        os.path.join(current_app.instance_path, 'operation_logs.spool')
+
+
+def spool_operation_logs(data):
+    """Append operation logs to the spool file.
+
+    :param data: list of dicts with the operation logs metadata.
+    """
+    lines = ''.join(f'{json.dumps(oplg)}\n' for oplg in data)
+    with open(get_operation_logs_spool_file(), 'a') as spool:
+        spool.write(lines)
+
+
+def index_operation_logs(data):
+    """Bulk index operation logs, spool them if it fails.
+
+    The logs have an id, a replay of the spool overrides the logs indexed
+    before the failure instead of duplicating them.
+
+    :param data: list of dicts with the operation logs metadata.
+    :return: the number of indexed operation logs.
+    """
+    from .api import OperationLog
+    if not data:
+        return 0
+    try:
+        OperationLog.bulk_index(data)
+    except Exception as error:
+        current_app.logger.error(
+            f'Can not index {len(data)} operation logs, spooled: {error}')
+        spool_operation_logs(data)
+        return 0
+    return len(data)
+
+
+def replay_operation_logs_spool(size=1000):
+    """Index the spooled operation logs.
+
+    The spool file is renamed before its processing, the logs spooled in
+    the meantime go to a new spool file and the failing logs are spooled
+    again.
+
+    :param size: number of operation logs by bulk request.
+    :return: the number of indexed operation logs.
+    """
+    spool_file = get_operation_logs_spool_file()
+    if not os.path.exists(spool_file):
+        return 0
+    processing_file = f'{spool_file}.{uuid.uuid4()}'
+    os.rename(spool_file, processing_file)
+    count = 0
+    with open(processing_file) as spool:
+        data = []
+        for line in spool:
+            if line.strip():
+                data.append(json.loads(line))
+            if len(data) >= size:
+                count += index_operation_logs(data)
+                data = []
+        count += index_operation_logs(data)
+    os.remove(processing_file)
+    return count
+
+
+def get_operation_logs_buffer():
+    """Get the operation logs buffer of the current request or task.
+
+    The buffer is opened with `buffered_operation_logs` or for every
+    request and task if `RERO_ILS_OPERATION_LOG_BUFFER` is set.
+
+    :return: the buffer list or None if the buffering is not enabled.
+    """
+    buffer = g.get('operation_logs_buffer')
+    if buffer is None \
+            and current_app.config.get('RERO_ILS_OPERATION_LOG_BUFFER') \
+            and (has_request_context() or current_task):
+        buffer = g.operation_logs_buffer = []
+    return buffer
+
+
+def buffer_operation_log(data):
+    """Add an operation log to the buffer of the current request or task.
+
+    :param data: dict with the operation log metadata.
+    :return: False if the buffering is not enabled.
+    """
+    buffer = get_operation_logs_buffer()
+    if buffer is None:
+        return False
+    # the id is set here to keep it through the spool
+    data.setdefault('pid', str(uuid.uuid1()))
+    buffer.append(data)
+    if len(buffer) >= current_app.config.get(
+            'RERO_ILS_OPERATION_LOG_BUFFER_SIZE', 1000):
+        flush_operation_logs_buffer(buffer)
+    return True
+
+
+def flush_operation_logs_buffer(buffer):
+    """Index the buffered operation logs and empty the buffer.
+
+    :param buffer: the buffer list.
+    """
+    from .tasks import bulk_index_operation_logs
+    data = buffer[:]
+    del buffer[:]
+    if not data:
+        return
+    if current_app.config.get('RERO_ILS_OPERATION_LOG_BUFFER_DELAYED'):
+        try:
+            bulk_index_operation_logs.delay(data)
+            return
+        except Exception as error:
+            current_app.logger.error(
+                f'Can not send the operation logs task: {error}')
+    index_operation_logs(data)
+
+
+def close_operation_logs_buffer(exception=None):
+    """Flush the operation logs buffer of the current request or task.
+
+    It is called at the teardown of each request and application context.
+
+    :param exception: the teardown exception if any.
+    """
+    buffer = g.pop('operation_logs_buffer', None)
+    if buffer:
+        flush_operation_logs_buffer(buffer)
+
+
+@contextmanager
+def buffered_operation_logs():
+    """Buffer the operation logs created within the context.
+
+    The buffer is flushed at the end of the context. An already opened
+    buffer is reused.
+    """
+    if g.get('operation_logs_buffer') is not None:
+        yield
+        return
+    g.operation_logs_buffer = []
+    try:
+        yield
+    finally:
+        close_operation_logs_buffer()
@@ -21,6 +21,7 @@
 from functools import partial
 
 from elasticsearch.exceptions import NotFoundError
+from elasticsearch_dsl.utils import AttrDict
 
 from .models import OrganisationIdentifier, OrganisationMetadata
 from ..api import IlsRecord, IlsRecordsIndexer, IlsRecordsSearch
@@ -29,7 +30,7 @@ from ..item_types.api import ItemTypesSearch
 from ..libraries.api import LibrariesSearch, Library
 from ..minters import id_minter
 from ..providers import Provider
-from ..utils import sorted_pids
+from ..reference_labels import get_reference_record, get_reference_records
 from ..vendors.api import Vendor, VendorsSearch
 
 # provider
@@ -88,20 +89,44 @@ class Organisation(IlsRecord):
     @classmethod
     def all_code(cls):
         """Get all code."""
-        return [org.get('code') for org in cls.get_all()]
+        return list(cls.get_viewcodes_table())
 
     @classmethod
     def get_record_by_viewcode(cls, viewcode):
-        """Get record by view code."""
-        result = OrganisationsSearch().filter(
-            'term',
-            code=viewcode
-        ).execute()
-        if result['hits']['total']['value'] != 1:
+        """Get record by view code.
+
+        The organisation is taken from the cached organisations, they are
+        loaded again if the view code is not known.
+
+        :param viewcode: the organisation code.
+        :return: the organisation pid, name and code.
+        """
+        pid = cls.get_viewcodes_table().get(viewcode)
+        if pid is None:
+            pid = cls.get_viewcodes_table(reload=True).get(viewcode)
+        # the table can still have the pid of a deleted organisation
+        organisation = get_reference_record('org', pid) if pid else None
+        if organisation is None:
             raise Exception(
                 'Organisation (get_record_by_viewcode): Result not found.')
+        return AttrDict(dict(pid=pid, **organisation))
+
+    @classmethod
+    def get_viewcodes_table(cls, reload=False):
+        """Get the organisation pids by view code.
+
+        The table is built from the cached organisations (see
+        `rero_ils.modules.reference_labels`).
 
-        return result['hits']['hits'][0]['_source']
+        :param reload: if True, load the cached organisations again.
+        :return: a dict with the organisation pid by view code.
+        """
+        return {
+            organisation['code']: pid
+            for pid, organisation
+            in get_reference_records('org', reload=reload).items()
+            if organisation.get('code')
+        }
 
     @classmethod
     def get_record_by_online_harvested_source(cls, source):
@@ -165,30 +190,17 @@ class Organisation(IlsRecord):
         for pid in pids:
             yield Vendor.get_record_by_pid(pid)
 
-    def get_links_to_me(self, get_pids=False):
-        """Record links.
+    @classmethod
+    def get_links_queries(cls, pid):
+        """Get the queries of the records linked to a record.
 
-        :param get_pids: if True list of linked pids
-                         if False count of linked records
+        :param pid: the record pid.
+        :return: a dict with, by link name, the search of the linked records.
         """
-        query = LibrariesSearch()\
-            .filter('term', organisation__pid=self.pid)
-        links = {}
-        if get_pids:
-            libraries = sorted_pids(query)
-        else:
-            libraries = query.count()
-        if libraries:
-            links['libraries'] = libraries
-        return links
-
-    def reasons_not_to_delete(self):
-        """Get reasons not to delete record."""
-        cannot_delete = {}
-        links = self.get_links_to_me()
-        if links:
-            cannot_delete['links'] = links
-        return cannot_delete
+        return {
+            'libraries': LibrariesSearch()
+            .filter('term', organisation__pid=pid)
+        }
 
     def is_test_organisation(self):
         """Check if this is a test organisation."""
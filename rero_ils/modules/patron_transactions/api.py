@@ -121,6 +121,16 @@ class PatronTransaction(IlsRecord):
             query = query.filter('terms', type=types)
         return query
 
+    @classmethod
+    def get_transactions_query(cls, patron_pid, status=None):
+        """Get the search of the transactions linked to a patron.
+
+        :param patron_pid: the patron pid being searched
+        :param status: (optional) transaction status filter,
+        :return: the transactions search.
+        """
+        return cls._build_transaction_query(patron_pid, status)
+
     @classmethod
     def get_transactions_pids_for_patron(cls, patron_pid, status=None):
         """Get patron transactions linked to a patron.
@@ -417,30 +427,17 @@ class PatronTransaction(IlsRecord):
         return PatronTransactionEventsSearch()\
             .filter('term', parent__pid=self.pid).source().count()
 
-    def get_links_to_me(self, get_pids=False):
-        """Record links.
+    @classmethod
+    def get_links_queries(cls, pid):
+        """Get the queries of the records linked to a record.
 
-        :param get_pids: if True list of linked pids
-                         if False count of linked records
+        :param pid: the record pid.
+        :return: a dict with, by link name, the search of the linked records.
         """
-        links = {}
-        query = PatronTransactionEventsSearch() \
-            .filter('term', parent__pid=self.pid)
-        if get_pids:
-            events = sorted_pids(query)
-        else:
-            events = query.count()
-        if events:
-            links['events'] = events
-        return links
-
-    def reasons_not_to_delete(self):
-        """Get reasons not to delete record."""
-        cannot_delete = {}
-        links = self.get_links_to_me()
-        if links:
-            cannot_delete['links'] = links
-        return cannot_delete
+        return {
+            'events': PatronTransactionEventsSearch()
+            .filter('term', parent__pid=pid)
+        }
 
 
 class PatronTransactionsIndexer(IlsRecordsIndexer):
@@ -448,6 +445,33 @@ class PatronTransactionsIndexer(IlsRecordsIndexer):
 
     record_cls = PatronTransaction
 
+    def index(self, record):
+        """Index a patron transaction.
+
+        The circulation statistics of the patron are invalidated once the
+        transaction is indexed (see `LoansIndexer.index`).
+
+        :param record: the patron transaction record.
+        :return: the elasticsearch client result.
+        """
+        from ..patrons.api import Patron
+        return_value = super().index(record)
+        if record.patron_pid:
+            Patron.clear_circulation_stats(record.patron_pid)
+        return return_value
+
+    def delete(self, record):
+        """Delete a patron transaction from the index.
+
+        :param record: the patron transaction record.
+        :return: the elasticsearch client result.
+        """
+        from ..patrons.api import Patron
+        return_value = super().delete(record)
+        if record.patron_pid:
+            Patron.clear_circulation_stats(record.patron_pid)
+        return return_value
+
     def bulk_index(self, record_id_iterator):
         """Bulk index records.
 
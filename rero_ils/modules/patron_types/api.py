@@ -35,7 +35,7 @@ from ..minters import id_minter
 from ..patron_transactions.api import PatronTransaction
 from ..patrons.api import Patron, PatronsSearch
 from ..providers import Provider
-from ..utils import get_patron_from_arguments, sorted_pids
+from ..utils import get_patron_from_arguments
 
 # provider
 PatronTypeProvider = type(
@@ -229,60 +229,46 @@ class PatronType(IlsRecord):
         """Check if a subscription is required for this patron type."""
         return self.get('subscription_amount', 0) > 0
 
-    def get_links_to_me(self, get_pids=False):
-        """Record links.
+    @classmethod
+    def get_links_queries(cls, pid):
+        """Get the queries of the records linked to a record.
 
-        :param get_pids: if True list of linked pids
-                         if False count of linked records
+        :param pid: the record pid.
+        :return: a dict with, by link name, the search of the linked records.
         """
-        ptrn_query = PatronsSearch()\
-            .filter('term', patron__type__pid=self.pid)
-        cipo_query = CircPoliciesSearch()\
-            .filter(
+        return {
+            'patrons': PatronsSearch()
+            .filter('term', patron__type__pid=pid),
+            'circ_policies': CircPoliciesSearch().filter(
                 'nested',
                 path='settings',
                 query=Q(
                     'bool',
-                    must=[Q('match', settings__patron_type__pid=self.pid)]
+                    must=[Q('match', settings__patron_type__pid=pid)]
                 )
             )
-        links = {}
-        if get_pids:
-            patrons = sorted_pids(ptrn_query)
-            circ_policies = sorted_pids(cipo_query)
-        else:
-            patrons = ptrn_query.count()
-            circ_policies = cipo_query.count()
-        if patrons:
-            links['patrons'] = patrons
-        if circ_policies:
-            links['circ_policies'] = circ_policies
-        return links
-
-    def reasons_not_to_delete(self):
-        """Get reasons not to delete record."""
-        cannot_delete = {}
-        links = self.get_links_to_me()
-        if links:
-            cannot_delete['links'] = links
-        return cannot_delete
+        }
 
     # CHECK LIMITS METHODS ====================================================
-    def check_overdue_items_limit(self, patron):
+    def check_overdue_items_limit(self, patron, stats=None):
         """Check if a patron reached the overdue items limit.
 
         :param patron: the patron who tries to execute the checkout.
+        :param stats: the patron circulation statistics (optional, see
+                      `Patron.get_circulation_stats`).
         :return False if patron has more overdue items than defined limit. True
                 in all other cases.
         """
         limit = self.get('limits', {}).get('overdue_items_limits', {})\
             .get('default_value')
         if limit:
-            overdue_items = list(get_overdue_loan_pids(patron.pid))
-            return limit > len(overdue_items)
+            if stats is not None:
+                return limit > stats['overdues']
+            overdue_count = sum(1 for _ in get_overdue_loan_pids(patron.pid))
+            return limit > overdue_count
         return True
 
-    def check_checkout_count_limit(self, patron, item=None):
+    def check_checkout_count_limit(self, patron, item=None, stats=None):
         """Check if a patron reached the checkout limits.
 
         * check the global general limit (if exists).
@@ -290,19 +276,23 @@ class PatronType(IlsRecord):
         * check the library default limit (if exists).
         :param patron: the patron who tries to execute the checkout.
         :param item: the item related to the loan (optionnal).
+        :param stats: the patron circulation statistics (optional, see
+                      `Patron.get_circulation_stats`).
         :return a tuple of two values ::
           - True|False : to know if the check is success or not.
           - message(string) : the reason why the check fails.
         """
-        checkout_limits = self.replace_refs().get('limits', {})\
-            .get('checkout_limits', {})
+        checkout_limits = self.get('limits', {}).get('checkout_limits', {})
         global_limit = checkout_limits.get('global_limit')
         if not global_limit:
             return True, None
 
         # [0] get the stats for this patron by library
-        patron_library_stats = get_loans_count_by_library_for_patron_pid(
-            patron.pid, [LoanState.ITEM_ON_LOAN])
+        if stats is not None:
+            patron_library_stats = stats['checkouts']
+        else:
+            patron_library_stats = get_loans_count_by_library_for_patron_pid(
+                patron.pid, [LoanState.ITEM_ON_LOAN])
 
         # [1] check the general limit
         patron_total_count = sum(patron_library_stats.values()) or 0
@@ -313,6 +303,9 @@ class PatronType(IlsRecord):
         # [3] check library_limit if item is not none
         if item:
             item_lib_pid = item.library_pid
+            # the library exceptions are references to the libraries
+            checkout_limits = self.replace_refs().get('limits', {})\
+                .get('checkout_limits', {})
             library_limit_value = checkout_limits.get('library_limit')
             # try to find an exception rule for this library
             for exception in checkout_limits.get('library_exceptions', []):
@@ -328,21 +321,24 @@ class PatronType(IlsRecord):
         # [4] no problem detected, checkout is allowed
         return True, None
 
-    def check_fee_amount_limit(self, patron):
+    def check_fee_amount_limit(self, patron, stats=None):
         """Check if a patron reached the fee amount limits.
 
         * check the fee amount limit (if exists).
         :param patron: the patron who tries to execute the checkout.
-        :param item: the item related to the loan.
+        :param stats: the patron circulation statistics (optional, see
+                      `Patron.get_circulation_stats`).
         :return a tuple of two values ::
           - True|False : to know if the check is success or not.
           - message(string) : the reason why the check fails.
         """
         # get fee amount limit
-        fee_amount_limits = self.replace_refs().get('limits', {}) \
+        fee_amount_limits = self.get('limits', {}) \
             .get('fee_amount_limits', {})
         default_limit = fee_amount_limits.get('default_value')
         if default_limit:
+            if stats is not None:
+                return stats['fees']['overdue'] < default_limit
             # get total amount for open transactions on overdue and without
             # subscription fee
             patron_total_amount = PatronTransaction. \
@@ -21,11 +21,14 @@ from copy import deepcopy
 from datetime import datetime
 from functools import partial
 
+from elasticsearch_dsl import MultiSearch, Q
 from flask import current_app
 from flask_babelex import gettext as _
 from flask_login import current_user
+from invenio_cache.proxies import current_cache
 from invenio_circulation.proxies import current_circulation
 from invenio_db import db
+from invenio_search import current_search_client
 from jsonschema.exceptions import ValidationError
 from werkzeug.local import LocalProxy
 
@@ -36,12 +39,13 @@ from ..fetchers import id_fetcher
 from ..libraries.api import Library
 from ..minters import id_minter
 from ..organisations.api import Organisation
-from ..patron_transactions.api import PatronTransaction
+from ..patron_transactions.api import PatronTransaction, \
+    PatronTransactionsSearch
 from ..providers import Provider
 from ..templates.api import TemplatesSearch
 from ..users.api import User
 from ..utils import extracted_data_from_ref, get_patron_from_arguments, \
-    get_ref_for_pid, sorted_pids, trim_patron_barcode_for_record
+    get_ref_for_pid, trim_patron_barcode_for_record
 from ...utils import create_user_from_data
 
 _datastore = LocalProxy(lambda: current_app.extensions['security'].datastore)
@@ -483,39 +487,24 @@ class Patron(IlsRecord):
         if self.get('patron', {}).get('type'):
             return extracted_data_from_ref(self.get('patron').get('type'))
 
-    def get_links_to_me(self, get_pids=False):
-        """Record links.
+    @classmethod
+    def get_links_queries(cls, pid):
+        """Get the queries of the records linked to a record.
 
-        :param get_pids: if True list of linked pids
-                         if False count of linked records
+        :param pid: the record pid.
+        :return: a dict with, by link name, the search of the linked records.
         """
         from ..loans.api import LoanState
-        if self.pid:
-            links = {}
-            exclude_states = [LoanState.CANCELLED, LoanState.ITEM_RETURNED,
-                              LoanState.CREATED]
-            loan_query = current_circulation.loan_search_cls()\
-                .filter('term', patron_pid=self.pid)\
-                .exclude('terms', state=exclude_states)
-            template_query = TemplatesSearch()\
-                .filter('term', creator__pid=self.pid)
-            if get_pids:
-                loans = sorted_pids(loan_query)
-                transactions = PatronTransaction \
-                    .get_transactions_pids_for_patron(self.pid, status='open')
-                templates = sorted_pids(template_query)
-            else:
-                loans = loan_query.count()
-                transactions = PatronTransaction \
-                    .get_transactions_count_for_patron(self.pid, status='open')
-                templates = template_query.count()
-            if loans:
-                links['loans'] = loans
-            if transactions:
-                links['transactions'] = transactions
-            if templates:
-                links['templates'] = templates
-            return links
+        exclude_states = [LoanState.CANCELLED, LoanState.ITEM_RETURNED,
+                          LoanState.CREATED]
+        return {
+            'loans': current_circulation.loan_search_cls()
+            .filter('term', patron_pid=pid)
+            .exclude('terms', state=exclude_states),
+            'transactions': PatronTransaction.get_transactions_query(
+                pid, status='open'),
+            'templates': TemplatesSearch().filter('term', creator__pid=pid)
+        }
 
     def reasons_to_keep(self):
         """Reasons aside from record_links to keep a user.
@@ -529,17 +518,6 @@ class Patron(IlsRecord):
                 others['permission denied'] = True
         return others
 
-    def reasons_not_to_delete(self):
-        """Get reasons not to delete policy."""
-        cannot_delete = {}
-        others = self.reasons_to_keep()
-        links = self.get_links_to_me()
-        if others:
-            cannot_delete['others'] = others
-        if links:
-            cannot_delete['links'] = links
-        return cannot_delete
-
     def get_organisation(self):
         """Return organisation."""
         return Organisation.get_record_by_pid(self.organisation_pid)
@@ -726,16 +704,18 @@ class Patron(IlsRecord):
 
         # other messages must be only rendered for the professional interface
         if not public:
+            stats = self.get_circulation_stats()
             # check the patron type define limit
             patron_type = PatronType.get_record_by_pid(self.patron_type_pid)
-            valid, message = patron_type.check_checkout_count_limit(self)
+            valid, message = patron_type.check_checkout_count_limit(
+                self, stats=stats)
             if not valid:
                 messages.append({
                     'type': 'error',
                     'content': message
                 })
             # check fee amount limit
-            if not patron_type.check_fee_amount_limit(self):
+            if not patron_type.check_fee_amount_limit(self, stats=stats):
                 messages.append({
                     'type': 'error',
                     'content': _(
@@ -743,7 +723,7 @@ class Patron(IlsRecord):
                         'is reached.')
                 })
             # check the patron type overdue limit
-            if not patron_type.check_overdue_items_limit(self):
+            if not patron_type.check_overdue_items_limit(self, stats=stats):
                 messages.append({
                     'type': 'error',
                     'content': _('Checkout denied: the maximal number of '
@@ -751,6 +731,87 @@ class Patron(IlsRecord):
                 })
         return messages
 
+    def get_circulation_stats(self):
+        """Get the loans and fees statistics used by the circulation.
+
+        The loans and the open transactions of the patron are aggregated with
+        one multi search. The result is cached until a loan or a transaction
+        of the patron is indexed (see `loans.api.LoansIndexer.index`).
+
+        :return a dict with:
+            * `loans`: the number of loans by state.
+            * `checkouts`: the number of on loan items by library pid.
+            * `overdues`: the number of overdue loans.
+            * `fees`: the amount of the open transactions (`engaged`) and of
+              the open overdue transactions (`overdue`).
+        """
+        from ..loans.api import LoanState
+
+        key = self._circulation_stats_key(self.pid)
+        stats = current_cache.get(key)
+        if stats is not None:
+            return stats
+
+        now = datetime.now().strftime('%Y-%m-%dT%H:%M:%S.000Z')
+        on_loan = Q('term', state=LoanState.ITEM_ON_LOAN)
+        loans_search = current_circulation.loan_search_cls()\
+            .filter('term', patron_pid=self.pid)\
+            .extra(size=0)
+        loans_search.aggs.bucket('state', 'terms', field='state')
+        loans_search.aggs.bucket('on_loan', 'filter', filter=on_loan)\
+            .bucket('library', 'terms', field='library_pid')
+        loans_search.aggs.bucket(
+            'overdue', 'filter',
+            filter=on_loan & Q('range', end_date={'lte': now}))
+        fees_search = PatronTransactionsSearch()\
+            .filter('term', patron__pid=self.pid)\
+            .filter('term', status='open')\
+            .extra(size=0)
+        fees_search.aggs.metric('engaged', 'sum', field='total_amount')
+        fees_search.aggs.bucket(
+            'overdue', 'filter', filter=Q('term', type='overdue'))\
+            .metric('amount', 'sum', field='total_amount')
+        multi_search = MultiSearch(using=current_search_client)\
+            .add(loans_search)\
+            .add(fees_search)
+        loans, fees = multi_search.execute()
+
+        stats = {
+            'loans': {
+                bucket.key: bucket.doc_count
+                for bucket in loans.aggregations.state.buckets
+            },
+            'checkouts': {
+                bucket.key: bucket.doc_count
+                for bucket in loans.aggregations.on_loan.library.buckets
+            },
+            'overdues': loans.aggregations.overdue.doc_count,
+            'fees': {
+                'engaged': fees.aggregations.engaged.value,
+                'overdue': fees.aggregations.overdue.amount.value
+            }
+        }
+        current_cache.set(
+            key,
+            stats,
+            timeout=current_app.config.get(
+                'RERO_ILS_PATRON_CIRCULATION_STATS_TIMEOUT', 0)
+        )
+        return stats
+
+    @classmethod
+    def clear_circulation_stats(cls, patron_pid):
+        """Remove the cached circulation statistics of a patron.
+
+        :param patron_pid: the patron pid.
+        """
+        current_cache.delete(cls._circulation_stats_key(patron_pid))
+
+    @classmethod
+    def _circulation_stats_key(cls, patron_pid):
+        """Get the cache key of the circulation statistics of a patron."""
+        return f'patron_circulation_stats:{patron_pid}'
+
     def set_keep_history(self, keep_history, dbcommit=True, reindex=True):
         """Set keep_history for patron.
 
@@ -40,10 +40,9 @@ from .utils import user_has_patron
 from ..decorators import check_logged_as_librarian, check_logged_as_patron, \
     check_logged_user_authentication
 from ..items.utils import item_pid_to_object
-from ..loans.api import get_loans_stats_by_patron_pid, get_overdue_loans
+from ..loans.api import get_overdue_loans
 from ..loans.utils import sum_for_fees
 from ..locations.api import Location
-from ..patron_transactions.api import PatronTransaction
 from ..patron_types.api import PatronType, PatronTypesSearch
 from ..users.api import User
 from ..utils import extracted_data_from_ref, get_base_url
@@ -70,17 +69,17 @@ def patron_circulation_informations(patron_pid):
     patron = Patron.get_record_by_pid(patron_pid)
     if not patron:
         abort(404, 'Patron not found')
+    stats = patron.get_circulation_stats()
     preview_amount = 0
-    for loan in get_overdue_loans(patron.pid):
-        preview_amount += sum_for_fees(loan.get_overdue_fees)
-    engaged_amount = PatronTransaction\
-        .get_transactions_total_amount_for_patron(patron.pid, status='open')
+    if stats['overdues']:
+        for loan in get_overdue_loans(patron.pid):
+            preview_amount += sum_for_fees(loan.get_overdue_fees)
     return jsonify({
         'fees': {
-          'engaged': engaged_amount,
+          'engaged': stats['fees']['engaged'],
           'preview': preview_amount
         },
-        'statistics': get_loans_stats_by_patron_pid(patron_pid),
+        'statistics': stats['loans'],
         'messages': patron.get_circulation_messages()
     })
 
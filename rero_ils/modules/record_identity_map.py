@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+#
+# RERO ILS
+# Copyright (C) 2021 RERO
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Request scoped identity map for the ILS records."""
+
+from contextlib import contextmanager
+from functools import wraps
+
+from celery import current_task
+from flask import current_app, g, has_request_context
+
+
+class RecordIdentityMap:
+    """Records loaded during a request or a task.
+
+    Every record is loaded once by uuid and by record class, the following
+    `get_record_by_pid` and `get_record_by_id` calls return the same
+    instance.
+    """
+
+    def __init__(self):
+        """Constructor."""
+        # uuid -> {record class: record}
+        self.records = {}
+        # (pid type, pid value) -> uuid
+        self.pids = {}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def stats(self):
+        """Get the hits and misses counters.
+
+        :return: a dict with the hits, misses and records counters.
+        """
+        return dict(
+            hits=self.hits,
+            misses=self.misses,
+            records=len(self.records)
+        )
+
+    def get_by_id(self, record_cls, id_):
+        """Get a loaded record by uuid.
+
+        :param record_cls: the record class.
+        :param id_: the record uuid.
+        :return: the record or None if it is not loaded yet.
+        """
+        record = self.records.get(str(id_), {}).get(record_cls)
+        if record is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return record
+
+    def get_by_pid(self, record_cls, pid):
+        """Get a loaded record by pid.
+
+        :param record_cls: the record class.
+        :param pid: the record pid value.
+        :return: the record or None if it is not loaded yet.
+        """
+        id_ = self.pids.get((record_cls.provider.pid_type, str(pid)))
+        if id_ is None:
+            self.misses += 1
+            return None
+        return self.get_by_id(record_cls, id_)
+
+    def add(self, record):
+        """Add a loaded record.
+
+        :param record: the record to add.
+        :return: the given record.
+        """
+        id_ = str(record.id)
+        self.records.setdefault(id_, {})[record.__class__] = record
+        if record.get('pid') and record.provider:
+            self.pids[(record.provider.pid_type, str(record['pid']))] = id_
+        return record
+
+    def remove(self, id_):
+        """Remove all the instances of a record.
+
+        :param id_: the record uuid.
+        """
+        id_ = str(id_)
+        self.records.pop(id_, None)
+        self.pids = {
+            key: value for key, value in self.pids.items() if value != id_}
+
+
+def get_record_identity_map():
+    """Get the identity map of the current request or task.
+
+    The identity map is opened with `record_identity_map` or for every
+    request and task if `RERO_ILS_RECORD_IDENTITY_MAP` is set.
+
+    :return: the identity map or None if it is not enabled.
+    """
+    identity_map = g.get('record_identity_map')
+    if identity_map is None \
+            and current_app.config.get('RERO_ILS_RECORD_IDENTITY_MAP') \
+            and (has_request_context() or current_task):
+        identity_map = g.record_identity_map = RecordIdentityMap()
+    return identity_map
+
+
+def close_record_identity_map(exception=None):
+    """Close the identity map of the current request or task.
+
+    It is called at the teardown of each request and application context.
+
+    :param exception: the teardown exception if any.
+    """
+    identity_map = g.pop('record_identity_map', None)
+    if identity_map is not None:
+        current_app.logger.debug(
+            f'Record identity map: {identity_map.stats}')
+
+
+def invalidate_record_identity_map(sender, record, *args, **kwargs):
+    """Remove an updated or deleted record from the identity map.
+
+    :param sender: the signal sender.
+    :param record: the updated or deleted record.
+    """
+    identity_map = g.get('record_identity_map')
+    if identity_map is not None and record.id:
+        identity_map.remove(record.id)
+
+
+@contextmanager
+def record_identity_map():
+    """Use an identity map for the records loaded within the context.
+
+    An already opened identity map is reused.
+
+    :return: the identity map.
+    """
+    identity_map = g.get('record_identity_map')
+    if identity_map is not None:
+        yield identity_map
+        return
+    identity_map = g.record_identity_map = RecordIdentityMap()
+    try:
+        yield identity_map
+    finally:
+        close_record_identity_map()
+
+
+def with_record_identity_map(func):
+    """Decorator to use an identity map for a view or a task."""
+    @wraps(func)
+    def decorated_view(*args, **kwargs):
+        with record_identity_map():
+            return func(*args, **kwargs)
+    return decorated_view
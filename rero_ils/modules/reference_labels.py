@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+#
+# RERO ILS
+# Copyright (C) 2021 RERO
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Cached labels of the reference records.
+
+The names of the organisations, libraries, locations and item types, with a
+few other fields, are loaded by resource with one search and kept in the
+application cache, shared by all the workers. Each process keeps a local
+copy by application in front of it. The serializers and the organisation
+view codes use them instead of loading the records one by one. The cached
+records are updated when a record is created, updated or deleted (see
+`update_reference_label` and `remove_reference_label`).
+"""
+
+import time
+
+from flask import current_app
+from invenio_cache.proxies import current_cache
+from invenio_records_rest.utils import obj_or_import_string
+
+from .utils import extracted_data_from_ref
+
+
+def get_reference_records(pid_type, reload=False):
+    """Get the cached fields of all the records of a resource.
+
+    The local copy is used during `RERO_ILS_REFERENCE_LABELS_LOCAL_TIMEOUT`
+    seconds.
+
+    :param pid_type: the resource pid type.
+    :param reload: if True, load the records again unless they were loaded
+        less than `RERO_ILS_REFERENCE_LABELS_RELOAD_DELAY` seconds ago.
+    :return: a dict with the record fields by pid.
+    """
+    local_tables = _get_local_tables()
+    now = time.monotonic()
+    if not reload and local_tables.get(pid_type, (0, None))[0] > now:
+        return local_tables[pid_type][1]
+    key = _reference_labels_key(pid_type)
+    table = current_cache.get(key)
+    if table is None or reload and time.time() - table['loaded'] > \
+            current_app.config.get('RERO_ILS_REFERENCE_LABELS_RELOAD_DELAY',
+                                   0):
+        table = {
+            'loaded': time.time(),
+            'records': load_reference_records(pid_type)
+        }
+        _set_reference_table(key, table)
+    local_tables[pid_type] = (
+        now + current_app.config.get(
+            'RERO_ILS_REFERENCE_LABELS_LOCAL_TIMEOUT', 0),
+        table['records']
+    )
+    return table['records']
+
+
+def get_reference_record(pid_type, pid):
+    """Get the cached fields of a record.
+
+    The records of the resource are loaded again if the record is not known
+    yet, at most once by reload delay.
+
+    :param pid_type: the resource pid type.
+    :param pid: the record pid.
+    :return: a dict with the record fields or None if the record does not
+        exist.
+    """
+    record = get_reference_records(pid_type).get(pid)
+    if record is None:
+        record = get_reference_records(pid_type, reload=True).get(pid)
+    return record
+
+
+def get_reference_labels(pid_type):
+    """Get the labels of all the records of a resource.
+
+    :param pid_type: the resource pid type.
+    :return: a dict with the record labels by pid.
+    """
+    label = _get_fields(pid_type)[0]
+    return {
+        pid: record[label]
+        for pid, record in get_reference_records(pid_type).items()
+    }
+
+
+def get_reference_label(pid_type, pid):
+    """Get the label of a record.
+
+    :param pid_type: the resource pid type.
+    :param pid: the record pid.
+    :return: the record label or None if the record does not exist.
+    """
+    record = get_reference_record(pid_type, pid)
+    if record is not None:
+        return record[_get_fields(pid_type)[0]]
+
+
+def load_reference_records(pid_type):
+    """Load the cached fields of all the records of a resource.
+
+    :param pid_type: the resource pid type.
+    :return: a dict with the record fields by pid.
+    """
+    fields = _get_fields(pid_type)
+    search_class = obj_or_import_string(
+        current_app.config.get('RECORDS_REST_ENDPOINTS')[pid_type][
+            'search_class'])
+    query = search_class().source(['pid'] + fields)
+    return {
+        hit.pid: _get_record_fields(hit.to_dict(), fields)
+        for hit in query.scan()
+    }
+
+
+def clear_reference_labels(pid_type):
+    """Remove the cached records of a resource and its local copy.
+
+    :param pid_type: the resource pid type.
+    """
+    _get_local_tables().pop(pid_type, None)
+    current_cache.delete(_reference_labels_key(pid_type))
+
+
+def warm_reference_labels():
+    """Load the cached records of all the resources."""
+    for pid_type in current_app.config.get('RERO_ILS_REFERENCE_LABELS', {}):
+        try:
+            get_reference_records(pid_type)
+        except Exception as error:
+            current_app.logger.warning(
+                f'Can not load the reference records {pid_type}: {error}')
+
+
+def update_reference_label(sender, record=None, *args, **kwargs):
+    """Update the cached fields of a created or updated record.
+
+    The fields are taken from the record as the index can be not up to date
+    yet when the signal is sent.
+
+    :param sender: the sender of the signal.
+    :param record: the created or updated record.
+    """
+    _set_reference_record(record, deleted=False)
+
+
+def remove_reference_label(sender, record=None, *args, **kwargs):
+    """Remove the cached fields of a deleted record.
+
+    :param sender: the sender of the signal.
+    :param record: the deleted record.
+    """
+    _set_reference_record(record, deleted=True)
+
+
+def _get_local_tables():
+    """Get the local copies of the cached records of the application."""
+    return current_app.extensions.setdefault(
+        'rero-ils-reference-labels', {})
+
+
+def _get_pid_type(record):
+    """Get the pid type of a record."""
+    return getattr(getattr(record, 'provider', None), 'pid_type', None)
+
+
+def _get_fields(pid_type):
+    """Get the cached fields of a resource, the label first."""
+    return current_app.config.get('RERO_ILS_REFERENCE_LABELS')[pid_type]
+
+
+def _get_record_fields(data, fields):
+    """Get the values of dotted fields from record or index data.
+
+    A linked record (`$ref`) gives its pid as from the index data.
+
+    :param data: the record or index data.
+    :param fields: the dotted fields.
+    :return: a dict with the value by field.
+    """
+    values = {}
+    for field in fields:
+        value = data
+        for key in field.split('.'):
+            if not isinstance(value, dict):
+                value = None
+                break
+            if key == 'pid' and '$ref' in value:
+                value = extracted_data_from_ref(value)
+            else:
+                value = value.get(key)
+        values[field] = value
+    return values
+
+
+def _set_reference_record(record, deleted):
+    """Set or remove a record in the cached records.
+
+    :param record: the record.
+    :param deleted: True to remove the record.
+    """
+    pid_type = _get_pid_type(record)
+    if pid_type not in current_app.config.get(
+            'RERO_ILS_REFERENCE_LABELS', {}) or not record.get('pid'):
+        return
+    _get_local_tables().pop(pid_type, None)
+    key = _reference_labels_key(pid_type)
+    table = current_cache.get(key)
+    if table is None:
+        return
+    if deleted:
+        table['records'].pop(record['pid'], None)
+    else:
+        table['records'][record['pid']] = _get_record_fields(
+            record, _get_fields(pid_type))
+    _set_reference_table(key, table)
+
+
+def _set_reference_table(key, table):
+    """Store the cached records of a resource."""
+    current_cache.set(
+        key,
+        table,
+        timeout=current_app.config.get('RERO_ILS_REFERENCE_LABELS_TIMEOUT', 0)
+    )
+
+
+def _reference_labels_key(pid_type):
+    """Get the cache key of the records of a resource."""
+    return f'reference_labels:{pid_type}'
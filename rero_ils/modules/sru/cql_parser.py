@@ -24,6 +24,7 @@ Author:  Rob Sanderson (azaroth@liv.ac.uk)
 Version: 2.0    (CQL 1.2)
 With thanks to Adam Dickmeiss and Mike Taylor for their valuable input.
 """
+from functools import lru_cache
 from io import StringIO
 from shlex import shlex
 
@@ -997,6 +998,21 @@ def parse(query):
     return query
 
 
+@lru_cache(maxsize=1000)
+def to_es_query(query):
+    """Return the Elasticsearch query string for a CQL string.
+
+    The translation only depends on the CQL string and on the documents
+    index mappings (read from Elasticsearch for every term), the results are
+    cached as SRU clients tend to replay the same query while paging. A
+    malformed query raises a `Diagnostic` which is not cached.
+
+    :param query: the CQL query string.
+    :returns: the Elasticsearch query string.
+    """
+    return parse(query).to_es()
+
+
 # Assign our objects to generate
 TripleType = Triple
 BooleanType = Boolean
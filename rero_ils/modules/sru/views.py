@@ -25,7 +25,7 @@ from invenio_rest import ContentNegotiatedMethodView
 from werkzeug.exceptions import HTTPException
 from werkzeug.wrappers import Response
 
-from .cql_parser import Diagnostic, parse
+from .cql_parser import Diagnostic, to_es_query
 from .explaine import Explain
 from ..documents.api import DocumentsSearch, document_id_fetcher
 from ..documents.serializers import json_doc_search, xml_dc_search, \
@@ -76,17 +76,21 @@ class SRUDocumentsSearch(ContentNegotiatedMethodView):
         # query_string = flask_request.args.get('q', None)
         if operation == 'searchRetrieve' and query:  # or query_string:
             try:
-                query_string = parse(query).to_es()
+                query_string = to_es_query(query)
             except Diagnostic as err:
                 response = Response(err.xml_str())
                 response.headers['content-type'] = 'application/xml'
                 raise HTTPException(response=response)
 
-            search = DocumentsSearch().query(
-                'query_string', query=query_string)
+            search = DocumentsSearch() \
+                .query('query_string', query=query_string) \
+                .extra(track_total_hits=current_app.config.get(
+                    'RERO_SRU_TRACK_TOTAL_HITS', True))
             records = []
             search = search[(start_record-1):maximum_records+(start_record-1)]
-            for hit in search.execute():
+            # the total is taken from the same response, no extra count
+            results = search.execute()
+            for hit in results:
                 records.append({
                     '_id': hit.meta.id,
                     '_index': hit.meta.index,
@@ -97,10 +101,7 @@ class SRUDocumentsSearch(ContentNegotiatedMethodView):
             result = {
                 'hits': {
                     'hits': records,
-                    'total': {
-                        'value': search.count(),
-                        'relation': 'eq'
-                    },
+                    'total': results.hits.total.to_dict(),
                     'sru': {
                         'query': query,
                         'query_es': query_string,
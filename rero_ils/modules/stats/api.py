@@ -21,7 +21,9 @@ from functools import partial
 
 import arrow
 from dateutil.relativedelta import relativedelta
+from elasticsearch_dsl import MultiSearch, Q
 from flask import current_app
+from invenio_search import current_search_client
 from invenio_search.api import RecordsSearch
 
 from .models import StatIdentifier, StatMetadata
@@ -85,7 +87,59 @@ class StatsForPricing:
         return LibrariesSearch().source(['pid', 'name', 'organisation']).scan()
 
     def collect(self):
-        """Compute all the statistics."""
+        """Compute all the statistics.
+
+        Every metric is computed for all the libraries at once: the counts
+        are aggregated by library (or organisation) with one filters
+        aggregation per metric, all sent in one multi search request, and
+        joined in memory.
+
+        :return: a list of statistics, one by library.
+        """
+        libraries = list(self.get_all_libraries())
+        if not libraries:
+            return []
+        library_pids = [lib.pid for lib in libraries]
+        organisation_pids = list(dict.fromkeys(
+            lib.organisation.pid for lib in libraries))
+        counts = self.counts_by_library(library_pids, organisation_pids)
+        active_patrons = self.active_patrons_by_library(library_pids)
+        ill_requests = self.satisfied_ill_requests_by_library(library_pids)
+        stats = []
+        for lib in libraries:
+            pid = lib.pid
+            org_pid = lib.organisation.pid
+            stats.append({
+                'library': {
+                    'pid': pid,
+                    'name': lib.name
+                },
+                'number_of_documents': counts['documents'][pid],
+                'number_of_libraries': counts['libraries'][org_pid],
+                'number_of_librarians': counts['librarians'][pid],
+                'number_of_active_patrons': len(active_patrons.get(pid, [])),
+                'number_of_order_lines': counts['order_lines'][pid],
+                'number_of_checkouts': counts['checkout'][pid],
+                'number_of_renewals': counts['extend'][pid],
+                'number_of_satisfied_ill_request':
+                    len(ill_requests.get(pid, [])),
+                'number_of_items': counts['items'][pid],
+                'number_of_new_items': counts['new_items'][pid],
+                'number_of_deleted_items': counts['deleted_items'][pid],
+                'number_of_patrons': counts['patrons'][org_pid],
+                'number_of_new_patrons': counts['patrons'][org_pid],
+                'number_of_checkins': counts['checkin'][pid],
+                'number_of_requests': counts['request'][pid]
+            })
+        return stats
+
+    def collect_by_library(self):
+        """Compute all the statistics with separated queries by library.
+
+        The result is the same as `collect`.
+
+        :return: a list of statistics, one by library.
+        """
         stats = []
         for lib in self.get_all_libraries():
             stats.append({
@@ -121,6 +175,116 @@ class StatsForPricing:
             })
         return stats
 
+    @staticmethod
+    def count_by(search, field, values):
+        """Add an aggregation counting the documents by field value.
+
+        A filters aggregation is used to apply exactly the same term
+        filter as the single library queries.
+
+        :param search: the search to count.
+        :param field: the field to filter with.
+        :param values: the field values.
+        :return: the search with the `count_by` aggregation.
+        """
+        search = search.extra(size=0)
+        search.aggs.bucket('count_by', 'filters', filters={
+            value: Q('term', **{field: value}) for value in values
+        })
+        return search
+
+    def counts_by_library(self, library_pids, organisation_pids):
+        """Count the documents of every metric by library.
+
+        :param library_pids: list of library pids.
+        :param organisation_pids: list of organisation pids.
+        :return: a dict of metric name: dict of library or organisation pid:
+            count.
+        """
+        logs_search = RecordsSearch(index=LoanOperationLog.index_name)\
+            .filter('range', date=self.date_range)
+        searches = {
+            'documents': self.count_by(
+                DocumentsSearch(), 'holdings.organisation.library_pid',
+                library_pids),
+            'libraries': self.count_by(
+                LibrariesSearch(), 'organisation.pid', organisation_pids),
+            'librarians': self.count_by(
+                PatronsSearch().filter('term', roles='librarian'),
+                'libraries.pid', library_pids),
+            'order_lines': self.count_by(
+                AcqOrderLinesSearch()
+                .filter('range', _created=self.date_range),
+                'library.pid', library_pids),
+            'items': self.count_by(
+                ItemsSearch(), 'library.pid', library_pids),
+            'new_items': self.count_by(
+                ItemsSearch().filter('range', _created=self.date_range),
+                'library.pid', library_pids),
+            'deleted_items': self.count_by(
+                logs_search
+                .filter('term', operation='delete')
+                .filter('term', record__type='item'),
+                'library.pid', library_pids),
+            'patrons': self.count_by(
+                PatronsSearch().filter('term', roles='patron'),
+                'organisation.pid', organisation_pids)
+        }
+        for trigger in ['checkout', 'extend', 'checkin', 'request']:
+            searches[trigger] = self.count_by(
+                logs_search.filter('term', loan__trigger=trigger),
+                'loan.item.library_pid', library_pids)
+
+        multi_search = MultiSearch(using=current_search_client)
+        for search in searches.values():
+            multi_search = multi_search.add(search)
+        counts = {}
+        for name, response in zip(searches, multi_search.execute()):
+            buckets = response.aggregations.count_by.buckets.to_dict()
+            counts[name] = {
+                value: bucket['doc_count']
+                for value, bucket in buckets.items()
+            }
+        return counts
+
+    def active_patrons_by_library(self, library_pids):
+        """Patrons who did a transaction in the past 365 days by library.
+
+        :param library_pids: list of library pids.
+        :return: a dict of library pid: set of hashed patron pids.
+        """
+        _to = self.to_date.format(fmt='YYYY-MM-DDT23:59:59')
+        _from = (self.to_date - relativedelta(months=12))\
+            .format(fmt='YYYY-MM-DDT00:00:00')
+        date_range = {'gte': _from, 'lte': _to}
+        patrons = {}
+        for res in RecordsSearch(index=LoanOperationLog.index_name)\
+                .filter('range', date=date_range)\
+                .filter('terms', loan__trigger=['checkout', 'extend'])\
+                .filter('terms', loan__item__library_pid=library_pids)\
+                .source(['loan'])\
+                .scan():
+            patrons.setdefault(res.loan.item.library_pid, set())\
+                .add(res.loan.patron.hashed_pid)
+        return patrons
+
+    def satisfied_ill_requests_by_library(self, library_pids):
+        """ILL requests created during the specified timeframe by library.
+
+        :param library_pids: list of library pids.
+        :return: a dict of library pid: set of ILL request pids.
+        """
+        requests = {}
+        for res in RecordsSearch(index=LoanOperationLog.index_name)\
+                .filter('range', date=self.date_range)\
+                .filter('term', record__type='illr')\
+                .filter('terms', library__pid=library_pids)\
+                .filter('term', ill_request__status='validated')\
+                .source(['record', 'library'])\
+                .scan():
+            requests.setdefault(res.library.pid, set()).add(res.record.pid)
+        return requests
+
     def number_of_documents(self, library_pid):
         """Number of documents linked to my library.
 
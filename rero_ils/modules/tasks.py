@@ -21,6 +21,7 @@
 from celery import shared_task
 
 from .api import IlsRecordsIndexer
+from .indexer_utils import PartitionedReindex, ReindexQueue
 from .utils import set_timestamp
 
 
@@ -59,6 +60,26 @@ def delete_record(record_uuid):
     IlsRecordsIndexer().delete_by_id(record_uuid)
 
 
+@shared_task(ignore_result=True)
+def flush_reindex_queue():
+    """Reindex the records queued by the reindex queue.
+
+    :return: the number of reindexed records.
+    """
+    return ReindexQueue.flush()
+
+
+@shared_task(ignore_result=True)
+def index_partition(run, partition_id):
+    """Index the records of a partitioned reindex partition.
+
+    :param run: the partitioned reindex run name.
+    :param partition_id: the partition id.
+    :return: the partition statistics.
+    """
+    return PartitionedReindex(run).index_partition(partition_id)
+
+
 @shared_task(ignore_result=True)
 def scheduler_timestamp():
     """Writes a time stamp to current cache."""
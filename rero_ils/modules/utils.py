@@ -17,15 +17,20 @@
 
 """Utilities for rero-ils editor."""
 
+import codecs
 import cProfile
+import mmap
 import os
 import pstats
+import re
 import unicodedata
+from copy import deepcopy
 from datetime import date, datetime, time
 from functools import wraps
 from io import StringIO
+from itertools import islice
 from json import JSONDecodeError, JSONDecoder, dumps
-from time import sleep
+from time import monotonic, sleep
 
 import click
 import psycopg2
@@ -33,9 +38,11 @@ import pytz
 import requests
 import sqlalchemy
 from dateutil import parser
-from flask import current_app, session
+from elasticsearch.exceptions import TransportError
+from flask import current_app, g, has_app_context, session
 from flask_login import current_user
 from invenio_cache.proxies import current_cache
+from invenio_db import db
 from invenio_pidstore.models import PersistentIdentifier
 from invenio_records_rest.utils import obj_or_import_string
 from lazyreader import lazyread
@@ -136,40 +143,90 @@ def date_string_to_utc(date):
     return pytz.utc.localize(parsed_date)
 
 
-def read_json_record(json_file, buf_size=1024, decoder=JSONDecoder()):
+# whitespaces, delimiters and end of array between json records
+JSON_RECORDS_SEPARATORS = re.compile(r'[\s,\]]*')
+
+
+def read_json_record(json_file, buf_size=65536, decoder=None,
+                     use_mmap=False):
     """Read lasy json records from file.
 
+    The file contains a json array of records or a sequence of records.
+    Each record is decoded once it is complete in the buffer, the read
+    size is doubled while a record is incomplete and only the not decoded
+    data is kept in memory.
+
     :param json_file: json file handle
     :param buf_size: buffer size for file read
-    :param decoder: decoder to use for decoding
+    :param decoder: decoder to use for decoding, newlines are allowed in
+        strings by default
+    :param use_mmap: map a local file in memory instead of reading it
     :return: record Generator
     """
-    buffer = json_file.read(2).replace('\n', '')
-    # we have to delete the first [ for an list of records
-    if buffer.startswith('['):
-        buffer = buffer[1:].lstrip()
-    while True:
-        block = json_file.read(buf_size)
-        if not block:
-            break
-        buffer += block.replace('\n', '')
+    decoder = decoder or JSONDecoder(strict=False)
+    mapped = None
+
+    def read(size):
+        """Read a block of the file.
+
+        :return: the read text and True at the end of the file.
+        """
+        block = json_file.read(size)
+        return block, not block
+
+    if use_mmap:
+        try:
+            mapped = mmap.mmap(json_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (AttributeError, OSError, ValueError):
+            # not a local file or an empty file
+            pass
+        else:
+            utf8_decoder = codecs.getincrementaldecoder('utf-8')()
+
+            def read(size):
+                """Read and decode a block of the mapped file.
+
+                A block can end within a multibyte character: its text is
+                then shorter, or empty, without being the end of the file.
+
+                :return: the read text and True at the end of the file.
+                """
+                block = mapped.read(size)
+                return utf8_decoder.decode(block, final=not block), not block
+    try:
+        buffer = ''
         pos = 0
+        size = buf_size
+        first = True
+        eof = False
         while True:
-            try:
-                buffer = buffer.lstrip()
-                obj, pos = decoder.raw_decode(buffer)
-            except JSONDecodeError:
+            pos = JSON_RECORDS_SEPARATORS.match(buffer, pos).end()
+            if pos < len(buffer):
+                if first and buffer[pos] == '[':
+                    # we have to delete the first [ for an list of records
+                    pos += 1
+                    first = False
+                    continue
+                first = False
+                try:
+                    obj, pos = decoder.raw_decode(buffer, pos)
+                except JSONDecodeError:
+                    if eof:
+                        raise
+                    # incomplete record
+                    size *= 2
+                else:
+                    yield obj
+                    size = buf_size
+                    continue
+            elif eof:
                 break
-            else:
-                yield obj
-                buffer = buffer[pos:].lstrip()
-
-                if len(buffer) <= 0:
-                    # buffer is empty read more data
-                    buffer = json_file.read(buf_size)
-                if buffer.startswith(','):
-                    # delete records deliminators
-                    buffer = buffer[1:].lstrip()
+            block, eof = read(size)
+            buffer = buffer[pos:] + block
+            pos = 0
+    finally:
+        if mapped is not None:
+            mapped.close()
 
 
 def lazyxmlstrings(file, opening_tag, closing_tag):
@@ -214,6 +271,31 @@ def read_xml_record(xml_file):
         yield xml_record
 
 
+def read_xml_records(xml_file, tag='record'):
+    """Read xml records from file with a streaming parser.
+
+    The records are parsed one by one and released once read, the memory
+    used does not depend on the size of the file. The namespaces are
+    removed from the records like for `read_xml_record`.
+
+    :param xml_file: xml file to parse (opened in binary mode or path).
+    :param tag: the tag name of the records.
+    :return: record Generator
+    """
+    for _, element in etree.iterparse(xml_file, events=('end',),
+                                      tag=f'{{*}}{tag}', huge_tree=True):
+        for child in element.iter():
+            if isinstance(child.tag, str):
+                child.tag = etree.QName(child).localname
+        record = deepcopy(element)
+        etree.cleanup_namespaces(record)
+        yield record
+        # release the parsed records
+        element.clear()
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+
+
 def get_record_class_and_permissions_from_route(route_name):
     """Get record class and permission factories for a record route name."""
     endpoints = current_app.config.get('RECORDS_REST_ENDPOINTS')
@@ -401,6 +483,96 @@ def get_schema_for_resource(resource):
         )
 
 
+def add_known_pid(pid_type, pid):
+    """Add an existing pid to the known pids of the current context.
+
+    The known pids are kept in the application context (a request, a task
+    or a cli command) during `RERO_ILS_KNOWN_PIDS_TIMEOUT` seconds. They are
+    fed by the minters and by `get_existing_pids`.
+
+    :param pid_type: the pid type.
+    :param pid: the pid value.
+    """
+    timeout = current_app.config.get('RERO_ILS_KNOWN_PIDS_TIMEOUT', 60)
+    if not timeout:
+        return
+    known_pids = g.setdefault('known_pids', {})
+    now = monotonic()
+    if len(known_pids) >= current_app.config.get(
+            'RERO_ILS_KNOWN_PIDS_MAX_SIZE', 100000):
+        # remove the expired pids or start over
+        for key in [key for key, expire in known_pids.items()
+                    if expire <= now]:
+            del known_pids[key]
+        if len(known_pids) >= current_app.config.get(
+                'RERO_ILS_KNOWN_PIDS_MAX_SIZE', 100000):
+            known_pids.clear()
+    known_pids[(str(pid_type), str(pid))] = now + timeout
+
+
+def remove_known_pid(pid_type, pid):
+    """Remove a pid from the known pids of the current context.
+
+    :param pid_type: the pid type.
+    :param pid: the pid value.
+    """
+    g.get('known_pids', {}).pop((str(pid_type), str(pid)), None)
+
+
+def clear_known_pids(*args, **kwargs):
+    """Forget all the known pids of the current context.
+
+    It is called after a database rollback as the minted pids may have
+    been rolled back.
+    """
+    if has_app_context():
+        g.pop('known_pids', None)
+
+
+def is_known_pid(pid_type, pid):
+    """Check if a pid is a known existing pid of the current context.
+
+    :param pid_type: the pid type.
+    :param pid: the pid value.
+    :return: True if the pid is known.
+    """
+    expire = g.get('known_pids', {}).get((str(pid_type), str(pid)))
+    return expire is not None and expire > monotonic()
+
+
+def get_existing_pids(pids, chunk_size=1000):
+    """Get the existing pids with grouped queries.
+
+    The known pids are not queried, the others are queried with one
+    `pid_type = ... AND pid_value IN (...)` condition by pid type.
+
+    :param pids: iterable of (pid type, pid value) tuples.
+    :param chunk_size: maximum number of pids by query.
+    :return: the set of existing (pid type, pid value) tuples.
+    """
+    pids = {(str(pid_type), str(pid)) for pid_type, pid in pids}
+    existing_pids = {pid for pid in pids if is_known_pid(*pid)}
+    pids_by_type = {}
+    for pid_type, pid in pids - existing_pids:
+        pids_by_type.setdefault(pid_type, []).append(pid)
+    conditions = [
+        sqlalchemy.and_(
+            PersistentIdentifier.pid_type == pid_type,
+            PersistentIdentifier.pid_value.in_(values)
+        )
+        for pid_type, pid_values in pids_by_type.items()
+        for values in chunks(pid_values, chunk_size)
+    ]
+    for conditions_chunk in chunks(conditions, 10):
+        query = db.session.query(
+            PersistentIdentifier.pid_type, PersistentIdentifier.pid_value
+        ).filter(sqlalchemy.or_(*conditions_chunk))
+        for pid_type, pid_value in query:
+            add_known_pid(pid_type, pid_value)
+            existing_pids.add((pid_type, pid_value))
+    return existing_pids
+
+
 def pid_exists(info, pid_type, pid, raise_on_error=False):
     """Test pid exist in pid_type.
 
@@ -409,9 +581,12 @@ def pid_exists(info, pid_type, pid, raise_on_error=False):
     :param raise_on_error: Raise PidDoesNotExist exception if enabled.
     :return: True if pid was found. Otherwise False.
     """
+    if is_known_pid(pid_type, pid):
+        return True
     if PersistentIdentifier.query.filter_by(
         pid_type=str(pid_type), pid_value=str(pid)
     ).count() == 1:
+        add_known_pid(pid_type, pid)
         return True
     else:
         if raise_on_error:
@@ -420,9 +595,47 @@ def pid_exists(info, pid_type, pid, raise_on_error=False):
         return False
 
 
+def get_data_pid(pid_type, data_to_test):
+    """Get the pid of a linked resource.
+
+    :param pid_type: the pid type of the linked resource.
+    :param data_to_test: the link, a dict with a `pid` or a `$ref`.
+    :return: the pid or None if it can not be extracted.
+    """
+    endpoints = current_app.config['RECORDS_REST_ENDPOINTS']
+    try:
+        list_route = endpoints[pid_type]['list_route']
+        return data_to_test.get('pid') or \
+            data_to_test.get('$ref').split(list_route)[1]
+    except Exception:
+        return None
+
+
+def get_pids_in_data(data, required={}, not_required={}):
+    """Get the pids of the linked resources to test.
+
+    :param data: data with information to test.
+    :param required: dictionary with required pid types and key in data.
+    :param not_required: dictionary with not required pid types and keys
+        in data.
+    :return: the set of (pid type, pid value) tuples.
+    """
+    pids = set()
+    for tests in [required, not_required]:
+        for pid_type, key in tests.items():
+            data_to_test = data.get(key)
+            if data_to_test:
+                data_pid = get_data_pid(pid_type, data_to_test)
+                if data_pid:
+                    pids.add((pid_type, str(data_pid)))
+    return pids
+
+
 def pids_exists_in_data(info, data, required={}, not_required={}):
     """Test pid or $ref has valid pid.
 
+    All the pids are tested with one query (see `get_existing_pids`).
+
     :param info:  Info to add to errors description.
     :param data: data with information to test.
     :param required: dictionary with required pid types and key in data to
@@ -431,29 +644,22 @@ def pids_exists_in_data(info, data, required={}, not_required={}):
         in data to test. example {'item', 'item'}
     :return: True if all requirements  Otherwise False.
     """
+    existing_pids = get_existing_pids(
+        get_pids_in_data(data, required, not_required))
+
     def pids_exists_in_data_test(info, data, tests, is_required):
         """Test the pids exists."""
         return_value = []
-        endpoints = current_app.config['RECORDS_REST_ENDPOINTS']
         for pid_type, key in tests.items():
             data_to_test = data.get(key)
             if data_to_test:
-                try:
-                    list_route = endpoints[pid_type]['list_route']
-                    data_pid = data_to_test.get('pid') or \
-                        data_to_test.get('$ref').split(list_route)[1]
-                except Exception:
-                    data_pid = None
+                data_pid = get_data_pid(pid_type, data_to_test)
                 if not data_pid and is_required:
                     return_value.append(
                         f'{info}: No pid found: {pid_type} {data_to_test}'
                     )
                 else:
-                    if not pid_exists(
-                        info=info,
-                        pid_type=pid_type,
-                        pid=data_pid
-                    ):
+                    if (pid_type, str(data_pid)) not in existing_pids:
                         return_value.append(
                             '{info}: {text} {pid_type} {pid}'.format(
                                 info=info,
@@ -947,7 +1153,8 @@ def bulk_save_pidstore(pid_type, file_name, file_name_tmp, verbose=False):
         with open(file_name, "w") as file_out:
             count = 0
             for line in file_in:
-                if pid_type in line:
+                # the third column is the pid type
+                if line.split('\t', 3)[2] == pid_type:
                     count += 1
                     file_out.write(line)
     return count
@@ -1077,3 +1284,65 @@ def sorted_pids(query):
     except Exception as err:
         current_app.logger.info(f'Can not sort pids from query: {err}')
     return pids
+
+
+def chunks(iterable, size):
+    """Split an iterable into lists of a given size.
+
+    :param iterable: the iterable to split.
+    :param size: the maximum size of the lists.
+    :return a generator of lists.
+    """
+    iterator = iter(iterable)
+    chunk = list(islice(iterator, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, size))
+
+
+def search_after_pages(search, size=1000, sort_field='pid'):
+    """Read all the hits of a search by pages with `search_after`.
+
+    The pages are read within a point in time when the Elasticsearch client
+    and cluster support it, the pages are then consistent even if the index
+    is updated during the reading. Only one page is kept in memory, unlike
+    the scroll of `scan` the search context is not bound to the reading
+    duration.
+
+    :param search: the elasticsearch_dsl search.
+    :param size: the number of hits by page.
+    :param sort_field: a unique keyword field to sort the hits.
+    :return: a generator of lists of hits sources.
+    """
+    client = search._get_connection()
+    body = search.extra(size=size, track_total_hits=False) \
+        .sort(sort_field).to_dict()
+    index = search._index
+    pit_id = None
+    try:
+        pit_id = client.open_point_in_time(
+            index=index, keep_alive='5m')['id']
+    except (AttributeError, TransportError):
+        # client or cluster without point in time
+        pass
+    try:
+        while True:
+            if pit_id:
+                body['pit'] = {'id': pit_id, 'keep_alive': '5m'}
+                result = client.search(body=body)
+                pit_id = result.get('pit_id', pit_id)
+            else:
+                result = client.search(index=index, body=body)
+            hits = result['hits']['hits']
+            if not hits:
+                return
+            yield [hit['_source'] for hit in hits]
+            if len(hits) < size:
+                return
+            body['search_after'] = hits[-1]['sort']
+    finally:
+        if pit_id:
+            try:
+                client.close_point_in_time(body={'id': pit_id})
+            except TransportError:
+                pass
@@ -27,7 +27,6 @@ from ..api import IlsRecord, IlsRecordsIndexer, IlsRecordsSearch
 from ..fetchers import id_fetcher
 from ..minters import id_minter
 from ..providers import Provider
-from ..utils import sorted_pids
 
 # provider
 VendorProvider = type(
@@ -78,43 +77,20 @@ class Vendor(IlsRecord):
             'order_contact', self.get('default_contact', {})
         ).get('email')
 
-    def get_links_to_me(self, get_pids=False):
-        """Record links.
+    @classmethod
+    def get_links_queries(cls, pid):
+        """Get the queries of the records linked to a record.
 
-        :param get_pids: if True list of linked pids
-                         if False count of linked records
+        :param pid: the record pid.
+        :return: a dict with, by link name, the search of the linked records.
         """
         from rero_ils.modules.holdings.api import HoldingsSearch
-        acq_orders_query = AcqOrdersSearch()\
-            .filter('term', vendor__pid=self.pid)
-        acq_invoices_query = AcquisitionInvoicesSearch()\
-            .filter('term', vendor__pid=self.pid)
-        hold_query = HoldingsSearch()\
-            .filter('term', vendor__pid=self.pid)
-        links = {}
-        if get_pids:
-            acq_orders = sorted_pids(acq_orders_query)
-            acq_invoices = sorted_pids(acq_invoices_query)
-            holdings = sorted_pids(hold_query)
-        else:
-            acq_orders = acq_orders_query.count()
-            acq_invoices = acq_invoices_query.count()
-            holdings = hold_query.count()
-        if acq_orders:
-            links['acq_orders'] = acq_orders
-        if acq_invoices:
-            links['acq_invoices'] = acq_invoices
-        if holdings:
-            links['holdings'] = holdings
-        return links
-
-    def reasons_not_to_delete(self):
-        """Get reasons not to delete record."""
-        cannot_delete = {}
-        links = self.get_links_to_me()
-        if links:
-            cannot_delete['links'] = links
-        return cannot_delete
+        return {
+            'acq_orders': AcqOrdersSearch().filter('term', vendor__pid=pid),
+            'acq_invoices': AcquisitionInvoicesSearch()
+            .filter('term', vendor__pid=pid),
+            'holdings': HoldingsSearch().filter('term', vendor__pid=pid)
+        }
 
 
 class VendorsIndexer(IlsRecordsIndexer):
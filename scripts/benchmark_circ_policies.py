@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+#
+# RERO ILS
+# Copyright (C) 2021 RERO
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Script to benchmark the circulation policy resolution.
+
+Each round checks if the given items can be requested and checked out by the
+given patron, with a cold circulation policies table (cleared before each
+check, which is close to the previous search based resolution) and with a
+warm one.
+
+Example of execution:
+python benchmark_circ_policies.py [patron_pid] [rounds] [item_pid ...]
+python benchmark_circ_policies.py 1 100 1 2 3 4 5
+"""
+
+import sys
+import time
+
+from invenio_app.factory import create_app
+
+from rero_ils.modules.circ_policies.api import CircPolicy
+from rero_ils.modules.items.api import Item
+from rero_ils.modules.items.models import ItemCirculationAction
+from rero_ils.modules.patrons.api import Patron
+
+
+def check_actions(items, patron, action, cold):
+    """Check if the action is allowed for all items.
+
+    :param list items: the items to check.
+    :param patron: the patron.
+    :param str action: the circulation action to check.
+    :param bool cold: clear the policies table before each check.
+    :return: the number of checks.
+    """
+    for item in items:
+        if cold:
+            CircPolicy.clear_policies_table(item.organisation_pid)
+        item.can(action, patron=patron)
+    return len(items)
+
+
+if __name__ == "__main__":
+    PATRON_PID = sys.argv[1]
+    ROUNDS = int(sys.argv[2])
+    ITEM_PIDS = sys.argv[3:]
+
+    app = create_app()
+    with app.app_context():
+        PATRON = Patron.get_record_by_pid(PATRON_PID)
+        ITEMS = [Item.get_record_by_pid(pid) for pid in ITEM_PIDS]
+        for ACTION in [ItemCirculationAction.REQUEST,
+                       ItemCirculationAction.CHECKOUT]:
+            for COLD in [True, False]:
+                start_time = time.time()
+                count = 0
+                for _ in range(ROUNDS):
+                    count += check_actions(ITEMS, PATRON, ACTION, COLD)
+                duration = time.time() - start_time
+                cache = 'cold' if COLD else 'warm'
+                print(
+                    f'{ACTION:>10} ({cache}): {count} checks in '
+                    f'{duration:.2f}s ({duration / count * 1000:.2f}ms/check)'
+                )
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+#
+# RERO ILS
+# Copyright (C) 2021 RERO
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Script to benchmark the holdings issues predictions.
+
+The issues of the patterns of `data/patterns.json` set to a daily
+frequency are predicted one by one, with the code used before the one pass
+predictions (a template compiled and an increment of the patterns by
+issue), and in one pass.
+
+Example of execution:
+python benchmark_holdings_predictions.py [number_of_predictions] [repeat]
+python benchmark_holdings_predictions.py 100 10
+"""
+
+import json
+import os
+import sys
+import time
+from copy import deepcopy
+from datetime import datetime
+
+from invenio_app.factory import create_app
+
+from rero_ils.modules.holdings.api import JINJA_ENV, Holding
+
+
+def load_patterns():
+    """Load the sample patterns with a daily frequency.
+
+    :return: a list of patterns.
+    """
+    file_name = os.path.join(
+        os.path.dirname(__file__), '..', 'data', 'patterns.json')
+    with open(file_name) as patterns_file:
+        patterns = [
+            holding['patterns'] for holding in json.load(patterns_file)]
+    for pattern in patterns:
+        pattern['frequency'] = 'rdafr:1001'  # Daily
+    return patterns
+
+
+def get_next_issue_display_text(patterns):
+    """Display the text of the next issue as before the one pass predictions.
+
+    The template is compiled for each issue.
+
+    :param dict patterns: the holdings patterns.
+    :return: the display text and the expected date of the next issue.
+    """
+    issue_data = {}
+    for pattern in patterns.get('values', []):
+        level_data = {}
+        for level in pattern.get('levels', []):
+            text_value = level.get('next_value', level.get(
+                'starting_value', 1))
+            mapping = level.get('mapping_values')
+            if mapping:
+                text_value = mapping[text_value - 1]
+            level_data[level.get(
+                'number_name', level.get('list_name'))] = str(text_value)
+        issue_data[pattern.get('name', '')] = level_data
+    tmpl = JINJA_ENV.from_string(patterns.get('template'))
+    next_expected_date = patterns.get('next_expected_date')
+    expected_date = datetime.strptime(next_expected_date, '%Y-%m-%d')
+    issue_data['next_expected_date'] = next_expected_date
+    issue_data['expected_date'] = {
+        'day': expected_date.day,
+        'month': expected_date.month,
+        'year': expected_date.year
+    }
+    return tmpl.render(**issue_data), next_expected_date
+
+
+def predict_one_by_one(patterns, predictions):
+    """Predict the issues with one increment of the patterns by issue.
+
+    :param dict patterns: the holdings patterns.
+    :param int predictions: the number of issues to predict.
+    """
+    patterns = deepcopy(patterns)
+    for _ in range(predictions):
+        get_next_issue_display_text(patterns)
+        patterns = Holding._increment_next_prediction(patterns)
+
+
+def predict_in_one_pass(patterns, predictions):
+    """Predict the issues in one pass.
+
+    :param dict patterns: the holdings patterns.
+    :param int predictions: the number of issues to predict.
+    """
+    Holding.predict_issues(patterns, predictions)
+
+
+if __name__ == "__main__":
+    PREDICTIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    REPEAT = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    app = create_app()
+    with app.app_context():
+        PATTERNS = load_patterns()
+        for NAME, PREDICT in [('one by one', predict_one_by_one),
+                              ('one pass', predict_in_one_pass)]:
+            start_time = time.time()
+            for _ in range(REPEAT):
+                for patterns in PATTERNS:
+                    PREDICT(patterns, PREDICTIONS)
+            duration = time.time() - start_time
+            COUNT = REPEAT * len(PATTERNS) * PREDICTIONS
+            print(
+                f'{NAME:>10}: {COUNT} predictions in {duration:.2f}s '
+                f'({COUNT / duration:.2f} predictions/s)'
+            )
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+#
+# RERO ILS
+# Copyright (C) 2021 RERO
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Script to benchmark the checkout throughput by indexer refresh mode.
+
+Each round checks out and checks in the given items for the given patron
+using one indexer refresh mode ('true', 'wait_for' and 'deferred').
+
+Example of execution:
+python benchmark_indexer_refresh.py [patron_pid] [librarian_pid] [rounds]
+    [item_pid ...]
+python benchmark_indexer_refresh.py 1 2 5 1 2 3 4 5
+"""
+
+import sys
+import time
+
+from invenio_app.factory import create_app
+
+from rero_ils.modules.indexer_utils import IndexerRefresh, indexer_refresh, \
+    refresh_deferred_indices
+from rero_ils.modules.items.api import Item
+from rero_ils.modules.patrons.api import Patron
+
+
+def checkout_checkin(item_pids, patron_pid, librarian_pid, mode):
+    """Checkout and checkin all items with the given refresh mode.
+
+    :param list item_pids: the item pids.
+    :param str patron_pid: the patron pid.
+    :param str librarian_pid: the librarian pid (transaction user).
+    :param str mode: the indexer refresh mode.
+    :return: the number of circulation operations.
+    """
+    patron = Patron.get_record_by_pid(patron_pid)
+    operations = 0
+    with indexer_refresh(mode):
+        for item_pid in item_pids:
+            item = Item.get_record_by_pid(item_pid)
+            item, _ = item.checkout(
+                patron_pid=patron.pid,
+                transaction_location_pid=item.location_pid,
+                transaction_user_pid=librarian_pid,
+                pickup_location_pid=item.location_pid
+            )
+            item, _ = item.checkin(
+                transaction_location_pid=item.location_pid,
+                transaction_user_pid=librarian_pid
+            )
+            operations += 2
+    # the end of a request or a task
+    refresh_deferred_indices()
+    return operations
+
+
+if __name__ == "__main__":
+    PATRON_PID = sys.argv[1]
+    LIBRARIAN_PID = sys.argv[2]
+    ROUNDS = int(sys.argv[3])
+    ITEM_PIDS = sys.argv[4:]
+
+    app = create_app()
+    with app.app_context():
+        for MODE in [IndexerRefresh.TRUE, IndexerRefresh.WAIT_FOR,
+                     IndexerRefresh.DEFERRED]:
+            start_time = time.time()
+            count = 0
+            for _ in range(ROUNDS):
+                count += checkout_checkin(
+                    ITEM_PIDS, PATRON_PID, LIBRARIAN_PID, MODE)
+            duration = time.time() - start_time
+            print(
+                f'{MODE:>10}: {count} operations in {duration:.2f}s '
+                f'({count / duration:.2f} operations/s)'
+            )
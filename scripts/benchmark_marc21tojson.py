@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+#
+# RERO ILS
+# Copyright (C) 2021 RERO
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Script to benchmark the marc21 to json transformation throughput.
+
+The given marc21 xml file is transformed and validated with the given
+numbers of worker processes.
+
+Example of execution:
+python benchmark_marc21tojson.py [xml_file] [number_of_processes ...]
+python benchmark_marc21tojson.py ../data/documents_small.xml 1 2 4 8
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from invenio_app.factory import create_app
+from invenio_jsonschemas import current_jsonschemas
+from invenio_records.api import _records_state
+
+from rero_ils.modules.cli import Marc21toJson
+from rero_ils.modules.utils import get_schema_for_resource
+
+
+def transform(xml_file_name, parallel, chunk, schema):
+    """Transform a marc21 xml file into json.
+
+    :param str xml_file_name: the marc21 xml file name.
+    :param int parallel: the number of worker processes.
+    :param int chunk: the number of records by chunk.
+    :param dict schema: the document json schema.
+    :return: the number of records.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir, \
+            open(xml_file_name, 'rb') as xml_file, \
+            open(os.path.join(tmp_dir, 'ok.json'), 'w') as json_file_ok, \
+            open(os.path.join(tmp_dir, 'ko.xml'), 'wb') as xml_file_error:
+        count, _, _ = Marc21toJson(
+            xml_file, json_file_ok, xml_file_error, parallel=parallel,
+            chunk=chunk, schema=schema
+        ).counts()
+    return count
+
+
+if __name__ == "__main__":
+    XML_FILE = sys.argv[1]
+    PARALLELS = [int(arg) for arg in sys.argv[2:]] or [1, 2, 4, 8]
+    CHUNK = 100
+
+    app = create_app()
+    with app.app_context():
+        path = current_jsonschemas.url_to_path(get_schema_for_resource('doc'))
+        SCHEMA = _records_state.replace_refs(
+            current_jsonschemas.get_schema(path=path))
+        for PARALLEL in PARALLELS:
+            start_time = time.time()
+            COUNT = transform(XML_FILE, PARALLEL, CHUNK, SCHEMA)
+            duration = time.time() - start_time
+            print(
+                f'{PARALLEL:>10}: {COUNT} records in {duration:.2f}s '
+                f'({COUNT / duration:.2f} records/s)'
+            )
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+#
+# RERO ILS
+# Copyright (C) 2021 RERO
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Script to benchmark the operation logs writing throughput.
+
+The same number of operation logs is written with one index request by
+operation log (the default) and with the buffered writer.
+
+Example of execution:
+python benchmark_operation_logs.py [number_of_operation_logs]
+python benchmark_operation_logs.py 10000
+"""
+
+import sys
+import time
+from datetime import datetime, timezone
+
+from invenio_app.factory import create_app
+
+from rero_ils.modules.operation_logs.api import OperationLog
+from rero_ils.modules.operation_logs.writer import buffer_operation_log, \
+    buffered_operation_logs
+
+
+def operation_log_data(number):
+    """Build an operation log.
+
+    :param int number: the operation log number.
+    :return: a dict with the operation log metadata.
+    """
+    return {
+        'date': datetime.now(timezone.utc).isoformat(),
+        'record': {
+            'value': f'benchmark{number}',
+            'type': 'doc'
+        },
+        'operation': 'update',
+        'user_name': 'benchmark'
+    }
+
+
+def write_one_by_one(count):
+    """Write operation logs with one index request by operation log.
+
+    :param int count: the number of operation logs.
+    """
+    for number in range(count):
+        OperationLog.create(operation_log_data(number))
+
+
+def write_buffered(count):
+    """Write operation logs with the buffered writer.
+
+    :param int count: the number of operation logs.
+    """
+    with buffered_operation_logs():
+        for number in range(count):
+            buffer_operation_log(operation_log_data(number))
+
+
+if __name__ == "__main__":
+    COUNT = int(sys.argv[1])
+
+    app = create_app()
+    with app.app_context():
+        for NAME, WRITE in [('one by one', write_one_by_one),
+                            ('buffered', write_buffered)]:
+            start_time = time.time()
+            WRITE(COUNT)
+            duration = time.time() - start_time
+            print(
+                f'{NAME:>10}: {COUNT} operation logs in {duration:.2f}s '
+                f'({COUNT / duration:.2f} operation logs/s)'
+            )
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+#
+# RERO ILS
+# Copyright (C) 2021 RERO
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Script to benchmark the lazy json records reader.
+
+The records of a json fixture file are read with the buffered reader and
+with the memory mapped reader. Large files can be built by repeating the
+records of a fixture file.
+
+Example of execution:
+python benchmark_read_json_record.py [json_file] [repeat]
+python benchmark_read_json_record.py ../data/documents_big.json 100
+"""
+
+import os
+import resource
+import sys
+import tempfile
+import time
+
+from rero_ils.modules.utils import JsonWriter, read_json_record
+
+
+def build_file(json_file_name, repeat):
+    """Build a json file with repeated records.
+
+    :param str json_file_name: the json fixture file name.
+    :param int repeat: the number of times the records are repeated.
+    :return: the name of the built file.
+    """
+    file_name = os.path.join(tempfile.gettempdir(), 'benchmark_records.json')
+    writer = JsonWriter(file_name)
+    for _ in range(repeat):
+        with open(json_file_name) as json_file:
+            for record in read_json_record(json_file):
+                writer.write(record)
+    writer.close()
+    return file_name
+
+
+def read(json_file_name, use_mmap):
+    """Read all records of a json file.
+
+    :param str json_file_name: the json file name.
+    :param bool use_mmap: map the file in memory instead of reading it.
+    :return: the number of records.
+    """
+    count = 0
+    with open(json_file_name) as json_file:
+        for _ in read_json_record(json_file, use_mmap=use_mmap):
+            count += 1
+    return count
+
+
+if __name__ == "__main__":
+    FILE_NAME = sys.argv[1]
+    REPEAT = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    if REPEAT > 1:
+        FILE_NAME = build_file(FILE_NAME, REPEAT)
+    SIZE = os.path.getsize(FILE_NAME) / 1024 / 1024
+
+    for NAME, USE_MMAP in [('buffered', False), ('mmap', True)]:
+        start_time = time.time()
+        COUNT = read(FILE_NAME, USE_MMAP)
+        duration = time.time() - start_time
+        MAX_RSS = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(
+            f'{NAME:>10}: {COUNT} records ({SIZE:.0f}MB) in {duration:.2f}s '
+            f'({COUNT / duration:.2f} records/s, {SIZE / duration:.2f}MB/s, '
+            f'max rss {MAX_RSS:.0f}MB)'
+        )
+    if REPEAT > 1:
+        os.remove(FILE_NAME)
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+#
+# RERO ILS
+# Copyright (C) 2021 RERO
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Script to benchmark the public search latency by view code.
+
+The same public document searches of an organisation view are sent with the
+organisation taken from the index for each request (as before the view codes
+table) and from the cached view codes table. The 50th and 95th percentile
+latencies are printed.
+
+Example of execution:
+python benchmark_viewcode_search.py [view_code] [number_of_requests]
+python benchmark_viewcode_search.py org1 500
+"""
+
+import statistics
+import sys
+import time
+
+from invenio_app.factory import create_app
+
+from rero_ils.modules.organisations.api import Organisation, \
+    OrganisationsSearch
+
+
+def get_record_by_viewcode_from_index(cls, viewcode):
+    """Get the organisation of a view code with one search.
+
+    :param viewcode: the organisation code.
+    :return: the organisation data from the index.
+    """
+    result = OrganisationsSearch().filter('term', code=viewcode).execute()
+    if result['hits']['total']['value'] != 1:
+        raise Exception(
+            'Organisation (get_record_by_viewcode): Result not found.')
+    return result['hits']['hits'][0]['_source']
+
+
+def search_latencies(client, view_code, count):
+    """Send public document searches.
+
+    :param client: the application test client.
+    :param str view_code: the organisation view code.
+    :param int count: the number of requests.
+    :return: the list of the requests durations (ms).
+    """
+    latencies = []
+    for _ in range(count):
+        start_time = time.perf_counter()
+        response = client.get(
+            f'/api/documents/?view={view_code}&q=&size=10')
+        latencies.append((time.perf_counter() - start_time) * 1000)
+        assert response.status_code == 200
+    return latencies
+
+
+if __name__ == "__main__":
+    VIEW_CODE = sys.argv[1]
+    COUNT = int(sys.argv[2])
+
+    app = create_app()
+    cached_get_record_by_viewcode = \
+        Organisation.__dict__['get_record_by_viewcode']
+    with app.app_context():
+        client = app.test_client()
+        for NAME, GET_RECORD in [
+                ('index', classmethod(get_record_by_viewcode_from_index)),
+                ('cached', cached_get_record_by_viewcode)]:
+            Organisation.get_record_by_viewcode = GET_RECORD
+            # warm up
+            search_latencies(client, VIEW_CODE, 10)
+            LATENCIES = search_latencies(client, VIEW_CODE, COUNT)
+            P50 = statistics.median(LATENCIES)
+            P95 = statistics.quantiles(LATENCIES, n=20)[-1]
+            print(
+                f'{NAME:>10}: {COUNT} searches, p50 {P50:.2f}ms, '
+                f'p95 {P95:.2f}ms'
+            )
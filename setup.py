@@ -312,6 +312,7 @@ setup(
             'loans = rero_ils.modules.loans.tasks',
             'stats = rero_ils.modules.stats.tasks',
             'holdings = rero_ils.modules.holdings.tasks',
+            'operation_logs = rero_ils.modules.operation_logs.tasks',
         ],
         'invenio_records.jsonresolver': [
             'acq_accounts = rero_ils.modules.acq_accounts.jsonresolver',
@@ -23,12 +23,15 @@ from datetime import datetime, timedelta
 import mock
 from flask import url_for
 from invenio_accounts.testutils import login_user_via_session
+from invenio_search import current_search_client
 from utils import VerifyRecordPermissionPatch, get_json, mock_response, \
     postdata
 
+from rero_ils.modules.documents.api import DocumentsIndexer, DocumentsSearch
 from rero_ils.modules.documents.utils import clean_text, get_remote_cover
 from rero_ils.modules.documents.views import can_request, \
     item_library_pickup_locations
+from rero_ils.modules.holdings.api import Holding
 from rero_ils.modules.utils import get_ref_for_pid
 
 
@@ -646,3 +649,89 @@ def test_get_remote_cover(mock_get_cover, app):
         'success': True,
         'image': 'https://i.test.com/images/P/XXXXXXXXXX_.jpg'
     }
+
+
+def test_documents_incremental_holdings(
+        client, document, holding_lib_martigny, item_lib_martigny):
+    """Test item and holding changes patch the indexed document."""
+
+    def get_es_holdings():
+        """Get the holdings of the indexed document."""
+        es_doc = current_search_client.get(
+            DocumentsSearch.Meta.index, document.id)
+        return es_doc['_source'].get('holdings', [])
+
+    def get_es_item(holdings):
+        """Get the indexed item from the document holdings."""
+        for hold in holdings:
+            for item in hold.get('items', []):
+                if item['pid'] == item_lib_martigny.pid:
+                    return item
+
+    # item changes update only the item in the document
+    call_number = item_lib_martigny.get('call_number')
+    item_lib_martigny['call_number'] = 'incremental'
+    item = item_lib_martigny.update(
+        item_lib_martigny, dbcommit=True, reindex=True)
+    holdings = get_es_holdings()
+    assert get_es_item(holdings)['call_number'] == 'incremental'
+
+    # same result as a full enrichment
+    document.reindex()
+    full_holdings = get_es_holdings()
+    assert sorted(holdings, key=lambda h: h['pid']) == \
+        sorted(full_holdings, key=lambda h: h['pid'])
+
+    # remove the item from the indexed document
+    DocumentsIndexer.delete_item(document.pid, item.pid)
+    assert not get_es_item(get_es_holdings())
+
+    # the holding update keeps its indexed items
+    DocumentsIndexer.update_item(item)
+    holding_lib_martigny.reindex()
+    assert get_es_item(get_es_holdings())
+
+    # reset the item
+    item.pop('call_number')
+    if call_number:
+        item['call_number'] = call_number
+    item.update(item, dbcommit=True, reindex=True)
+
+
+def test_documents_incremental_holdings_item_move(
+        client, document, holding_lib_martigny, item_lib_martigny,
+        loc_public_martigny, loc_restricted_martigny):
+    """Test an item moved between two holdings of the same document."""
+
+    def get_es_item_holdings():
+        """Get the pids of the indexed holdings with the item."""
+        es_doc = current_search_client.get(
+            DocumentsSearch.Meta.index, document.id)
+        return [
+            hold['pid'] for hold in es_doc['_source'].get('holdings', [])
+            if item_lib_martigny.pid in [
+                item['pid'] for item in hold.get('items', [])]
+        ]
+
+    old_holding_pid = item_lib_martigny.holding_pid
+    assert get_es_item_holdings() == [old_holding_pid]
+
+    # move the item to the holding of another location
+    item_lib_martigny['location'] = {
+        '$ref': get_ref_for_pid('locations', loc_restricted_martigny.pid)}
+    item = item_lib_martigny.update(
+        item_lib_martigny, dbcommit=True, reindex=True)
+    new_holding_pid = item.holding_pid
+    assert new_holding_pid != old_holding_pid
+    assert get_es_item_holdings() == [new_holding_pid]
+
+    # move the item back to its first holding
+    item['location'] = {
+        '$ref': get_ref_for_pid('locations', loc_public_martigny.pid)}
+    item = item.update(item, dbcommit=True, reindex=True)
+    assert item.holding_pid == old_holding_pid
+    assert get_es_item_holdings() == [old_holding_pid]
+
+    # remove the new empty holding
+    Holding.get_record_by_pid(new_holding_pid).delete(
+        dbcommit=True, delindex=True)
@@ -18,12 +18,15 @@
 """Tests REST API item types."""
 
 
+import arrow
 import mock
 from flask import url_for
 from invenio_accounts.testutils import login_user_via_session
 from utils import VerifyRecordPermissionPatch, get_csv, get_json, postdata, \
     to_relative_url
 
+from rero_ils.modules.stats.api import StatsForPricing
+
 
 def test_stats_permissions(client, stats):
     """Test record retrieval."""
@@ -126,3 +129,15 @@ def test_stats_get_post_put_delete(client, librarian_martigny):
     # Delete record/DELETE
     res = client.delete(item_url)
     assert res.status_code == 403
+
+
+def test_stats_collect(client, stats):
+    """Test the aggregated statistics against the single library ones."""
+    stats_for_pricing = StatsForPricing(to_date=arrow.utcnow())
+
+    def sort_by_library(values):
+        return sorted(values, key=lambda value: value['library']['pid'])
+
+    values = sort_by_library(stats_for_pricing.collect())
+    assert values
+    assert values == sort_by_library(stats_for_pricing.collect_by_library())
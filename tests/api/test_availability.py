@@ -22,6 +22,7 @@ from copy import deepcopy
 import mock
 from flask import url_for
 from invenio_accounts.testutils import login_user_via_session
+from invenio_search import current_search_client
 from utils import get_json, postdata
 
 from rero_ils.modules.documents.api import Document
@@ -430,3 +431,45 @@ def test_item_availability_failed(client, librarian2_martigny):
         )
     )
     assert res.status_code == 404
+
+
+def test_documents_availability_by_pids(
+        app, document, document_with_issn, holding_lib_martigny,
+        item_lib_martigny, item2_lib_martigny, circulation_policies):
+    """Test batched documents availability and its ES round trips."""
+    pids = [document.pid, document_with_issn.pid, 'dummy_pid']
+    availability = Document.get_availability_by_pids(pids, 'global')
+    for pid in pids:
+        assert availability[pid] == Document.is_available(pid, 'global')
+    assert Document.get_availability_by_pids([], 'global') == {}
+
+    # the number of ES round trips of the batched availability does not
+    # depend on the number of documents, the per document one does.
+    es_transport = current_search_client.transport
+
+    def count_round_trips(func, *args):
+        """Count the ES requests done by the given function."""
+        with mock.patch.object(
+            es_transport, 'perform_request',
+            wraps=es_transport.perform_request
+        ) as perform_request:
+            func(*args)
+            return perform_request.call_count
+
+    def per_document_availability(pids):
+        """Legacy availability, one document at a time."""
+        return {pid: Document.is_available(pid, 'global') for pid in pids}
+
+    pids = [document.pid] * 5
+    batched = [
+        count_round_trips(
+            Document.get_availability_by_pids, pids[:size], 'global')
+        for size in range(1, 6)
+    ]
+    per_document = [
+        count_round_trips(per_document_availability, pids[:size])
+        for size in range(1, 6)
+    ]
+    assert len(set(batched)) == 1
+    assert per_document == sorted(per_document)
+    assert per_document[-1] > batched[-1]
@@ -162,6 +162,18 @@ def test_items_serializers(
            '"issue_status_date","issue_claims_count","issue_expected_date",' \
            '"issue_regular"' in data
 
+    # the items are read by pages
+    app = client.application
+    chunk_size = app.config.get('RERO_ILS_ITEMS_CSV_CHUNK_SIZE')
+    app.config['RERO_ILS_ITEMS_CSV_CHUNK_SIZE'] = 1
+    response = client.get(list_url, headers=csv_header)
+    app.config['RERO_ILS_ITEMS_CSV_CHUNK_SIZE'] = chunk_size
+    assert response.status_code == 200
+    paged_data = get_csv(response)
+    for item in [item_lib_martigny, item_lib_fully]:
+        assert f'"{item.pid}","{item.document_pid}"' in paged_data
+    assert sorted(paged_data.splitlines()) == sorted(data.splitlines())
+
 
 def test_loans_serializers(
     client,
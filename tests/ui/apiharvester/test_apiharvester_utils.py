@@ -22,11 +22,13 @@ from __future__ import absolute_import, print_function
 import mock
 from utils import mock_response
 
+from rero_ils.modules.api import IlsRecordError
+from rero_ils.modules.apiharvester.models import ApiHarvestConfig
 from rero_ils.modules.apiharvester.tasks import harvest_records
 from rero_ils.modules.apiharvester.utils import api_source, get_records
 
 
-@mock.patch('requests.get')
+@mock.patch('requests.Session.get')
 def test_api_source(mock_get, app, capsys):
     """Test api source creation update."""
     msg = api_source(name='test', url='http://test.com')
@@ -50,6 +52,9 @@ def test_api_source(mock_get, app, capsys):
                     size=1000, max=1000)
     out, err = capsys.readouterr()
     assert out.strip() == 'API records found: 2'
+    config = ApiHarvestConfig.query.filter_by(name='test').first()
+    assert config.harvested == 2
+    assert config.next_url is None
 
     msg = api_source(name='test', url='http://test.com', size=1000)
     assert msg == 'Not Updated'
@@ -59,7 +64,7 @@ def test_api_source(mock_get, app, capsys):
                    ' size:1000, comment:comment')
 
 
-@mock.patch('requests.get')
+@mock.patch('requests.Session.get')
 def test_get_records(mock_get, app, capsys):
     """Test finding a circulation policy."""
     mock_get.return_value = mock_response(json_data={
@@ -108,3 +113,71 @@ def test_get_records(mock_get, app, capsys):
         ]
     out, err = capsys.readouterr()
     assert out.strip() == 'API records found: 2'
+
+
+@mock.patch('requests.Session.get')
+def test_harvest_records_cursor(mock_get, app):
+    """Test the harvest cursor."""
+    api_source(name='cursor', url='http://test.com')
+    page = {
+        'hits': {
+            'hits': [{'metadata': {'pid': 'test1'}}],
+            'total': {'value': 2}
+        },
+        'links': {'next': 'http://test.com/?page=2'}
+    }
+    last_page = {
+        'hits': {
+            'hits': [{'metadata': {'pid': 'test2'}}],
+            'total': {'value': 2}
+        },
+        'links': {}
+    }
+    # the harvest is stopped after the first page
+    mock_get.side_effect = [
+        mock_response(json_data=page), mock_response(json_data=last_page)]
+    harvest_records(name='cursor', signals=False, max=1)
+    config = ApiHarvestConfig.query.filter_by(name='cursor').first()
+    assert config.next_url == 'http://test.com/?page=2'
+    assert config.harvested == 1
+
+    # the next harvest resumes from the cursor
+    mock_get.reset_mock()
+    mock_get.side_effect = [mock_response(json_data=last_page)]
+    harvest_records(name='cursor', signals=False)
+    mock_get.assert_called_once_with('http://test.com/?page=2')
+    config = ApiHarvestConfig.query.filter_by(name='cursor').first()
+    assert config.next_url is None
+    assert config.harvested == 2
+
+
+@mock.patch('requests.Session.get')
+def test_harvest_records_cursor_failed(mock_get, app):
+    """Test the harvest cursor with records that can not be written."""
+    api_source(name='cursor_failed', url='http://test.com')
+    page = {
+        'hits': {
+            'hits': [{'metadata': {'pid': 'test1'}}],
+            'total': {'value': 2}
+        },
+        'links': {'next': 'http://test.com/?page=2'}
+    }
+    last_page = {
+        'hits': {
+            'hits': [{'metadata': {'pid': 'test2'}}],
+            'total': {'value': 2}
+        },
+        'links': {}
+    }
+    mock_get.side_effect = [
+        mock_response(json_data=page), mock_response(json_data=last_page)]
+    # the records of the second page can not be written
+    with mock.patch(
+        'rero_ils.modules.apiharvester.utils.apiharvest_part.send',
+        side_effect=[[], IlsRecordError.NotWritten('test2')]
+    ):
+        harvest_records(name='cursor_failed', signals=True)
+    config = ApiHarvestConfig.query.filter_by(name='cursor_failed').first()
+    # the cursor stays on the failed page
+    assert config.next_url == 'http://test.com/?page=2'
+    assert config.harvested == 1
@@ -22,6 +22,7 @@ from __future__ import absolute_import, print_function
 from copy import deepcopy
 
 import pytest
+from invenio_cache.proxies import current_cache
 from jsonschema.exceptions import ValidationError
 
 from rero_ils.modules.circ_policies.api import CircPolicy, \
@@ -134,3 +135,48 @@ def test_circ_policy_can_delete(app, circ_policy_martigny_data_tmp):
     can, reasons = cipo.can_delete
     assert can
     assert reasons == {}
+
+
+def test_circ_policy_policies_table(
+        org_martigny, lib_martigny, lib_saxon,
+        patron_type_children_martigny, patron_type_adults_martigny,
+        item_type_standard_martigny, item_type_on_site_martigny,
+        item_type_specific_martigny,
+        circ_policy_default_martigny, circ_policy_short_martigny,
+        circ_policy_temp_martigny):
+    """Test the cached circulation policies lookup table."""
+    CircPolicy.clear_policies_table(org_martigny.pid)
+    table = CircPolicy.get_policies_table(org_martigny.pid)
+    default = CircPolicy.get_default_circ_policy(org_martigny.pid)
+    assert table['default'] == default.pid
+
+    # same matching rules as the search based methods
+    for lib in [lib_martigny, lib_saxon]:
+        for ptty in [patron_type_children_martigny,
+                     patron_type_adults_martigny]:
+            for itty in [item_type_standard_martigny,
+                         item_type_on_site_martigny,
+                         item_type_specific_martigny]:
+                expected = CircPolicy.get_circ_policy_by_LPI(
+                    org_martigny.pid, lib.pid, ptty.pid, itty.pid) or \
+                    CircPolicy.get_circ_policy_by_OPI(
+                        org_martigny.pid, ptty.pid, itty.pid) or default
+                cipo = CircPolicy.provide_circ_policy(
+                    org_martigny.pid, lib.pid, ptty.pid, itty.pid)
+                assert cipo.pid == expected.pid
+
+    cipo = CircPolicy.provide_circ_policy(
+        org_martigny.pid, lib_martigny.pid,
+        patron_type_adults_martigny.pid, item_type_on_site_martigny.pid)
+    assert cipo.pid == circ_policy_temp_martigny.pid
+    cipo = CircPolicy.provide_circ_policy(
+        org_martigny.pid, lib_saxon.pid,
+        patron_type_adults_martigny.pid, item_type_on_site_martigny.pid)
+    assert cipo.pid == default.pid
+
+    # the table is invalidated when a policy changes
+    key = CircPolicy._policies_table_key(org_martigny.pid)
+    assert current_cache.get(key)
+    circ_policy_temp_martigny.update(
+        circ_policy_temp_martigny, dbcommit=True, reindex=True)
+    assert not current_cache.get(key)
@@ -19,9 +19,15 @@
 
 from __future__ import absolute_import, print_function
 
+from copy import deepcopy
+
+import pytest
+
+from rero_ils.modules.api import IlsRecordError
 from rero_ils.modules.contributions.api import Contribution
 from rero_ils.modules.contributions.tasks import create_mef_records, \
     delete_records
+from rero_ils.modules.utils import is_known_pid
 
 
 def test_contribution_create_delete(app, contribution_person_data_tmp, capsys):
@@ -31,7 +37,34 @@ def test_contribution_create_delete(app, contribution_person_data_tmp, capsys):
     out, err = capsys.readouterr()
     pers = Contribution.get_record_by_pid('cont_pers')
     assert out.strip() == 'record uuid: {id}'.format(id=pers.id)
+    # the existing record is updated
+    count = create_mef_records([contribution_person_data_tmp])
+    assert count == 1
+    assert Contribution.get_record_by_pid('cont_pers').id == pers.id
     count = delete_records([pers], verbose=True)
     assert count == 1
     out, err = capsys.readouterr()
     assert out.strip() == 'records deleted: 1'
+
+
+def test_contribution_create_failed(app, contribution_person_data_tmp):
+    """Test mef contributions creation with a failing record."""
+    valid_data = deepcopy(contribution_person_data_tmp)
+    valid_data['pid'] = 'cont_valid'
+    invalid_data = deepcopy(contribution_person_data_tmp)
+    invalid_data['pid'] = 'cont_fail'
+    del invalid_data['sources']
+    created, updated, failed = Contribution.create_or_update_many(
+        [invalid_data, deepcopy(valid_data)])
+    assert [record.pid for record in created] == ['cont_valid']
+    assert updated == []
+    assert failed == ['cont_fail']
+    assert not Contribution.get_record_by_pid('cont_fail')
+    # the minted pid of the failed record is forgotten
+    assert not is_known_pid('cont', 'cont_fail')
+
+    # the valid records are written, the harvest is stopped
+    with pytest.raises(IlsRecordError.NotWritten):
+        create_mef_records([invalid_data, valid_data])
+    assert Contribution.get_record_by_pid('cont_valid')
+    assert not Contribution.get_record_by_pid('cont_fail')
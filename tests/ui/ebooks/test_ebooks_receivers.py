@@ -82,7 +82,7 @@ def test_publish_harvested_records(app, ebooks_1_xml, ebooks_2_xml,
     }]
     records.append(doc2)
 
-    create_records(records=records)
+    assert create_records(records=records) == (0, 2)
     flush_index(DocumentsSearch.Meta.index)
     flush_index(HoldingsSearch.Meta.index)
     assert len(list(Holding.get_holdings_pid_by_document_pid(doc1.pid))) == 0
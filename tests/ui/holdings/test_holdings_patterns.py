@@ -26,6 +26,7 @@ from datetime import datetime
 import ciso8601
 import jinja2
 import pytest
+from dateutil.relativedelta import relativedelta
 from invenio_accounts.testutils import login_user_via_session
 from jsonschema.exceptions import ValidationError
 
@@ -78,6 +79,24 @@ def test_patterns_quarterly_one_level(holding_lib_martigny_w_patterns):
     assert new_holding.next_issue_display_text == '1 3'
 
 
+def test_predict_issues(holding_lib_martigny_w_patterns):
+    """Test the prediction of several issues in one pass."""
+    patterns = deepcopy(holding_lib_martigny_w_patterns['patterns'])
+    patterns['frequency'] = 'rdafr:1001'  # Daily
+    original_patterns = deepcopy(patterns)
+    issues = Holding.predict_issues(patterns, 40)
+    # the given patterns are not modified
+    assert patterns == original_patterns
+    # same issues as the predictions one by one
+    for issue in issues:
+        assert issue == Holding._get_next_issue_display_text(
+            original_patterns)
+        original_patterns = Holding._increment_next_prediction(
+            original_patterns)
+    assert issues[1][1] == (datetime.strptime(
+        issues[0][1], '%Y-%m-%d') + relativedelta(days=1)).strftime('%Y-%m-%d')
+
+
 def test_receive_regular_issue(holding_lib_martigny_w_patterns):
     """Test holdings receive regular issues."""
     holding = holding_lib_martigny_w_patterns
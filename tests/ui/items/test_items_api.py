@@ -262,6 +262,11 @@ def test_get_links_to_me_with_fees(patron_transaction_overdue_saxon):
     assert item.get_links_to_me() == {'fees': 1, 'loans': 1}
     assert item.get_links_to_me(get_pids=True) == {
         'fees': ['1'], 'loans': ['1']}
+    # links of several records with one multi search
+    assert Item.get_links_to_many([item.pid, 'unknown']) == {
+        item.pid: {'fees': 1, 'loans': 1}, 'unknown': {}}
+    assert Item.can_delete_many([item.pid, 'unknown']) == {
+        item.pid: (False, {'links': {'fees': 1, 'loans': 1}})}
 
     pttr['status'] = 'closed'
     pttr['total_amount'] = 0
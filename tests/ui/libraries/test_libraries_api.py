@@ -19,6 +19,7 @@
 
 from __future__ import absolute_import, print_function
 
+from copy import deepcopy
 from datetime import datetime, timedelta
 
 import pytz
@@ -142,6 +143,38 @@ def test_libraries_is_open(lib_martigny):
     ) == date_string_to_utc('2018-12-17')
 
 
+def test_libraries_calendar(lib_martigny):
+    """Test library calendar."""
+    library = lib_martigny
+
+    def is_open(date):
+        """Check if library is open for a day, testing all rules."""
+        day_name = date.strftime("%A").lower()
+        is_open = [rule.get('is_open', False)
+                   for rule in library['opening_hours']
+                   if rule['day'] == day_name]
+        is_open = is_open[0] if is_open else False
+        for exception in library._get_exceptions_matching_date(date, True):
+            is_open = exception['is_open']
+        return is_open
+
+    start_date = date_string_to_utc('2018-12-01')
+    dates = [start_date + timedelta(days=idx) for idx in range(0, 500)]
+    open_dates = [date for date in dates if is_open(date)]
+    assert library.get_open_days(dates[0], dates[-1]) == open_dates
+    assert library.count_open(dates[0], dates[-1]) == len(open_dates)
+    assert library.in_working_days(10, start_date) == open_dates[9]
+    assert library.next_open(open_dates[9], previous=True) == open_dates[8]
+
+    # the calendar changes with the library opening rules
+    calendar = library.calendar
+    assert calendar is library.calendar
+    data = deepcopy(library)
+    data['exception_dates'] = []
+    assert Library(data).calendar is not calendar
+    assert Library(data).count_open(dates[0], dates[-1]) != len(open_dates)
+
+
 def test_library_can_delete(lib_martigny):
     """Test can delete."""
     can, reasons = lib_martigny.can_delete
@@ -30,9 +30,11 @@ from invenio_circulation.search.api import LoansSearch
 from utils import flush_index, get_mapping
 
 from rero_ils.modules.circ_policies.api import DUE_SOON_REMINDER_TYPE
+from rero_ils.modules.items.api import Item
 from rero_ils.modules.items.models import ItemStatus
 from rero_ils.modules.libraries.api import Library
-from rero_ils.modules.loans.api import Loan, LoanAction, LoanState
+from rero_ils.modules.loans.api import Loan, LoanAction, LoanState, \
+    get_loans_by_pids
 from rero_ils.modules.loans.tasks import loan_anonymizer
 from rero_ils.modules.loans.utils import get_circ_policy, \
     get_default_loan_duration, sum_for_fees
@@ -40,6 +42,7 @@ from rero_ils.modules.notifications.api import NotificationsSearch
 from rero_ils.modules.notifications.models import NotificationType
 from rero_ils.modules.notifications.tasks import create_notifications
 from rero_ils.modules.patron_transactions.api import PatronTransaction
+from rero_ils.modules.patrons.api import Patron
 
 
 def test_loan_es_mapping(es_clear, db):
@@ -54,6 +57,52 @@ def test_loans_create(loan_pending_martigny):
     assert loan_pending_martigny.get('state') == LoanState.PENDING
 
 
+def test_get_loans_by_pids(
+    item_on_loan_martigny_patron_and_loan_on_loan,
+    item2_on_loan_martigny_patron_and_loan_on_loan
+):
+    """Test loading loans and their related records by chunks."""
+    item, patron, loan = item_on_loan_martigny_patron_and_loan_on_loan
+    item2, _, loan2 = item2_on_loan_martigny_patron_and_loan_on_loan
+    loan = Loan.get_record_by_pid(loan.pid)
+    pids = [loan2.pid, 'unknown', loan.pid]
+    assert [record.pid for record in Loan.get_records_by_pids(pids)] == \
+        [loan2.pid, loan.pid]
+
+    loans = list(get_loans_by_pids(pids, chunk_size=1))
+    assert [record.pid for record in loans] == [loan2.pid, loan.pid]
+    hydrated_loan = loans[1]
+    assert hydrated_loan == loan
+    related_records = hydrated_loan.related_records
+    assert related_records['item'].pid == item.pid
+    assert related_records['patron'].pid == patron.pid
+    assert related_records['location'].pid == loan.location_pid
+    assert related_records['library'].pid == loan.library_pid
+    assert related_records['circ_policy'].pid == get_circ_policy(loan).pid
+    assert hydrated_loan.library_pid == loan.library_pid
+    assert hydrated_loan.organisation_pid == loan.organisation_pid
+    assert loans[0].related_records['item'].pid == item2.pid
+
+
+def test_get_loans_by_pids_deleted_records(
+        item_on_loan_martigny_patron_and_loan_on_loan):
+    """Test loading loans with a deleted item and a deleted patron."""
+    _, _, loan = item_on_loan_martigny_patron_and_loan_on_loan
+    # the item and the patron are not found as if they were deleted
+    with mock.patch.object(Item, 'get_records_by_pids', return_value=[]), \
+            mock.patch.object(Patron, 'get_records_by_pids',
+                              return_value=[]):
+        loans = list(get_loans_by_pids([loan.pid]))
+        assert [record.pid for record in loans] == [loan.pid]
+        related_records = loans[0].related_records
+        assert related_records['item'] is None
+        assert related_records['patron'] is None
+        assert related_records['circ_policy'] is None
+
+        loans = list(get_loans_by_pids([loan.pid], with_circ_policy=False))
+        assert 'circ_policy' not in loans[0].related_records
+
+
 def test_item_loans_default_duration(
         item_lib_martigny, librarian_martigny, patron_martigny,
         loc_public_martigny, circulation_policies):
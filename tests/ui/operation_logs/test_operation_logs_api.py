@@ -17,12 +17,17 @@
 
 """Operation logs Record tests."""
 
+import os
 from copy import deepcopy
 
 import pytest
+from flask import g
 from invenio_search import current_search
 
 from rero_ils.modules.operation_logs.api import OperationLog
+from rero_ils.modules.operation_logs.writer import buffer_operation_log, \
+    buffered_operation_logs, index_operation_logs, \
+    replay_operation_logs_spool
 
 
 def test_operation_create(client, es_clear, operation_log_data):
@@ -97,3 +102,47 @@ def test_update(app, es_clear, operation_log_data, monkeypatch):
     with pytest.raises(Exception) as exception:
         OperationLog.update(log_data.id, log_data['date'], log_data)
         assert str(exception) == 'Operation log cannot be updated.'
+
+
+def test_operation_logs_buffer(app, es_clear, operation_log_data):
+    """Test buffered operation logs."""
+    # the buffering is disabled by default
+    assert not buffer_operation_log(deepcopy(operation_log_data))
+
+    with buffered_operation_logs():
+        data = deepcopy(operation_log_data)
+        del data['pid']
+        assert buffer_operation_log(data)
+        # the id is set by the buffer
+        assert data['pid']
+        assert g.operation_logs_buffer == [data]
+    assert 'operation_logs_buffer' not in g
+    current_search.flush_and_refresh(OperationLog.index_name)
+    assert OperationLog.get_record(data['pid'])
+    # clean up the index
+    assert OperationLog.delete_indices()
+
+
+def test_operation_logs_spool(app, es_clear, operation_log_data, tmpdir,
+                              monkeypatch):
+    """Test spooled operation logs."""
+    spool_file = os.path.join(tmpdir, 'operation_logs.spool')
+    monkeypatch.setitem(
+        app.config, 'RERO_ILS_OPERATION_LOG_SPOOL_FILE', spool_file)
+    assert replay_operation_logs_spool() == 0
+
+    def bulk_index_error(data):
+        raise Exception('Elasticsearch unavailable')
+
+    # elasticsearch is not available
+    with monkeypatch.context() as context:
+        context.setattr(OperationLog, 'bulk_index', bulk_index_error)
+        assert index_operation_logs([deepcopy(operation_log_data)]) == 0
+    assert os.path.exists(spool_file)
+
+    assert replay_operation_logs_spool() == 1
+    assert not os.path.exists(spool_file)
+    current_search.flush_and_refresh(OperationLog.index_name)
+    assert OperationLog.get_record(operation_log_data['pid'])
+    # clean up the index
+    assert OperationLog.delete_indices()
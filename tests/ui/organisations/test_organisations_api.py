@@ -19,10 +19,14 @@
 
 from __future__ import absolute_import, print_function
 
+import mock
+import pytest
+
 from rero_ils.modules.organisations.api import Organisation
 from rero_ils.modules.organisations.api import \
     organisation_id_fetcher as fetcher
 from rero_ils.modules.providers import append_fixtures_new_identifiers
+from rero_ils.modules.reference_labels import clear_reference_labels
 
 
 def test_organisation_libararies(org_martigny, lib_martigny):
@@ -40,6 +44,31 @@ def test_organisation_organisation_pid(org_martigny):
     assert org_martigny.organisation_pid == 'org1'
 
 
+def test_organisation_viewcodes_table(org_martigny):
+    """Test the cached organisations by view code."""
+    clear_reference_labels('org')
+    code = org_martigny['code']
+    organisation = Organisation.get_record_by_viewcode(code)
+    assert organisation['pid'] == organisation.pid == org_martigny.pid
+    assert code in Organisation.all_code()
+
+    # the cached table is updated with the organisation
+    org_martigny['code'] = 'new_code'
+    org = org_martigny.update(org_martigny, dbcommit=True, reindex=True)
+    assert Organisation.get_record_by_viewcode('new_code')['pid'] == org.pid
+    assert code not in Organisation.get_viewcodes_table()
+    org['code'] = code
+    org.update(org, dbcommit=True, reindex=True)
+    assert Organisation.get_record_by_viewcode(code)['pid'] == org.pid
+
+    # the view code of a missing organisation is not found
+    with mock.patch(
+        'rero_ils.modules.organisations.api.get_reference_record',
+        return_value=None
+    ), pytest.raises(Exception):
+        Organisation.get_record_by_viewcode(code)
+
+
 def test_organisation_create(app, db, org_martigny_data, org_sion_data):
     """Test organisation creation."""
     org_martigny_data['pid'] = '1'
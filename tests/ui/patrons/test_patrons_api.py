@@ -22,11 +22,15 @@ from __future__ import absolute_import, print_function
 from copy import deepcopy
 from datetime import datetime
 
+import mock
 import pytest
 from invenio_accounts.models import User
+from invenio_cache.proxies import current_cache
 from invenio_userprofiles import UserProfile
 from jsonschema.exceptions import ValidationError
 
+from rero_ils.modules.loans.api import Loan, LoansIndexer, LoanState, \
+    get_overdue_loan_pids
 from rero_ils.modules.patrons.api import Patron, PatronsSearch, \
     patron_id_fetcher
 from rero_ils.utils import create_user_from_data
@@ -350,3 +354,45 @@ def test_patron_multiple(patron_sion_multiple, patron2_martigny, lib_martigny):
 def test_patron_profile_url(org_martigny, patron2_martigny):
     """Test patron profile url."""
     assert org_martigny.get('code') in patron2_martigny.profile_url
+
+
+def test_patron_circulation_stats(patron_martigny):
+    """Test the cached patron circulation statistics."""
+    Patron.clear_circulation_stats(patron_martigny.pid)
+    stats = patron_martigny.get_circulation_stats()
+    assert set(stats) == {'loans', 'checkouts', 'overdues', 'fees'}
+    assert set(stats['fees']) == {'engaged', 'overdue'}
+    assert stats['overdues'] == sum(
+        1 for _ in get_overdue_loan_pids(patron_martigny.pid))
+
+    # the statistics are cached until a loan or a transaction is indexed
+    key = Patron._circulation_stats_key(patron_martigny.pid)
+    assert current_cache.get(key) == stats
+    with mock.patch('rero_ils.modules.api.IlsRecordsIndexer.index'):
+        LoansIndexer().index(Loan({'patron_pid': patron_martigny.pid}))
+    assert not current_cache.get(key)
+
+
+def test_patron_circulation_stats_checkout(
+        patron_martigny, librarian_martigny, loc_public_martigny,
+        item_lib_martigny):
+    """Test the circulation statistics after a checkout."""
+    stats = patron_martigny.get_circulation_stats()
+    checkouts = stats['loans'].get(LoanState.ITEM_ON_LOAN, 0)
+    params = {
+        'patron_pid': patron_martigny.pid,
+        'transaction_location_pid': loc_public_martigny.pid,
+        'transaction_user_pid': librarian_martigny.pid,
+        'pickup_location_pid': loc_public_martigny.pid
+    }
+    item, actions = item_lib_martigny.checkout(**params)
+    stats = patron_martigny.get_circulation_stats()
+    assert stats['loans'][LoanState.ITEM_ON_LOAN] == checkouts + 1
+
+    # reset the item
+    item.checkin(
+        transaction_location_pid=loc_public_martigny.pid,
+        transaction_user_pid=librarian_martigny.pid
+    )
+    stats = patron_martigny.get_circulation_stats()
+    assert stats['loans'].get(LoanState.ITEM_ON_LOAN, 0) == checkouts
@@ -144,6 +144,16 @@ def test_ilsrecord(app, es_default_index, ils_record, ils_record_2):
     assert sorted(RecordTest.get_all_pids()) == [
         '1', 'ilsrecord_pid', 'ilsrecord_pid_2'
     ]
+    assert sorted(RecordTest.get_all_pids(limit=1)) == [
+        '1', 'ilsrecord_pid', 'ilsrecord_pid_2'
+    ]
+    pids_chunks = list(RecordTest.get_all_pids(limit=2, chunk=True))
+    assert [len(pids) for pids in pids_chunks] == [2, 1]
+    assert sorted(pids_chunks[0] + pids_chunks[1]) == [
+        '1', 'ilsrecord_pid', 'ilsrecord_pid_2'
+    ]
+    assert len(list(RecordTest.get_all_ids(limit=0))) == 3
+    assert [len(ids) for ids in RecordTest.get_all_ids(chunk=True)] == [3]
 
     """Test IlsRecord update."""
     record = RecordTest.get_record_by_pid('ilsrecord_pid')
@@ -209,6 +219,25 @@ def test_ilsrecord(app, es_default_index, ils_record, ils_record_2):
     assert RecordTest.count() == 0
 
 
+def test_ilsrecord_create_many(app, es_default_index, ils_record,
+                               ils_record_2):
+    """Test IlsRecord create many."""
+    records = RecordTest.create_many(
+        [ils_record, ils_record_2], chunk_size=1, delete_pid=True)
+    assert [record['name'] for record in records] == \
+        ['IlsRecord Name', 'IlsRecord Name 2']
+    assert RecordTest.count() == 2
+    for record in records:
+        record.delete(force=True, dbcommit=True)
+    assert RecordTest.count() == 0
+
+    # the records can not be indexed without commit
+    with pytest.raises(ValueError):
+        RecordTest.create_many(
+            [ils_record], dbcommit=False, reindex=True, delete_pid=True)
+    assert RecordTest.count() == 0
+
+
 class FailedPidIdentifier(RecordIdentifier):
     """Sequence generator for Test identifiers."""
 
@@ -17,7 +17,18 @@
 
 """API tests for indexer utilities."""
 
-from rero_ils.modules.indexer_utils import record_to_index
+import math
+
+import mock
+import pytest
+from flask import g
+
+from rero_ils.modules.indexer_utils import IndexerRefresh, \
+    PartitionedReindex, ReindexQueue, get_indexer_refresh, \
+    get_refresh_argument, indexer_refresh, record_to_index, \
+    refresh_deferred_indices
+from rero_ils.modules.libraries.api import Library
+from rero_ils.modules.organisations.api import OrganisationsSearch
 
 
 def test_record_to_index(app):
@@ -44,3 +55,99 @@ def test_record_to_index(app):
         '$schema': 'https://bib.rero.ch/schemas/'
         'organisations/organisation-v0.0.1.json'
     }) == ('organisations-organisation-v0.0.1', '_doc')
+
+
+def test_indexer_refresh(app, org_martigny):
+    """Test the indexer refresh modes."""
+    assert get_indexer_refresh('org') == IndexerRefresh.TRUE
+    with mock.patch.dict(app.config, {
+        'RERO_ILS_INDEXER_REFRESH_BY_PID_TYPE': {
+            'org': IndexerRefresh.WAIT_FOR
+        }
+    }):
+        assert get_indexer_refresh('org') == IndexerRefresh.WAIT_FOR
+        assert get_indexer_refresh('doc') == IndexerRefresh.TRUE
+        # the request mode has the priority
+        with indexer_refresh(IndexerRefresh.TRUE):
+            assert get_indexer_refresh('org') == IndexerRefresh.TRUE
+        assert get_indexer_refresh('org') == IndexerRefresh.WAIT_FOR
+
+    name = org_martigny['name']
+    with indexer_refresh(IndexerRefresh.DEFERRED):
+        assert get_refresh_argument(
+            'documents-document-v0.0.1', 'doc') == 'false'
+        org_martigny['name'] = 'deferred'
+        org_martigny.reindex()
+        assert len(g.indexer_deferred_indices) == 2
+    refresh_deferred_indices()
+    assert 'indexer_deferred_indices' not in g
+    assert OrganisationsSearch().get_record_by_pid(
+        org_martigny.pid, ['name']).name == 'deferred'
+    org_martigny['name'] = name
+    org_martigny.reindex()
+
+
+def test_reindex_queue(app, document, holding_lib_martigny, item_lib_martigny):
+    """Test the coalescing reindex queue."""
+    ReindexQueue.redis().delete(
+        ReindexQueue.key, ReindexQueue.flush_key, ReindexQueue.metrics_key)
+    with mock.patch.dict(app.config, {'RERO_ILS_REINDEX_QUEUE': True}), \
+            mock.patch(
+                'rero_ils.modules.tasks.flush_reindex_queue.apply_async'
+            ) as apply_async:
+        for _ in range(3):
+            item_lib_martigny.reindex()
+        # only one flush is scheduled
+        assert apply_async.call_count == 1
+    assert ReindexQueue.metrics() == {
+        'queued': 6,
+        'coalesced': 4,
+        'reindexed': 0,
+        'size': 2
+    }
+    # the holding and the document are reindexed once
+    assert ReindexQueue.flush() == 2
+    assert ReindexQueue.metrics() == {
+        'queued': 6,
+        'coalesced': 4,
+        'reindexed': 2,
+        'size': 0
+    }
+
+
+def test_partitioned_reindex(app, lib_martigny, lib_saxon, lib_fully):
+    """Test the partitioned reindex."""
+    reindex = PartitionedReindex('test')
+    reindex.redis().delete(f'{reindex.key}:plan', f'{reindex.key}:done',
+                           f'{reindex.key}:failed')
+    plan = reindex.create_plan(['lib'], size=2)
+    count = Library.count()
+    assert len(plan['partitions']) == math.ceil(count / 2)
+    assert reindex.pending() == plan['partitions']
+
+    stats = reindex.index_partition(plan['partitions'][0]['id'])
+    assert stats['count'] == 2
+    assert stats['errors'] == 0
+
+    # an other process resumes the run
+    reindex = PartitionedReindex('test')
+    assert reindex.plan == plan
+    assert reindex.pending() == plan['partitions'][1:]
+
+    # a failing partition stays pending
+    partition_id = plan['partitions'][1]['id']
+    with mock.patch('rero_ils.modules.indexer_utils.bulk',
+                    side_effect=Exception('es error')):
+        with pytest.raises(Exception):
+            reindex.index_partition(partition_id)
+    assert reindex.failed == {partition_id: 'es error'}
+    assert reindex.pending() == plan['partitions'][1:]
+
+    for partition in reindex.pending():
+        reindex.index_partition(partition['id'])
+    assert not reindex.pending()
+    assert sum(stats['count'] for stats in reindex.stats.values()) == count
+    assert reindex.failed == {}
+    # no fresh index, no records to catch up and no aliases to switch
+    assert reindex.catch_up() == {}
+    assert reindex.switch_aliases() == {}
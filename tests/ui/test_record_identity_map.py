@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+#
+# RERO ILS
+# Copyright (C) 2021 RERO
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""API tests for the record identity map."""
+
+from copy import deepcopy
+
+from flask import g
+
+from rero_ils.modules.locations.api import Location
+from rero_ils.modules.record_identity_map import get_record_identity_map, \
+    record_identity_map
+
+
+def test_record_identity_map(app, loc_public_martigny):
+    """Test the record identity map."""
+    # disabled by default
+    assert get_record_identity_map() is None
+    location = Location.get_record_by_pid(loc_public_martigny.pid)
+    assert location is not Location.get_record_by_pid(loc_public_martigny.pid)
+
+    with record_identity_map() as identity_map:
+        assert get_record_identity_map() is identity_map
+        location = Location.get_record_by_pid(loc_public_martigny.pid)
+        assert location is Location.get_record_by_pid(
+            loc_public_martigny.pid)
+        assert location is Location.get_record_by_id(location.id)
+        assert identity_map.stats == dict(hits=2, misses=1, records=1)
+        # unknown and deleted records are not loaded
+        assert not Location.get_record_by_pid('unknown')
+        assert Location.get_record_by_pid(
+            loc_public_martigny.pid, with_deleted=True) is not location
+
+        # the updated records are invalidated
+        data = deepcopy(location)
+        name = data['name']
+        data['name'] = 'new name'
+        updated = location.update(data, dbcommit=True, reindex=True)
+        assert updated is not location
+        assert updated is Location.get_record_by_pid(loc_public_martigny.pid)
+        assert updated['name'] == 'new name'
+        data['name'] = name
+        updated.update(data, dbcommit=True, reindex=True)
+        assert Location.get_record_by_pid(
+            loc_public_martigny.pid)['name'] == name
+
+    # the identity map is closed with the context
+    assert 'record_identity_map' not in g
+    assert get_record_identity_map() is None
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+#
+# RERO ILS
+# Copyright (C) 2021 RERO
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""API tests for the cached labels of the reference records."""
+
+from copy import deepcopy
+
+import mock
+
+from rero_ils.modules.documents.serializers import DocumentJSONSerializer
+from rero_ils.modules.reference_labels import clear_reference_labels, \
+    get_reference_label, get_reference_labels, get_reference_record, \
+    load_reference_records
+
+
+def test_reference_labels(app, org_martigny, lib_martigny, loc_public_martigny,
+                          item_type_standard_martigny):
+    """Test the cached labels of the reference records."""
+    for pid_type, record in [('org', org_martigny), ('lib', lib_martigny),
+                             ('loc', loc_public_martigny),
+                             ('itty', item_type_standard_martigny)]:
+        clear_reference_labels(pid_type)
+        assert get_reference_labels(pid_type)[record.pid] == record['name']
+        assert get_reference_label(pid_type, record.pid) == record['name']
+    assert get_reference_label('lib', 'unknown') is None
+    assert get_reference_record('lib', lib_martigny.pid) == {
+        'name': lib_martigny['name'],
+        'organisation.pid': org_martigny.pid
+    }
+
+    # the cached label is updated with the record
+    data = deepcopy(lib_martigny)
+    name = data['name']
+    data['name'] = 'new name'
+    library = lib_martigny.update(data, dbcommit=True, reindex=True)
+    assert get_reference_label('lib', library.pid) == 'new name'
+    assert get_reference_record('lib', library.pid)['organisation.pid'] == \
+        org_martigny.pid
+    data['name'] = name
+    library.update(data, dbcommit=True, reindex=True)
+    assert get_reference_label('lib', library.pid) == name
+
+
+def test_reference_labels_reload(app, lib_martigny):
+    """Test the reload of the reference records for unknown pids."""
+    clear_reference_labels('lib')
+    with mock.patch(
+        'rero_ils.modules.reference_labels.load_reference_records',
+        wraps=load_reference_records
+    ) as load:
+        get_reference_label('lib', lib_martigny.pid)
+        assert load.call_count == 1
+        # an unknown pid loads the records again at most once by delay
+        assert get_reference_label('lib', 'unknown') is None
+        assert get_reference_label('lib', 'unknown') is None
+        assert load.call_count == 1
+        app.config['RERO_ILS_REFERENCE_LABELS_RELOAD_DELAY'] = -1
+        assert get_reference_label('lib', 'unknown') is None
+        assert load.call_count == 2
+        app.config['RERO_ILS_REFERENCE_LABELS_RELOAD_DELAY'] = 60
+
+
+def test_reference_labels_library_buckets(
+        app, org_martigny, lib_martigny, lib_sion):
+    """Test the library buckets of an organisation."""
+    buckets = DocumentJSONSerializer._process_library_buckets(
+        org_martigny.pid,
+        [{'key': lib_martigny.pid}, {'key': lib_sion.pid},
+         {'key': 'unknown'}]
+    )
+    assert buckets == [
+        {'key': lib_martigny.pid, 'name': lib_martigny['name']}]
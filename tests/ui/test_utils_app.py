@@ -19,8 +19,9 @@
 
 from rero_ils.modules.documents.api import Document
 from rero_ils.modules.patrons.api import Patron
-from rero_ils.modules.utils import get_record_class_from_schema_or_pid_type, \
-    get_ref_for_pid, pids_exists_in_data
+from rero_ils.modules.utils import clear_known_pids, get_existing_pids, \
+    get_record_class_from_schema_or_pid_type, get_ref_for_pid, is_known_pid, \
+    pids_exists_in_data
 from rero_ils.utils import get_current_language, remove_empties_from_dict
 
 
@@ -98,6 +99,26 @@ def test_pids_exists_in_data(app, org_martigny, lib_martigny):
     assert ok == ['test: Pid does not exist: org org2']
 
 
+def test_get_existing_pids(app, org_martigny, lib_martigny):
+    """Test the grouped pids existence query."""
+    clear_known_pids()
+    assert not is_known_pid('org', org_martigny.pid)
+    assert get_existing_pids([
+        ('org', org_martigny.pid),
+        ('lib', lib_martigny.pid),
+        ('org', 'unknown')
+    ]) == {('org', org_martigny.pid), ('lib', lib_martigny.pid)}
+    assert is_known_pid('org', org_martigny.pid)
+    assert is_known_pid('lib', lib_martigny.pid)
+    assert not is_known_pid('org', 'unknown')
+    # the known pids are not queried again
+    assert get_existing_pids([('org', org_martigny.pid)]) == \
+        {('org', org_martigny.pid)}
+
+    clear_known_pids()
+    assert not is_known_pid('org', org_martigny.pid)
+
+
 def test_get_language(app):
     """Test get the current language of the application."""
     assert get_current_language() == 'en'
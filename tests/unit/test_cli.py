@@ -17,12 +17,13 @@
 
 """Test cli."""
 
+import json
 from os.path import dirname, join
 
 from click.testing import CliRunner
 
 from rero_ils.modules.cli import check_validate, extract_from_xml, \
-    reindex_missing, tokens_create
+    marc21json, reindex_missing, tokens_create
 from rero_ils.modules.organisations.api import Organisation
 
 
@@ -91,3 +92,23 @@ def test_cli_extract_from_xml(app, tmpdir, document_marcxml, script_info):
     results_output = result.output.split('\n')
     assert results_output[0] == 'Extract pids from xml: '
     assert results_output[4] == 'Search pids count: 1'
+
+
+def test_cli_marc21tojson(app, tmpdir, script_info):
+    """Test marc21 to json cli."""
+    xml_file_name = join(dirname(__file__), '..', 'data', 'documents.xml')
+    json_file_name = join(tmpdir, 'documents.json')
+    error_file_name = join(tmpdir, 'documents_errors.xml')
+    runner = CliRunner()
+    result = runner.invoke(
+        marc21json,
+        [xml_file_name, json_file_name, error_file_name, '-p', '2', '-c', '1'],
+        obj=script_info
+    )
+    assert result.exit_code == 0
+    assert 'Total records: 2-2' in result.output
+    with open(json_file_name) as json_file:
+        records = json.load(json_file)
+    with open(error_file_name, 'rb') as error_file:
+        errors = error_file.read().count(b'<record>')
+    assert len(records) + errors == 2
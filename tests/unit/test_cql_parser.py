@@ -21,7 +21,7 @@ import pytest
 
 from rero_ils.modules.sru.cql_parser import RESERVED_PREFIXES, Boolean, \
     Diagnostic, Index, ModifiableObject, ModifierClause, PrefixableObject, \
-    PrefixedObject, Relation, SearchClause, Term, Triple, parse
+    PrefixedObject, Relation, SearchClause, Term, Triple, parse, to_es_query
 
 
 def test_diagnostic():
@@ -270,6 +270,21 @@ def test_errors():
     )
 
 
+def test_to_es_query(app):
+    """Check the cached CQL to Elasticsearch translation."""
+    to_es_query.cache_clear()
+    q_string = 'dc.anywhere all "spam hamm"'
+    assert to_es_query(q_string) == parse(q_string).to_es()
+    assert to_es_query(q_string) == parse(q_string).to_es()
+    cache_info = to_es_query.cache_info()
+    assert cache_info.hits == 1
+    assert cache_info.misses == 1
+
+    with pytest.raises(Diagnostic):
+        to_es_query('123 456')
+    assert to_es_query.cache_info().currsize == 1
+
+
 def test_prefixable_object():
     """Test PrefixableObject."""
     prefix_object = PrefixableObject(query='query')
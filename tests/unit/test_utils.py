@@ -17,13 +17,16 @@
 
 """Test utils."""
 
+import json
 import os
 from datetime import datetime
+from io import StringIO
 
 from rero_ils.modules.patron_types.api import PatronType
 from rero_ils.modules.patrons.api import Patron
 from rero_ils.modules.utils import add_years, extracted_data_from_ref, \
-    get_endpoint_configuration, get_schema_for_resource, read_json_record
+    get_endpoint_configuration, get_schema_for_resource, read_json_record, \
+    read_xml_record, read_xml_records
 from rero_ils.utils import get_current_language, language_iso639_2to1, \
     language_mapping, unique_list
 
@@ -46,6 +49,57 @@ def test_read_json_record(request):
         assert count == 2
 
 
+def test_read_json_record_strings(tmpdir):
+    """Test the json records reader with special characters in strings."""
+    data = '[\n  {"pid": "1", "title": "a [b] {c} \\"d\\" \\\\",\n' \
+        '   "notes": ["e\nf", {"g": "]"}]},\n  {"pid": "2"}\n]'
+    records = [
+        {'pid': '1', 'title': 'a [b] {c} "d" \\',
+         'notes': ['e\nf', {'g': ']'}]},
+        {'pid': '2'}
+    ]
+    for buf_size in [1, 2, 3, 1024]:
+        assert list(read_json_record(StringIO(data), buf_size)) == records
+    # sequence of records without array
+    assert list(read_json_record(StringIO(data[1:-1]), 5)) == records
+    file_name = os.path.join(tmpdir, 'records.json')
+    with open(file_name, 'w') as json_file:
+        json_file.write(data)
+    with open(file_name) as json_file:
+        assert list(read_json_record(json_file, use_mmap=True)) == records
+
+
+def test_read_json_record_mmap_multibyte(tmpdir):
+    """Test the mapped json records reader with multibyte characters."""
+    records = [{'pid': '1', 'title': 'Zürich €'}, {'pid': '2', 'title': '日本'}]
+    file_name = os.path.join(tmpdir, 'records.json')
+    with open(file_name, 'w', encoding='utf-8') as json_file:
+        json.dump(records, json_file, ensure_ascii=False)
+    for buf_size in [1, 2, 3, 1024]:
+        with open(file_name, encoding='utf-8') as json_file:
+            assert list(read_json_record(
+                json_file, buf_size, use_mmap=True)) == records
+
+
+def test_read_xml_records(request):
+    """Test the streaming xml records reader."""
+    file_name = os.path.join(request.fspath.dirname, '..', 'data',
+                             'documents.xml')
+    with open(file_name, 'rb') as xml_file:
+        records = list(read_xml_records(xml_file))
+    with open(file_name) as xml_file:
+        lazy_records = list(read_xml_record(xml_file))
+    assert len(records) == len(lazy_records) == 2
+    for record, lazy_record in zip(records, lazy_records):
+        # the namespaces are removed like with the lazy reader
+        assert record.tag == lazy_record.tag == 'record'
+        assert not record.nsmap
+        assert [child.tag for child in record] == \
+            [child.tag for child in lazy_record]
+        assert record.find('controlfield[@tag="001"]').text == \
+            lazy_record.find('controlfield[@tag="001"]').text
+
+
 def test_add_years():
     """Test adding years to a date."""
     initial_date = datetime.now()